@@ -1,11 +1,29 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+import os
+import logging
+import json
+import hashlib
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from app.db.connection import get_db
-from app.services.applicant_service import create_applicant, get_all_applicants,get_applicants_by_job
-from app.services.bulk_applicant_service import create_applicant_from_pdf
+from app.services.applicant_service import (
+    create_applicant, get_all_applicants, get_applicants_by_job, update_application_status
+)
+from app.services.bulk_stream_service import (
+    check_stream_request, start_stream_ingest, spool_upload, process_resume_part, summary_bucket
+)
+from app.services.idempotency_store import (
+    store as idempotency_store, STATE_COMPLETED, STATE_IN_FLIGHT, STATE_MISMATCH
+)
+from app.services.bulk_zip_service import ingest_resume_zip
+from app.services.applicant_search import search_applicants
+from app.services.resume_fulltext import fulltext_search
+from app.services.semantic_search import semantic_search
+from app.services.job_matcher import recommend_jobs
+from app.services.skill_service import find_applicants_by_skills, skill_vocabulary
 from app.api.v1.applicants.schemas import (
-    ApplicantCreate, BulkApplicantCreate, BulkUploadSummary, ApplicantResponse
+    ApplicantCreate, BulkApplicantCreate, BulkUploadSummary, ApplicantResponse, ApplicantSearchResponse,
+    SemanticSearchRequest, SemanticSearchResponse, ApplicationStatusUpdate
 )
 
 router = APIRouter()
@@ -83,94 +101,253 @@ async def get_applicants(db: Session = Depends(get_db)):
     status_code=202,
     response_model=BulkUploadSummary,
     summary="Bulk upload resumes",
-    description="assigned_hr & assigned_manager must be integers"
+    description=(
+        "assigned_hr & assigned_manager must be integers. Send an `Idempotency-Key` header "
+        "to make retries return the original summary instead of re-processing the files."
+    )
 )
-async def bulk_upload_applicants(
+def bulk_upload_applicants(
     payload: BulkApplicantCreate = Depends(),
     resumes: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200),
 ):
     if not resumes:
         raise HTTPException(status_code=400, detail="No files uploaded")
 
-    results: List[Dict] = []
-
-    for resume in resumes:
-        # default per-file result template
-        file_result = {
-            "filename": resume.filename or "unknown",
-            "applicant_id": None,
-            "email": None,
-            "name": None,
-            "status": "failed",
-            "status_code": None,
-            "error": None
-        }
-
-        if not resume.filename or not resume.filename.lower().endswith(".pdf"):
-            file_result["error"] = "Invalid file type (only PDFs allowed)"
-            file_result["status_code"] = 400
-            results.append(file_result)
-            continue
-
-        try:
-            result = create_applicant_from_pdf(
-                db=db,
-                pdf_file=resume,
-                job_id=payload.job_id,
-                source=payload.source,
-                expected_ctc=payload.expected_ctc,
-                notice_period_days=payload.notice_period_days,
-                application_status=payload.application_status,
-                assigned_hr=payload.assigned_hr,
-                assigned_manager=payload.assigned_manager,
-                comments=payload.comments,
-            )
-            parsed = result.get("parsed", {})
-            name = f"{parsed.get('first_name','')} {parsed.get('last_name','')}".strip() or "Unknown"
-
-            file_result.update({
-                "applicant_id": result.get("applicant_id"),
-                "email": parsed.get("email"),
-                "name": name,
-                "status": "success",
-                "status_code": 201,
-                "error": None
-            })
-        except HTTPException as he:
-            # we got an HTTPException from inside create_applicant_from_pdf (good to propagate its detail)
-            file_result["error"] = he.detail if isinstance(he.detail, str) else str(he.detail)
-            file_result["status_code"] = he.status_code or 500
-            file_result["status"] = "failed"
-        except Exception as e:
-            # generic exception
-            logging.exception(f"Unexpected error processing {resume.filename}: {e}")
-            file_result["error"] = str(e)
-            file_result["status_code"] = 500
-            file_result["status"] = "failed"
-        finally:
-            # Always append a per-file result
-            results.append(file_result)
-
-    successful = sum(1 for r in results if r["status"] == "success")
-    failed = sum(1 for r in results if r["status"] == "failed")
-
-    return BulkUploadSummary(
-        message="Bulk upload completed",
-        total=len(resumes),
-        successful=successful,
-        failed=failed,
-        results=results,
-        errors=[r["error"] for r in results if r["error"]]
-    )
+    # hash every file up front: the hashes fingerprint the submission and
+    # let already-ingested files be replayed instead of re-processed
+    parts = [spool_upload(resume) for resume in resumes]
+
+    def discard_parts():
+        for part in parts:
+            if part["tmp_path"] and os.path.exists(part["tmp_path"]):
+                try: os.unlink(part["tmp_path"])
+                except OSError: pass
+
+    if idempotency_key:
+        fingerprint = hashlib.sha256(json.dumps({
+            "payload": payload.model_dump(),
+            "files": sorted(f"{p['sha256'] or ''}:{p['filename']}" for p in parts),
+        }, sort_keys=True).encode("utf-8")).hexdigest()
+        state, stored = idempotency_store.begin(idempotency_key, fingerprint)
+        if state == STATE_COMPLETED:
+            discard_parts()
+            return BulkUploadSummary(**stored)
+        if state == STATE_IN_FLIGHT:
+            discard_parts()
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        if state == STATE_MISMATCH:
+            discard_parts()
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different upload")
+
+    try:
+        results: List[Dict] = []
+        for part in parts:
+            results.append(process_resume_part(part, payload))
+            if idempotency_key:
+                idempotency_store.renew(idempotency_key)
+
+        buckets = [summary_bucket(r) for r in results]
+
+        summary = BulkUploadSummary(
+            message="Bulk upload completed",
+            total=len(resumes),
+            successful=buckets.count("successful"),
+            linked=buckets.count("linked"),
+            failed=buckets.count("failed"),
+            results=results,
+            errors=[r["error"] for r in results if r["error"]]
+        )
+    except Exception:
+        discard_parts()
+        if idempotency_key:
+            idempotency_store.release(idempotency_key)
+        raise
+
+    if idempotency_key:
+        idempotency_store.complete(idempotency_key, summary.model_dump())
+    return summary
+
+
+@router.post(
+    "/bulk-applicants/stream",
+    status_code=202,
+    summary="Bulk upload resumes (streaming)",
+    description=(
+        "Same as /bulk-applicants but the multipart body is parsed as it arrives: each resume "
+        "is hashed, written and queued for scoring as soon as its part is received, while the "
+        "rest of the body keeps streaming. Batch fields go in the query string; files go in the "
+        "`resumes` form field. The response starts at once and streams NDJSON while the body "
+        "is still uploading: one line per file as its scoring finishes, followed by a final "
+        "`summary` line."
+    ),
+)
+async def bulk_upload_applicants_stream(
+    request: Request,
+    payload: BulkApplicantCreate = Depends(),
+):
+    boundary = check_stream_request(request)
+    return start_stream_ingest(request, boundary, payload)
 
+@router.post(
+    "/bulk-applicants/zip",
+    status_code=202,
+    response_model=BulkUploadSummary,
+    summary="Bulk upload resumes from a ZIP archive",
+    description="One ZIP of PDFs; each member is scored like a /bulk-applicants file"
+)
+def bulk_upload_applicants_zip(
+    payload: BulkApplicantCreate = Depends(),
+    archive: UploadFile = File(...),
+):
+    if not archive.filename or not archive.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Only ZIP archives allowed")
+    return BulkUploadSummary(**ingest_resume_zip(archive.file, payload))
 
 
 
 
+@router.get(
+    "/applicants/search",
+    response_model=ApplicantSearchResponse,
+    summary="Search applicants by skills, location, education and experience",
+)
+def search_applicants_endpoint(
+    skills: Optional[str] = Query(None, description="Comma-separated; every skill must match"),
+    location: Optional[str] = Query(None),
+    education: Optional[str] = Query(None),
+    min_experience: Optional[float] = Query(None, ge=0),
+    max_experience: Optional[float] = Query(None, ge=0),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    if min_experience is not None and max_experience is not None and min_experience > max_experience:
+        raise HTTPException(status_code=400, detail="min_experience cannot exceed max_experience")
+    skill_list = [s for s in (skills or "").split(",") if s.strip()]
+    try:
+        return search_applicants(db, skill_list, location, education, min_experience, max_experience,
+                                 page, page_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Applicant search failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search applicants.")
+
+
+@router.get(
+    "/applicants/search/skills",
+    response_model=ApplicantSearchResponse,
+    summary="Applicants by normalised skills (index seeks on applicant_skills)",
+)
+def skill_search_endpoint(
+    skills: str = Query(..., min_length=1, description='Comma-separated; aliases such as "py" or "aws" are resolved'),
+    match: str = Query("all", pattern="^(all|any)$", description="all: every skill; any: ranked by skills matched"),
+    job_id: Optional[int] = Query(None, description="Only applicants who applied to this job"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    skill_list = [s for s in skills.split(",") if s.strip()]
+    try:
+        return find_applicants_by_skills(db, skill_list, match == "all", job_id, page, page_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Skill search failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search applicants by skill.")
+
+
+@router.get(
+    "/applicants/skills/vocabulary",
+    response_model=List[Dict[str, Any]],
+    summary="Canonical skills with applicant counts (for skill-filter pickers)",
+)
+def skill_vocabulary_endpoint(
+    prefix: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    try:
+        return skill_vocabulary(db, prefix, limit)
+    except Exception as e:
+        logging.error(f"Skill vocabulary lookup failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list skills.")
+
+
+@router.get(
+    "/applicants/search/fulltext",
+    response_model=ApplicantSearchResponse,
+    summary="Ranked full-text search over resume text (BM25)",
+)
+def fulltext_search_endpoint(
+    q: str = Query(..., min_length=1, max_length=500, description='e.g. "kafka spark streaming airflow"'),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    try:
+        return fulltext_search(db, q, page, page_size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Full-text search failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search resumes.")
+
+
+@router.post(
+    "/applicants/semantic-search",
+    response_model=SemanticSearchResponse,
+    summary="Free-text semantic search across all stored resume embeddings",
+)
+def semantic_search_endpoint(request: SemanticSearchRequest, db: Session = Depends(get_db)):
+    try:
+        return semantic_search(db, request.query, request.top_k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Semantic search failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to run semantic search.")
+
+
+@router.get(
+    "/applicants/{applicant_id}/job-matches",
+    response_model=Dict[str, Any],
+    summary="Recommend open jobs for an applicant",
+)
+def job_matches_endpoint(
+    applicant_id: int,
+    top_k: int = Query(10, ge=1, le=100),
+    exclude_applied: bool = Query(False, description="Hide jobs the applicant already applied to"),
+    db: Session = Depends(get_db),
+):
+    if applicant_id <= 0:
+        raise HTTPException(status_code=400, detail="Invalid applicant_id")
+    try:
+        return recommend_jobs(db, applicant_id, top_k=top_k, exclude_applied=exclude_applied)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Job matching failed for applicant {applicant_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to match jobs.")
+
+
+@router.patch("/applications/{application_id}/status", response_model=Dict[str, Any])
+def change_application_status(
+    application_id: int,
+    payload: ApplicationStatusUpdate,
+    db: Session = Depends(get_db),
+):
+    """Move an application through the pipeline (keeps the job's funnel counters in step)."""
+    return update_application_status(db, application_id, payload.application_status)
+
 
 @router.get("/applicants/job/{job_id}", response_model=List[dict])
-async def get_applicants_for_job(job_id: int, db: Session = Depends(get_db)):
+async def get_applicants_for_job(
+    job_id: int,
+    collapse_duplicates: bool = Query(False, description="Fold near-duplicate resumes into one row"),
+    db: Session = Depends(get_db),
+):
     """
     Get applicants for a specific job_id.
     URL: /api/v1/applicants/job/{job_id}
@@ -178,7 +355,7 @@ async def get_applicants_for_job(job_id: int, db: Session = Depends(get_db)):
     if job_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid job_id")
 
-    applicants = get_applicants_by_job(db, job_id)
+    applicants = get_applicants_by_job(db, job_id, collapse_duplicates=collapse_duplicates)
     if not applicants:
         # consistent with get_applicants behavior: 404 if no rows found
         raise HTTPException(status_code=404, detail=f"No applicants found for job_id {job_id}")
@@ -61,5 +61,31 @@ class BulkUploadSummary(BaseModel):
     total: int
     successful: int
     failed: int
+    linked: int = 0  # known candidates whose application was attached to the existing applicant
     results: List[Dict[str, Any]]
     errors: List[str]
+
+
+class ApplicantSearchResponse(BaseModel):
+    total: int
+    page: int
+    page_size: int
+    results: List[Dict[str, Any]]
+
+
+class SemanticSearchRequest(BaseModel):
+    query: str = Field(..., min_length=2, max_length=2000, description="e.g. senior data engineer with Databricks and AWS")
+    top_k: int = Field(20, ge=1, le=200)
+
+
+class SemanticSearchResponse(BaseModel):
+    query: str
+    searched: int
+    results: List[Dict[str, Any]]
+
+
+class ApplicationStatusUpdate(BaseModel):
+    application_status: str = Field(
+        ...,
+        pattern="^(applied|shortlisted|under_review|interview_scheduled|offered|rejected|hired)$"
+    )
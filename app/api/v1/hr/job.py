@@ -10,12 +10,16 @@ from app.api.v1.hr.schemas import (
     JobRequestCreate,
     JobRequestResponse,
     JobRequestUpdate,
+    JobStatusUpdate,
+    ScoringWeightsUpdate,
 )
 from app.services.job_service import (
     # Jobs
     create_job,
     get_active_jobs,
     get_job_by_id,
+    update_job_status,
+    update_scoring_weights,
     # Job requests
     create_job_request,
     get_job_request_by_id,
@@ -25,6 +29,8 @@ from app.services.job_service import (
     delete_job_request,
     update_job_request,
 )
+from app.services.score_stats import get_score_histogram
+from app.services.funnel_service import get_job_funnel
 
 router = APIRouter(tags=["HR Jobs & Job Requests"])
 
@@ -171,3 +177,66 @@ def read_job(job_id: int, db: Session = Depends(get_db)):
         raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Database error: {str(exc)}") from exc
+
+
+@router.patch("/{job_id}/status", response_model=JobResponse)
+def change_job_status(job_id: int, payload: JobStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Open, hold or close a job posting.
+    Body: { "status": "closed" }
+    """
+    try:
+        return update_job_status(db, job_id, payload.status)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.put("/{job_id}/scoring-weights", response_model=Dict[str, Any])
+def set_scoring_weights(job_id: int, payload: ScoringWeightsUpdate, db: Session = Depends(get_db)):
+    """
+    Change how this job blends semantic and keyword scores and re-rank every
+    application of the job from the stored component scores.
+    """
+    try:
+        return update_scoring_weights(db, job_id, payload.semantic_weight, payload.high_priority_keyword_weight)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.get("/{job_id}/score-histogram", response_model=Dict[str, Any])
+def score_histogram(
+    job_id: int,
+    metric: str = Query("resume_overall_score",
+                        pattern="^(resume_overall_score|jd_matching_score|skills_matching_score)$"),
+    bins: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Distribution of one score across the job's applications: bin counts and p50/p75/p90/p95.
+    Example: GET /api/v1/hr/jobs/2/score-histogram?metric=jd_matching_score&bins=20
+    """
+    try:
+        return get_score_histogram(db, job_id, metric, bins)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.get("/{job_id}/funnel", response_model=Dict[str, Any])
+def job_funnel(job_id: int, db: Session = Depends(get_db)):
+    """
+    Application counts for a job by status, source and assigned HR, read from the
+    precomputed funnel counters.
+    Example: GET /api/v1/hr/jobs/2/funnel
+    """
+    try:
+        return get_job_funnel(db, job_id)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -29,6 +29,10 @@ class JobCreate(BaseModel):
     status: Optional[str] = Field('open', pattern="^(open|on_hold|closed)$")
     approved_by: Optional[int] = None
     approved_date: Optional[datetime] = None
+    prefilter_min_keyword_score: Optional[float] = Field(None, ge=0, le=1)
+    prefilter_experience_tolerance: Optional[float] = Field(None, ge=0)
+    semantic_weight: Optional[float] = Field(None, ge=0, le=1)
+    high_priority_keyword_weight: Optional[float] = Field(None, ge=0, le=1)
 
     class Config:
         from_attributes = True
@@ -53,6 +57,10 @@ class JobResponse(BaseModel):
     status: Optional[str] = "open"
     approved_by: Optional[int] = None
     approved_date: Optional[datetime] = None
+    prefilter_min_keyword_score: Optional[float] = Field(None, ge=0, le=1)
+    prefilter_experience_tolerance: Optional[float] = Field(None, ge=0)
+    semantic_weight: Optional[float] = Field(None, ge=0, le=1)
+    high_priority_keyword_weight: Optional[float] = Field(None, ge=0, le=1)
 
     class Config:
         from_attributes = True
@@ -136,6 +144,10 @@ class JobCreate(BaseModel):
     status: Optional[str] = Field('open', pattern="^(open|on_hold|closed)$")
     approved_by: Optional[int] = None
     approved_date: Optional[datetime] = None
+    prefilter_min_keyword_score: Optional[float] = Field(None, ge=0, le=1)
+    prefilter_experience_tolerance: Optional[float] = Field(None, ge=0)
+    semantic_weight: Optional[float] = Field(None, ge=0, le=1)
+    high_priority_keyword_weight: Optional[float] = Field(None, ge=0, le=1)
 
     class Config:
         from_attributes = True
@@ -159,6 +171,10 @@ class JobResponse(BaseModel):
     status: Optional[str] = "open"
     approved_by: Optional[int] = None
     approved_date: Optional[datetime] = None
+    prefilter_min_keyword_score: Optional[float] = Field(None, ge=0, le=1)
+    prefilter_experience_tolerance: Optional[float] = Field(None, ge=0)
+    semantic_weight: Optional[float] = Field(None, ge=0, le=1)
+    high_priority_keyword_weight: Optional[float] = Field(None, ge=0, le=1)
 
     class Config:
         from_attributes = True
@@ -215,3 +231,11 @@ class JobRequestUpdate(BaseModel):
             raise ValueError("MaxExperienceYears must be >= MinExperienceYears")
         return v
 
+
+class JobStatusUpdate(BaseModel):
+    status: str = Field(..., pattern="^(open|on_hold|closed)$")
+
+
+class ScoringWeightsUpdate(BaseModel):
+    semantic_weight: float = Field(..., ge=0, le=1, description="overall = w * semantic + (1 - w) * keyword")
+    high_priority_keyword_weight: float = Field(..., ge=0, le=1, description="keyword = w * high + (1 - w) * normal")
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Any, List, Dict, Optional
+from app.db.connection import get_db
+from app.services import interview_scheduler, interview_feedback_service
+from app.api.v1.interviews.schemas import (
+    InterviewCreate, BulkInterviewCreate, InterviewCancel, BulkInterviewResponse, InterviewFeedbackCreate, naive_local
+)
+
+router = APIRouter()
+
+
+@router.post("", status_code=201, response_model=Dict[str, Any])
+def schedule_interview(payload: InterviewCreate, db: Session = Depends(get_db)):
+    """
+    Book one interview. With scheduled_date the panel is checked for overlaps (409 with
+    the clashing schedule_ids and the next common free slot); without it the next
+    common free slot at or after not_before is booked.
+    """
+    item = payload.model_dump()
+    item["interviewer_ids"] = sorted(set(payload.interviewer_ids))
+    return interview_scheduler.schedule_interviews(db, [item], fail_on_conflict=True)[0]
+
+
+@router.post("/bulk", status_code=201, response_model=BulkInterviewResponse)
+def schedule_shortlist(payload: BulkInterviewCreate, db: Session = Depends(get_db)):
+    """Book one interview per application for the same panel, back to back in the next free slots."""
+    common = payload.model_dump(exclude={"application_ids"})
+    common["interviewer_ids"] = sorted(set(payload.interviewer_ids))
+    results = interview_scheduler.schedule_interviews(
+        db, [{**common, "application_id": application_id} for application_id in payload.application_ids]
+    )
+    scheduled = sum(1 for r in results if r["status"] == "scheduled")
+    return {"scheduled": scheduled, "conflicts": len(results) - scheduled, "results": results}
+
+
+@router.get("/availability", response_model=List[Dict[str, Any]])
+def panel_availability(
+    interviewer_ids: List[int] = Query(..., description="Repeat for each panel member"),
+    duration_minutes: int = Query(60, ge=5, le=480),
+    not_before: Optional[datetime] = Query(None),
+    count: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Next free slots common to the whole panel."""
+    return interview_scheduler.find_common_slots(db, sorted(set(interviewer_ids)), duration_minutes,
+                                                 naive_local(not_before), count)
+
+
+@router.get("/interviewers/{interviewer_id}/bookings", response_model=List[Dict[str, Any]])
+def interviewer_bookings(
+    interviewer_id: int,
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Active bookings of one interviewer in [start, end) (default: the next 7 days)."""
+    interview_scheduler.index.sync(db)
+    start = naive_local(start) or datetime.now()
+    end = naive_local(end) or start + timedelta(days=7)
+    return interview_scheduler.index.bookings(interviewer_id, start, end)
+
+
+@router.patch("/{schedule_id}/cancel", response_model=Dict[str, Any])
+def cancel_interview(schedule_id: int, payload: InterviewCancel, db: Session = Depends(get_db)):
+    return interview_scheduler.cancel_interview(db, schedule_id, payload.remarks)
+
+
+@router.post("/{schedule_id}/feedback", status_code=201, response_model=Dict[str, Any])
+def add_feedback(schedule_id: int, payload: InterviewFeedbackCreate, db: Session = Depends(get_db)):
+    """Record one interviewer's scores for an interview (a repeat replaces them; updates the round's aggregate)."""
+    return interview_feedback_service.record_feedback(db, schedule_id, payload.model_dump())
+
+
+@router.get("/applications/{application_id}/performance", response_model=List[Dict[str, Any]])
+def application_performance(application_id: int, db: Session = Depends(get_db)):
+    """Per-round mean / min / max of each score and recommendation counts for one application."""
+    return interview_feedback_service.get_application_interview_rounds(db, application_id)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any
+
+
+def naive_local(value: Optional[datetime]) -> Optional[datetime]:
+    """interview_schedule stores naive server-local times; convert offset-aware input (e.g. ...Z) to that."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class InterviewCreate(BaseModel):
+    application_id: int
+    interviewer_ids: List[int] = Field(..., min_length=1, description="Panel; every member must be free")
+    scheduled_date: Optional[datetime] = Field(
+        None, description="Start time; omit to book the panel's next common free slot"
+    )
+    not_before: Optional[datetime] = Field(None, description="Earliest start when scheduled_date is omitted")
+    duration_minutes: int = Field(60, ge=5, le=480)
+    round_number: int = Field(1, ge=1)
+    round_type: Optional[str] = Field(None, max_length=50)
+    manager_id: Optional[int] = None
+    meeting_link: Optional[str] = Field(None, max_length=255)
+    location: Optional[str] = Field(None, max_length=255)
+    remarks: Optional[str] = None
+    created_by: Optional[int] = None
+
+    @field_validator("scheduled_date", "not_before")
+    @classmethod
+    def to_naive_local(cls, v):
+        return naive_local(v)
+
+
+class BulkInterviewCreate(BaseModel):
+    application_ids: List[int] = Field(..., min_length=1, max_length=200, description="Shortlist, booked in order")
+    interviewer_ids: List[int] = Field(..., min_length=1)
+    not_before: Optional[datetime] = None
+    duration_minutes: int = Field(60, ge=5, le=480)
+    round_number: int = Field(1, ge=1)
+    round_type: Optional[str] = Field(None, max_length=50)
+    manager_id: Optional[int] = None
+    meeting_link: Optional[str] = Field(None, max_length=255)
+    location: Optional[str] = Field(None, max_length=255)
+    created_by: Optional[int] = None
+
+    @field_validator("not_before")
+    @classmethod
+    def to_naive_local(cls, v):
+        return naive_local(v)
+
+
+class InterviewCancel(BaseModel):
+    remarks: Optional[str] = None
+
+
+class BulkInterviewResponse(BaseModel):
+    scheduled: int
+    conflicts: int
+    results: List[Dict[str, Any]]
+
+
+class InterviewFeedbackCreate(BaseModel):
+    interviewer_id: int
+    technical_score: Optional[float] = Field(None, ge=0, le=100)
+    communication_score: Optional[float] = Field(None, ge=0, le=100)
+    problem_solving_score: Optional[float] = Field(None, ge=0, le=100)
+    domain_knowledge_score: Optional[float] = Field(None, ge=0, le=100)
+    team_fit_score: Optional[float] = Field(None, ge=0, le=100)
+    attitude_score: Optional[float] = Field(None, ge=0, le=100)
+    final_rating: Optional[float] = Field(None, ge=0, le=100)
+    strengths: Optional[str] = None
+    weaknesses: Optional[str] = None
+    recommendation: Optional[str] = Field(None, pattern="^(strong_yes|yes|maybe|no)$")
+    feedback: Optional[str] = None
@@ -5,6 +5,7 @@ from typing import Optional, List
 
 from app.db.connection import get_db
 from app.services.applicant_service import create_applicant, get_all_applicants
+from app.services.users_creation import import_users_csv
 from app.api.v1.applicants.schemas import ApplicantCreate  # optional, keep if used
 
 
@@ -91,4 +92,17 @@ async def get_applicants(db: Session = Depends(get_db)):
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching applicants: {str(exc)}"
-        ) from exc
\ No newline at end of file
+        ) from exc
+
+@router.post("/import", status_code=201)
+def import_users(
+    file: UploadFile = File(..., description="CSV with emp_id, username, password_hash, email, role, ..."),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-create users from a CSV (e.g. onboarding a whole department).
+    Passwords are hashed in parallel and all rows are inserted in one batched statement.
+    """
+    if not file.filename or not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files allowed")
+    return import_users_csv(db, file.file.read())
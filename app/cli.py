@@ -0,0 +1,120 @@
+# app/cli.py
+"""
+Offline maintenance commands; they talk to the database directly, no API workers involved.
+
+    python -m app.cli ingest --job-id 7 --source Agency ./resumes
+    python -m app.cli rescore --job-id 7 --status shortlisted
+    python -m app.cli backfill-skills
+    python -m app.cli backfill-embeddings
+"""
+import argparse
+import logging
+import sys
+from datetime import date
+
+
+def _ingest(args) -> int:
+    from app.services.batch_ingest import ingest_directory
+
+    summary = ingest_directory(
+        args.directory,
+        job_id=args.job_id,
+        source=args.source,
+        application_status=args.status,
+        assigned_hr=args.assigned_hr,
+        assigned_manager=args.assigned_manager,
+        comments=args.comments,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        recursive=args.recursive,
+    )
+    return 1 if summary["failed"] else 0
+
+
+def _rescore(args) -> int:
+    from app.services.batch_rescore import rescore_applications
+
+    summary = rescore_applications(
+        job_id=args.job_id,
+        applied_from=args.applied_from,
+        applied_to=args.applied_to,
+        status=args.status,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart,
+        dry_run=args.dry_run,
+    )
+    return 1 if summary["failed"] else 0
+
+
+def _backfill_skills(args) -> int:
+    from app.db.connection import SessionLocal
+    from app.services.skill_service import backfill_applicant_skills
+
+    db = SessionLocal()
+    try:
+        backfill_applicant_skills(db, batch_size=args.batch_size, after=args.after)
+    finally:
+        db.close()
+    return 0
+
+
+def _backfill_embeddings(args) -> int:
+    from app.services.embedding_backfill import backfill_embeddings
+
+    summary = backfill_embeddings(workers=args.workers, chunk_size=args.chunk_size)
+    return 1 if summary["failed"] else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="UBTI Hiring Portal offline tools")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every resume (INFO level)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="parse, score and insert every PDF in a directory for one job")
+    ingest.add_argument("directory")
+    ingest.add_argument("--job-id", type=int, required=True)
+    ingest.add_argument("--source", required=True, help="application source, e.g. the agency name")
+    ingest.add_argument("--status", default="pending", help="initial application_status (default: pending)")
+    ingest.add_argument("--assigned-hr", type=int)
+    ingest.add_argument("--assigned-manager", type=int)
+    ingest.add_argument("--comments")
+    ingest.add_argument("--workers", type=int, help="scoring processes (default: INGEST_WORKERS or CPU count)")
+    ingest.add_argument("--batch-size", type=int, help="resumes per write transaction (default: INGEST_BATCH_SIZE)")
+    ingest.add_argument("--checkpoint", help="progress file (default: one per job and directory under INGEST_CHECKPOINT_DIR)")
+    ingest.add_argument("--recursive", action="store_true", help="include PDFs in subdirectories")
+    ingest.set_defaults(handler=_ingest)
+
+    rescore = commands.add_parser("rescore", help="re-score stored applications with the current scorer")
+    rescore.add_argument("--job-id", type=int)
+    rescore.add_argument("--applied-from", type=date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    rescore.add_argument("--applied-to", type=date.fromisoformat, help="YYYY-MM-DD, inclusive")
+    rescore.add_argument("--status", help="only applications in this application_status")
+    rescore.add_argument("--workers", type=int, help="scoring processes (default: INGEST_WORKERS or CPU count)")
+    rescore.add_argument("--chunk-size", type=int, help="rows per executemany write (default: RESCORE_CHUNK_SIZE)")
+    rescore.add_argument("--checkpoint", help="progress file (default: rescore.json under INGEST_CHECKPOINT_DIR)")
+    rescore.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    rescore.add_argument("--dry-run", action="store_true", help="score and report changes without writing")
+    rescore.set_defaults(handler=_rescore)
+
+    backfill = commands.add_parser("backfill-skills", help="(re)build applicant_skills from applicants.skills")
+    backfill.add_argument("--batch-size", type=int, default=1000, help="applicants per transaction")
+    backfill.add_argument("--after", type=int, default=0, help="resume after this applicant_id")
+    backfill.set_defaults(handler=_backfill_skills)
+
+    embeddings = commands.add_parser("backfill-embeddings",
+                                     help="store resume vectors for applicants without one of the current model")
+    embeddings.add_argument("--workers", type=int, help="embedding processes (default: INGEST_WORKERS or CPU count)")
+    embeddings.add_argument("--chunk-size", type=int, help="vectors per write (default: RESCORE_CHUNK_SIZE)")
+    embeddings.set_defaults(handler=_backfill_embeddings)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,96 @@ class Settings(BaseSettings):
     # ← CHANGE: Accept as string from .env
     BACKEND_CORS_ORIGINS: str = ""
 
+    # Password hashing (bcrypt runs in a dedicated pool, off the event loop)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Bulk resume upload limits (enforced while the request streams in)
+    BULK_UPLOAD_MAX_FILE_MB: int = 10
+    BULK_UPLOAD_MAX_TOTAL_MB: int = 500
+    # streaming upload: resumes scored concurrently while the body is still arriving
+    BULK_STREAM_CONCURRENCY: int = 4
+
+    # ZIP archive ingestion (zip-bomb guards + parallel scoring)
+    BULK_ZIP_MAX_ENTRIES: int = 1000
+    BULK_ZIP_MAX_UNCOMPRESSED_MB: int = 2048
+    BULK_ZIP_CONCURRENCY: int = 4
+
+    # Idempotency-Key / per-file replay store for bulk uploads (SQLite, shared per host)
+    IDEMPOTENCY_DB_PATH: str = "uploads/idempotency.sqlite3"
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_LEASE_SECONDS: int = 300  # in-flight claim, renewed after every file
+
+    # Embedding model. If INFERENCE_SOCKET is set, workers use the shared
+    # inference sidecar (python -m app.services.inference_sidecar) instead of
+    # loading their own copy of the model.
+    # EMBEDDING_BACKEND: sentence-transformers | onnx | hashing (see embedders.py)
+    EMBEDDING_BACKEND: str = "sentence-transformers"
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    ONNX_MODEL_DIR: str = "models/all-MiniLM-L6-v2-onnx"
+    ONNX_QUANTIZE_INT8: bool = True
+    HASHING_EMBED_DIM: int = 384
+    INFERENCE_SOCKET: str = ""
+
+    # Micro-batching of concurrent encode calls (see embedding_batcher.py)
+    EMBED_BATCHING_ENABLED: bool = True
+    EMBED_BATCH_MAX_SIZE: int = 64
+    EMBED_BATCH_MAX_WAIT_MS: float = 5.0
+    # onnxruntime intra-op threads per session; 0 = one per core (fine for a single API process)
+    EMBED_INTRA_OP_THREADS: int = 0
+
+    # Long documents are split into overlapping word windows (MiniLM truncates
+    # at 256 word pieces) and the window vectors pooled: EMBED_POOLING = mean | max
+    EMBED_WINDOW_WORDS: int = 180
+    EMBED_WINDOW_OVERLAP: int = 30
+    EMBED_MAX_WINDOWS: int = 16
+    EMBED_POOLING: str = "mean"
+
+    # Scoring cascade: defaults for jobs whose prefilter_* columns are NULL
+    PREFILTER_ENABLED: bool = True
+    PREFILTER_MIN_KEYWORD_SCORE: float = 0.0
+    PREFILTER_EXPERIENCE_TOLERANCE_YEARS: float = 1.0
+
+    # Score blend: defaults for jobs whose semantic_weight / high_priority_keyword_weight are NULL
+    SCORE_SEMANTIC_WEIGHT: float = 0.6          # overall = w * semantic + (1 - w) * keyword
+    SCORE_HIGH_PRIORITY_KEYWORD_WEIGHT: float = 0.7  # keyword = w * high + (1 - w) * normal
+
+    # Persistent score cache (score_cache table)
+    SCORE_CACHE_ENABLED: bool = True
+
+    # Near-duplicate resumes (MinHash over word shingles + LSH banding)
+    MINHASH_NUM_PERM: int = 128
+    MINHASH_SHINGLE_SIZE: int = 5
+    MINHASH_LSH_BANDS: int = 16
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+
+    # Resume full-text index (BM25, memory-mapped on-disk segments)
+    FULLTEXT_INDEX_DIR: str = "uploads/fulltext"
+    FULLTEXT_FLUSH_DOCS: int = 256
+    FULLTEXT_FLUSH_SECONDS: float = 30.0
+    FULLTEXT_MAX_SEGMENTS: int = 8
+
+    # Interview scheduling: bookable hours (local time) and slot grid for suggested slots
+    INTERVIEW_WORKDAY_START_HOUR: int = 9
+    INTERVIEW_WORKDAY_END_HOUR: int = 18
+    INTERVIEW_SKIP_WEEKENDS: bool = True
+    INTERVIEW_SLOT_MINUTES: int = 15
+    INTERVIEW_DEFAULT_DURATION_MINUTES: int = 60
+    INTERVIEW_SEARCH_DAYS: int = 60
+
+    # Offline ingestion (python -m app.cli ingest); INGEST_WORKERS = 0 uses every core
+    INGEST_WORKERS: int = 0
+    INGEST_BATCH_SIZE: int = 50
+    INGEST_CHECKPOINT_DIR: str = "uploads/ingest_checkpoints"
+    # torch / onnxruntime / BLAS threads inside each offline worker process; the
+    # pool already runs one process per core, wider pools only oversubscribe
+    INGEST_THREADS_PER_WORKER: int = 1
+
+    # Offline re-scoring (python -m app.cli rescore): rows per write chunk and the
+    # extracted-text cache it keeps by resume SHA-256
+    RESCORE_CHUNK_SIZE: int = 500
+    RESUME_TEXT_CACHE_DIR: str = "uploads/resume_text"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,13 +1,51 @@
 # app/main.py
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.logging import setup_logging
 from app.config import settings
+from app.db.connection import SessionLocal
+from app.services import near_duplicates, applicant_search, resume_fulltext, semantic_search, interview_scheduler
 
 # === IMPORT ROUTERS ===
 from app.api.v1.users.router import router as users_router
 from app.api.v1.hr.job import router as hr_job_router
 from app.api.v1.applicants.router import router as applicants_router
+from app.api.v1.interviews.router import router as interviews_router
+
+
+def warm_indexes():
+    """Build the in-memory applicant indexes from the database once per worker."""
+    db = SessionLocal()
+    try:
+        loaded = near_duplicates.index.sync(db)
+        logging.info(f"Near-duplicate LSH index loaded with {loaded} signatures")
+    except Exception as e:
+        logging.warning(f"Near-duplicate index not loaded at startup: {e}")
+    try:
+        loaded = applicant_search.index.sync(db)
+        logging.info(f"Applicant search index loaded with {loaded} applicants")
+    except Exception as e:
+        logging.warning(f"Applicant search index not loaded at startup: {e}")
+    try:
+        resume_fulltext.index.refresh()
+        logging.info(f"Resume full-text index loaded with {len(resume_fulltext.index)} resumes")
+        resume_fulltext.reconcile_in_background()  # resumes lost with a crashed worker's buffer
+    except Exception as e:
+        logging.warning(f"Resume full-text index not loaded at startup: {e}")
+    try:
+        from app.services.aishortlist import embedding_version
+        loaded = semantic_search.index.sync(db, embedding_version())
+        logging.info(f"Semantic search matrix loaded with {loaded} resume embeddings")
+    except Exception as e:
+        logging.warning(f"Semantic search matrix not loaded at startup: {e}")
+    try:
+        loaded = interview_scheduler.index.sync(db)
+        logging.info(f"Interview calendars loaded with {loaded} upcoming bookings")
+    except Exception as e:
+        logging.warning(f"Interview calendars not loaded at startup: {e}")
+    finally:
+        db.close()
 
 
 def create_app() -> FastAPI:
@@ -31,6 +69,7 @@ def create_app() -> FastAPI:
     app.include_router(users_router, prefix="/api/v1/users", tags=["Users"])
     app.include_router(hr_job_router, prefix="/api/v1/hr/jobs", tags=["HR Jobs"])
     app.include_router(applicants_router, prefix="/api/v1/applicants", tags=["Applicants"])
+    app.include_router(interviews_router, prefix="/api/v1/interviews", tags=["Interviews"])
 
     # Test route
     @app.get("/test-cors")
@@ -46,10 +85,12 @@ def create_app() -> FastAPI:
         print("Starting up UBTI Hiring Portal...")
         print(f"Project: {settings.PROJECT_NAME}")
         print(f"CORS Allowed Origins: {settings.get_cors_origins()}")
+        warm_indexes()
 
     @app.on_event("shutdown")
     async def shutdown_event():
         print("Shutting down...")
+        resume_fulltext.index.flush()
 
     return app
 
@@ -1,7 +1,9 @@
 import re
 import logging
+from functools import lru_cache
+from typing import List
 from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
 import nltk
 from nltk.corpus import stopwords
 from sqlalchemy.orm import Session
@@ -10,101 +12,338 @@ from datetime import datetime
 from fastapi import HTTPException, Depends
 from app.config import settings
 from app.db.connection import get_db
+from app.services.embedding_batcher import BatchingEncoder
+from app.services.embedders import get_embedder
+from app.services import score_cache, funnel_service
 
 # Download stopwords if not already present
 nltk.download('stopwords')
 
+
+def _load_model():
+    """
+    Use the shared inference sidecar when INFERENCE_SOCKET is configured,
+    otherwise load the configured EMBEDDING_BACKEND in-process.
+    Concurrent encode calls are micro-batched unless EMBED_BATCHING_ENABLED is off.
+    """
+    if settings.INFERENCE_SOCKET:
+        from app.services.inference_sidecar import RemoteEncoder
+        model = RemoteEncoder(settings.INFERENCE_SOCKET)
+    else:
+        model = get_embedder(settings.EMBEDDING_BACKEND)
+    if settings.EMBED_BATCHING_ENABLED:
+        model = BatchingEncoder(model, settings.EMBED_BATCH_MAX_SIZE, settings.EMBED_BATCH_MAX_WAIT_MS)
+    return model
+
+
+# Bump whenever the scoring formula / preprocessing changes (invalidates score_cache)
+SCORER_VERSION = "3"
+
 # Load the embedding model and stopwords
-MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL = _load_model()
 STOPWORDS = set(stopwords.words('english'))
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def evaluate_resume_match(resume_pdf_path, jd_text, high_priority_keywords, normal_keywords, 
-                          job_id, applicant_id, source, application_status, assigned_hr=None, 
-                          assigned_manager=None, comments=None, db: Session = Depends(get_db)):
+
+def _split_windows(text: str) -> List[str]:
+    """Overlapping word windows, capped at EMBED_MAX_WINDOWS per document."""
+    words = text.split()
+    size = max(1, settings.EMBED_WINDOW_WORDS)
+    step = max(1, size - settings.EMBED_WINDOW_OVERLAP)
+    if len(words) <= size:
+        return [" ".join(words)]
+    windows = []
+    for start in range(0, len(words), step):
+        windows.append(" ".join(words[start:start + size]))
+        if start + size >= len(words) or len(windows) >= settings.EMBED_MAX_WINDOWS:
+            break
+    return windows
+
+
+def embed_documents(texts: List[str]) -> np.ndarray:
+    """
+    One L2-normalised vector per document. All windows of all documents go to
+    the model in a single encode call and are pooled back per document
+    (EMBED_POOLING = mean | max), so cost grows linearly with text length.
+    """
+    windows, owners = [], []
+    for doc_idx, doc in enumerate(texts):
+        for window in _split_windows(doc):
+            windows.append(window)
+            owners.append(doc_idx)
+
+    vectors = np.asarray(MODEL.encode(windows, normalize_embeddings=True), dtype=np.float32)
+    owners = np.asarray(owners)
+    pooled = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+    for doc_idx in range(len(texts)):
+        doc_vectors = vectors[owners == doc_idx]
+        if settings.EMBED_POOLING == "max":
+            pooled[doc_idx] = doc_vectors.max(axis=0)
+        else:
+            pooled[doc_idx] = doc_vectors.mean(axis=0)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.maximum(norms, 1e-12)
+
+def embedding_version() -> str:
+    """Identifies the resume vectors this process produces; stored vectors are only comparable within one version."""
+    model_version = MODEL.version  # a RemoteEncoder reports the sidecar's model, not this process's settings
+    return (f"{model_version}|w{settings.EMBED_WINDOW_WORDS}-{settings.EMBED_WINDOW_OVERLAP}"
+            f"-{settings.EMBED_MAX_WINDOWS}-{settings.EMBED_POOLING}")
+
+
+def scorer_version() -> str:
+    """Everything that changes the scores for identical inputs; part of the score-cache key."""
+    return f"{SCORER_VERSION}|{embedding_version()}"
+
+
+def embed_text(raw_text: str) -> np.ndarray:
+    """Normalised vector of a resume or a free-text query, preprocessed the same way the scorer does."""
+    return embed_documents([preprocess_text(raw_text or "")])[0]
+
+
+def extract_text_from_pdf(file_path):
+    reader = PdfReader(file_path)
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
+def preprocess_text(text):
+    """Lowercase, remove special characters and stopwords."""
+    text = text.lower()
+    text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
+    tokens = text.split()
+    tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 1]
+    return " ".join(tokens)
+
+
+def normalize_keywords(values) -> set:
+    """
+    jobs.key_skills / additional_skills arrive as one comma-separated string per row;
+    split them into the same preprocessed tokens the resume text is reduced to,
+    otherwise a token can never match the whole skills string.
+    """
+    keywords = set()
+    for value in values or ():
+        if value:
+            keywords.update(preprocess_text(str(value)).split())
+    return keywords
+
+
+@lru_cache(maxsize=64)
+def _jd_embedding(jd_clean: str) -> np.ndarray:
+    """Vector of a preprocessed JD; re-scoring many resumes of one job embeds it once."""
+    return embed_documents([jd_clean])[0]
+
+
+def compute_overall_similarity(resume_text, jd_text):
+    """Semantic similarity between the resume and job description."""
+    embeddings = embed_documents([resume_text, jd_text])
+    similarity = np.dot(embeddings[0], embeddings[1])
+    return round(float(similarity), 4)
+
+
+def default_weights():
+    return {
+        "semantic": settings.SCORE_SEMANTIC_WEIGHT,
+        "high_priority": settings.SCORE_HIGH_PRIORITY_KEYWORD_WEIGHT,
+    }
+
+
+def compute_keyword_components(resume_text, jd_text, high_priority_keywords, normal_keywords):
+    """Fractions of the high-priority and normal keywords found in both resume and JD."""
+    resume_tokens = set(resume_text.split())
+    jd_tokens = set(jd_text.split())
+
+    high_score = sum(1 for word in resume_tokens if word in jd_tokens and word in high_priority_keywords)
+    normal_score = sum(1 for word in resume_tokens if word in jd_tokens and word in normal_keywords)
+
+    high_match = high_score / len(high_priority_keywords) if high_priority_keywords else 0
+    normal_match = normal_score / len(normal_keywords) if normal_keywords else 0
+    return round(high_match, 4), round(normal_match, 4)
+
+
+def combine_keyword_score(high_match, normal_match, weights=None):
+    w = (weights or default_weights())["high_priority"]
+    return round(w * high_match + (1 - w) * normal_match, 4)
+
+
+def combine_overall_score(semantic_similarity, keyword_score, weights=None):
+    """Overall score; without a semantic score (prefiltered) only the keyword share counts."""
+    w = (weights or default_weights())["semantic"]
+    if semantic_similarity is None:
+        return round((1 - w) * keyword_score, 4)
+    return round(w * semantic_similarity + (1 - w) * keyword_score, 4)
+
+
+def compute_weighted_keyword_score(resume_text, jd_text, high_priority_keywords, normal_keywords, weights=None):
+    """Weighted keyword match score."""
+    high_match, normal_match = compute_keyword_components(resume_text, jd_text, high_priority_keywords, normal_keywords)
+    return combine_keyword_score(high_match, normal_match, weights)
+
+
+def prefilter_reason(keyword_score, high_priority_keywords, experience_years, prefilter):
     """
-    Evaluates a resume match against a job description and stores the results in the database.
-    
+    Cheap first stage of the scoring cascade. Returns why the candidate is dropped
+    before the embedding model runs, or None if they go on to semantic scoring.
+
+    `prefilter` is the per-job config from job_service.get_prefilter_config.
+    A parsed experience of 0 means "not found in the resume" and is not filtered on.
+    """
+    if not prefilter or not settings.PREFILTER_ENABLED:
+        return None
+
+    min_exp = prefilter.get("min_experience")
+    max_exp = prefilter.get("max_experience")
+    tolerance = prefilter.get("experience_tolerance") or 0
+    if experience_years:
+        if min_exp is not None and experience_years + tolerance < min_exp:
+            return f"experience {experience_years}y below required {min_exp}y"
+        if max_exp is not None and experience_years - tolerance > max_exp:
+            return f"experience {experience_years}y above range max {max_exp}y"
+
+    min_keyword = prefilter.get("min_keyword_score")
+    # strictly below: the default 0.0 never drops anyone (skills may only appear in key_skills)
+    if high_priority_keywords and min_keyword is not None and keyword_score < min_keyword:
+        return f"keyword score {keyword_score} below threshold {min_keyword}"
+    return None
+
+
+def score_resume(resume_pdf_path, jd_text, high_priority_keywords, normal_keywords,
+                 experience_years=None, prefilter=None, comments=None, resume_text=None, weights=None,
+                 resume_vector=None):
+    """
+    Scores a resume against a job description without touching the database,
+    so callers can run it before opening their write transaction.
+
     Parameters:
-    - resume_pdf_path: Path to the resume PDF.
+    - resume_pdf_path: Path to the resume PDF (also hashed for the score cache).
     - jd_text: Job description text.
     - high_priority_keywords: Set of high-priority keywords (e.g., technical skills).
     - normal_keywords: Set of normal keywords (e.g., soft skills).
-    - job_id: ID of the job.
-    - applicant_id: ID of the applicant.
-    - source: Source where the application came from (e.g., LinkedIn).
-    - application_status: Current status of the application (e.g., applied, shortlisted).
-    - assigned_hr: HR manager assigned to the application.
-    - assigned_manager: Hiring manager assigned to the application.
-    - comments: Any additional comments.
-    - db: Database session dependency from FastAPI (injects the session).
-    
+    - experience_years: Parsed candidate experience, used by the prefilter stage.
+    - prefilter: Per-job prefilter thresholds; candidates that fail them skip the
+      embedding model and get a keyword-only score and the reason in `comments`.
+    - comments: Application comments to carry through (prefilter reason is prepended).
+    - resume_text: Already-extracted resume text, to avoid parsing the PDF twice (or a
+      zero-argument callable producing it, only called when the text is needed).
+    - weights: Per-job blend from job_service.get_scoring_weights (settings defaults if None).
+      The keyword components are returned too, so the blend can be re-applied later in SQL.
+    - resume_vector: The resume's stored vector of the current embedding_version(); the
+      model then only embeds the JD (memoised per process), not the resume.
+
     Returns:
-    - A dictionary with the evaluation results.
+    - A dictionary with the component scores, overall score and final comments.
+      `resume_embedding` holds the resume vector when the model ran (None on a cache
+      hit or a prefilter drop); callers store it and pop it before returning JSON.
     """
-    
-    # Helper function to extract text from the PDF
-    def extract_text_from_pdf(file_path):
-        reader = PdfReader(file_path)
-        return "".join(page.extract_text() or "" for page in reader.pages)
-
-    # Helper function to preprocess text (lowercase, remove special characters, and stopwords)
-    def preprocess_text(text):
-        text = text.lower()
-        text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
-        tokens = text.split()
-        tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 1]
-        return " ".join(tokens)
-
-    # Helper function to compute semantic similarity between the resume and job description
-    def compute_overall_similarity(resume_text, jd_text):
-        embeddings = MODEL.encode([resume_text, jd_text], convert_to_tensor=True)
-        similarity = util.cos_sim(embeddings[0], embeddings[1])
-        return round(float(similarity[0]), 4)
-
-    # Helper function to compute weighted keyword match score
-    def compute_weighted_keyword_score(resume_text, jd_text, high_priority_keywords, normal_keywords):
-        resume_tokens = set(resume_text.split())
-        jd_tokens = set(jd_text.split())
-
-        high_score = sum(1 for word in resume_tokens if word in jd_tokens and word in high_priority_keywords)
-        normal_score = sum(1 for word in resume_tokens if word in jd_tokens and word in normal_keywords)
-
-        high_weight = high_score / len(high_priority_keywords) if high_priority_keywords else 0
-        normal_weight = normal_score / len(normal_keywords) if normal_keywords else 0
-
-        combined_score = 0.7 * high_weight + 0.3 * normal_weight
-        return round(combined_score, 4)
-
-    # Extract resume text and preprocess both resume and JD text
-    resume_raw = extract_text_from_pdf(resume_pdf_path)
-    resume_clean = preprocess_text(resume_raw)
+
+    # Preprocess the JD and keywords (cheap) so the score cache can be consulted first
     jd_clean = preprocess_text(jd_text)
+    high_priority_keywords = normalize_keywords(high_priority_keywords)
+    normal_keywords = normalize_keywords(normal_keywords)
+
+    cache_key = (
+        score_cache.file_sha256(resume_pdf_path),
+        score_cache.text_hash(jd_clean),
+        score_cache.skills_hash(high_priority_keywords, normal_keywords),
+        scorer_version(),
+    )
+    cached = score_cache.get_cached_scores(*cache_key)
+
+    def clean_resume():
+        if callable(resume_text):
+            raw = resume_text()
+        else:
+            raw = resume_text if resume_text is not None else extract_text_from_pdf(resume_pdf_path)
+        return preprocess_text(raw)
+
+    # Extract resume text only on a cache miss
+    resume_clean = None
+    resume_embedding = None
+    if cached:
+        high_match, normal_match = cached["high_keyword_match"], cached["normal_keyword_match"]
+        semantic_similarity = cached["jd_matching_score"]
+        logger.info(f"Score cache hit for {resume_pdf_path}")
+    else:
+        resume_clean = clean_resume()
+        high_match, normal_match = compute_keyword_components(
+            resume_clean, jd_clean, high_priority_keywords, normal_keywords
+        )
+        semantic_similarity = None
+    keyword_score = combine_keyword_score(high_match, normal_match, weights)
 
-    # Calculate semantic similarity and weighted keyword match score
-    semantic_similarity = compute_overall_similarity(resume_clean, jd_clean)
-    keyword_score = compute_weighted_keyword_score(resume_clean, jd_clean, high_priority_keywords, normal_keywords)
+    # Stage 1: cheap keyword score + experience range check
+    dropped_reason = prefilter_reason(keyword_score, high_priority_keywords, experience_years, prefilter)
 
-    # Final score combining both semantic similarity and keyword match score
-    resume_overall_score = round((0.6 * semantic_similarity + 0.4 * keyword_score), 4)
+    # Stage 2: semantic similarity, only for survivors
+    if dropped_reason:
+        semantic_similarity = None
+        resume_overall_score = combine_overall_score(None, keyword_score, weights)
+        comments = f"[prefilter] {dropped_reason}" + (f" | {comments}" if comments else "")
+        logger.info(f"Prefilter dropped {resume_pdf_path}: {dropped_reason}")
+    else:
+        if semantic_similarity is None and resume_vector is not None:
+            semantic_similarity = round(float(np.dot(resume_vector, _jd_embedding(jd_clean))), 4)
+        elif semantic_similarity is None:
+            if resume_clean is None:  # cached row came from a prefiltered run
+                resume_clean = clean_resume()
+            resume_embedding, jd_embedding = embed_documents([resume_clean, jd_clean])
+            semantic_similarity = round(float(np.dot(resume_embedding, jd_embedding)), 4)
+        # Final score combining both semantic similarity and keyword match score
+        resume_overall_score = combine_overall_score(semantic_similarity, keyword_score, weights)
+
+    if not cached or (cached["jd_matching_score"] is None and semantic_similarity is not None):
+        score_cache.put_cached_scores(*cache_key, high_match, normal_match, semantic_similarity)
 
     # Log the results
     logger.info(f"Semantic Similarity: {semantic_similarity}")
     logger.info(f"Keyword Match Score: {keyword_score}")
     logger.info(f"Overall Resume Score: {resume_overall_score}")
 
+    return {
+        "semantic_similarity": semantic_similarity,
+        "keyword_match_score": keyword_score,
+        "high_keyword_match": high_match,
+        "normal_keyword_match": normal_match,
+        "resume_overall_score": resume_overall_score,
+        "prefilter_reason": dropped_reason,
+        "comments": comments,
+        "resume_excerpt": (resume_clean or "")[:300],
+        "jd_excerpt": jd_clean[:300],
+        "resume_embedding": resume_embedding,
+    }
+
+
+def evaluate_resume_match(resume_pdf_path, jd_text, high_priority_keywords, normal_keywords, 
+                          job_id, applicant_id, source, application_status, assigned_hr=None, 
+                          assigned_manager=None, comments=None, db: Session = Depends(get_db),
+                          experience_years=None, prefilter=None, weights=None):
+    """
+    Scores a resume (see score_resume) and inserts the application row with the
+    results. Ingestion paths call score_resume directly and write the applicant
+    and application in one short transaction instead.
+
+    Returns:
+    - A dictionary with the evaluation results.
+    """
+    result = score_resume(resume_pdf_path, jd_text, high_priority_keywords, normal_keywords,
+                          experience_years=experience_years, prefilter=prefilter, comments=comments,
+                          weights=weights)
+    result.pop("resume_embedding", None)
+
     # Insert results into the database using text() for parameterized SQL query
     try:
         sql_query = text("""
             INSERT INTO applications 
             (job_id, applicant_id, applied_date, source, skills_matching_score, jd_matching_score, 
-            resume_overall_score, application_status, assigned_hr, assigned_manager, comments, updated_at)
+            resume_overall_score, high_keyword_match, normal_keyword_match,
+            application_status, assigned_hr, assigned_manager, comments, updated_at)
             VALUES
             (:job_id, :applicant_id, :applied_date, :source, :skills_matching_score, :jd_matching_score, 
-            :resume_overall_score, :application_status, :assigned_hr, :assigned_manager, :comments, :updated_at)
+            :resume_overall_score, :high_keyword_match, :normal_keyword_match,
+            :application_status, :assigned_hr, :assigned_manager, :comments, :updated_at)
         """)
 
         db.execute(sql_query, {
@@ -112,16 +351,19 @@ def evaluate_resume_match(resume_pdf_path, jd_text, high_priority_keywords, norm
             "applicant_id": applicant_id,
             "applied_date": datetime.utcnow(),  # Current date for applied date
             "source": source,
-            "skills_matching_score": keyword_score,
-            "jd_matching_score": semantic_similarity,
-            "resume_overall_score": resume_overall_score,
+            "skills_matching_score": result["keyword_match_score"],
+            "jd_matching_score": result["semantic_similarity"],
+            "resume_overall_score": result["resume_overall_score"],
+            "high_keyword_match": result["high_keyword_match"],
+            "normal_keyword_match": result["normal_keyword_match"],
             "application_status": application_status,
             "assigned_hr": assigned_hr,
             "assigned_manager": assigned_manager,
-            "comments": comments,
+            "comments": result["comments"],
             "updated_at": datetime.utcnow()  # Current date for updated_at
         })
-        
+        funnel_service.bump(db, job_id, application_status, source, assigned_hr)
+
         db.commit()  # Commit the transaction
         logger.info("Application successfully inserted into the database.")
 
@@ -131,15 +373,4 @@ def evaluate_resume_match(resume_pdf_path, jd_text, high_priority_keywords, norm
         raise HTTPException(status_code=500, detail=f"Database insertion failed: {str(e)}")
 
     # Return the results
-    return {
-        "semantic_similarity": semantic_similarity,
-        "keyword_match_score": keyword_score,
-        "resume_overall_score": resume_overall_score,
-        "resume_excerpt": resume_clean[:300],
-        "jd_excerpt": jd_clean[:300]
-    }
-
-
-
-
-
+    return result
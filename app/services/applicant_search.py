@@ -0,0 +1,179 @@
+# app/services/applicant_search.py
+"""
+Structured applicant search (skills, location, education, experience range).
+
+`applicants.skills` is free TEXT, so the database cannot answer "python AND aws
+in Pune with 3-6 years". Each worker keeps an in-process inverted index instead:
+
+  skill term     -> set of applicant_ids (canonical names, see skill_vocabulary)
+  location token -> set of applicant_ids
+  education token-> set of applicant_ids
+  experience     -> sorted (years, applicant_id) list, for range scans
+
+built from `applicants` at startup and synced incrementally by updated_at (new
+and changed rows from any worker, see sync_window), plus an immediate add() on
+local inserts.
+Conjunctive queries intersect the postings smallest-first; only the requested
+page is then read from the database, by primary key.
+"""
+import re
+import bisect
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from app.services.skill_vocabulary import canonical_skill, canonical_skills
+from app.services.sync_window import SyncWindow, newest
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9+#]+")
+
+
+def skill_terms(skills: Optional[str]) -> Set[str]:
+    return set(canonical_skills(skills))
+
+
+def tokens(value: Optional[str]) -> Set[str]:
+    # "B.Tech" -> "btech" so dotted degrees match however they are typed
+    return set(_TOKEN.findall((value or "").lower().replace(".", "")))
+
+
+class ApplicantSearchIndex:
+    FIELDS = ("skills", "location", "education")
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, Set[int]]] = {f: {} for f in self.FIELDS}
+        self._terms: Dict[int, Dict[str, Set[str]]] = {}
+        self._experience: List[Tuple[float, int]] = []
+        self._experience_of: Dict[int, float] = {}
+        self._window = SyncWindow()
+        self._lock = threading.RLock()
+
+    def _terms_for(self, row: Dict[str, Any]) -> Dict[str, Set[str]]:
+        return {
+            "skills": skill_terms(row.get("skills")),
+            "location": tokens(row.get("location")),
+            "education": tokens(row.get("education")),
+        }
+
+    def add(self, applicant_id: int, row: Dict[str, Any]) -> None:
+        with self._lock:
+            if applicant_id in self._terms:
+                self.remove(applicant_id)
+            terms = self._terms_for(row)
+            self._terms[applicant_id] = terms
+            for field, values in terms.items():
+                postings = self._postings[field]
+                for term in values:
+                    postings.setdefault(term, set()).add(applicant_id)
+            years = float(row.get("experience_years") or 0)
+            self._experience_of[applicant_id] = years
+            bisect.insort(self._experience, (years, applicant_id))
+
+    def remove(self, applicant_id: int) -> None:
+        with self._lock:
+            terms = self._terms.pop(applicant_id, None)
+            if terms is None:
+                return
+            for field, values in terms.items():
+                postings = self._postings[field]
+                for term in values:
+                    ids = postings.get(term)
+                    if ids:
+                        ids.discard(applicant_id)
+                        if not ids:
+                            del postings[term]
+            years = self._experience_of.pop(applicant_id)
+            i = bisect.bisect_left(self._experience, (years, applicant_id))
+            if i < len(self._experience) and self._experience[i] == (years, applicant_id):
+                del self._experience[i]
+
+    def _experience_range(self, min_years: Optional[float], max_years: Optional[float]) -> Set[int]:
+        lo = bisect.bisect_left(self._experience, (min_years, -1)) if min_years is not None else 0
+        hi = bisect.bisect_right(self._experience, (max_years, float("inf"))) if max_years is not None \
+            else len(self._experience)
+        return {applicant_id for _, applicant_id in self._experience[lo:hi]}
+
+    def search(self, skills: Iterable[str] = (), location: Optional[str] = None, education: Optional[str] = None,
+               min_experience: Optional[float] = None, max_experience: Optional[float] = None,
+               offset: int = 0, limit: int = 20) -> Tuple[int, List[int]]:
+        """
+        All filters are ANDed; multi-word location/education must match every token.
+        Returns (total matches, applicant_ids of the page, newest first).
+        """
+        wanted = [("skills", s) for s in {canonical_skill(s) for s in skills} if s]
+        wanted += [("location", t) for t in tokens(location)]
+        wanted += [("education", t) for t in tokens(education)]
+
+        with self._lock:
+            postings = [self._postings[field].get(term, set()) for field, term in wanted]
+            postings.sort(key=len)
+            if postings and not postings[0]:
+                return 0, []
+            if min_experience is not None or max_experience is not None:
+                postings.insert(0, self._experience_range(min_experience, max_experience))
+
+            if postings:
+                matches = set(postings[0])
+                for ids in postings[1:]:
+                    matches &= ids
+                    if not matches:
+                        break
+            else:
+                matches = set(self._terms)
+
+        ordered = sorted(matches, reverse=True)
+        return len(ordered), ordered[offset:offset + limit]
+
+    def sync(self, db: Session) -> int:
+        """
+        Index applicants inserted or changed since the last sync (by any worker);
+        add() replaces existing entries. The whole table at startup.
+        """
+        since = self._window.since()
+        if since is None:
+            self._window.start(db, "applicants")
+        rows = db.execute(text(f"""
+            SELECT applicant_id, skills, location, education, experience_years, updated_at
+            FROM applicants
+            {"WHERE updated_at >= :since" if since else ""}
+        """), {"since": since}).mappings().fetchall()
+        for row in rows:
+            self.add(int(row["applicant_id"]), row)
+        self._window.advance(newest(r["updated_at"] for r in rows))
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+index = ApplicantSearchIndex()
+
+
+def search_applicants(db: Session, skills: List[str], location: Optional[str], education: Optional[str],
+                      min_experience: Optional[float], max_experience: Optional[float],
+                      page: int, page_size: int) -> Dict[str, Any]:
+    index.sync(db)
+    total, page_ids = index.search(
+        skills=skills, location=location, education=education,
+        min_experience=min_experience, max_experience=max_experience,
+        offset=(page - 1) * page_size, limit=page_size,
+    )
+
+    results = []
+    if page_ids:
+        rows = db.execute(text("""
+            SELECT applicant_id, first_name, last_name, email, phone, linkedin_url, resume_url,
+                   experience_years, education, current_company, current_role,
+                   expected_ctc, notice_period_days, skills, location, created_at
+            FROM applicants
+            WHERE applicant_id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": page_ids}).mappings().fetchall()
+        by_id = {row["applicant_id"]: dict(row) for row in rows}
+        results = [by_id[i] for i in page_ids if i in by_id]
+
+    return {"total": total, "page": page, "page_size": page_size, "results": results}
@@ -1,13 +1,18 @@
 import shutil
 import os
+import tempfile
 import logging
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
-from .aishortlist import evaluate_resume_match  # Ensure this import is correct
+from .aishortlist import evaluate_resume_match, score_resume, extract_text_from_pdf, embed_text, embedding_version  # Ensure this import is correct
 from typing import List
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, UploadFile
 from app.db.connection import get_db
+from app.services.job_service import get_prefilter_config, get_scoring_weights
+from app.services.score_cache import file_sha256
+from app.services import near_duplicates, applicant_search, resume_fulltext, semantic_search, score_stats
+from app.services import funnel_service, interview_feedback_service, skill_service
 
 # Setup logging configuration
 logging.basicConfig(
@@ -15,6 +20,7 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[logging.StreamHandler()]  # Logs will be printed to console
 )
+logger = logging.getLogger(__name__)
 
 
 UPLOAD_DIR = "uploads/resumes"
@@ -44,34 +50,84 @@ def save_resume(upload_file: UploadFile, applicant_id: int) -> str:
 
 
 def create_applicant(db: Session, applicant_data: dict, resume_file, job_id: int, source: str, application_status: str, assigned_hr: str = None, assigned_manager: str = None, comments: str = None):
-    """Function to create an applicant, save their resume, and create an application entry in the applications table."""
+    """
+    Function to create an applicant, save their resume, and create an application entry in the applications table.
+    The resume is scored first; the applicant and application rows (with scores) are then
+    written in one short transaction so no locks are held during PDF parsing / inference.
+    """
+    tmp_path = None
+    file_path = None
     try:
+        evaluation_result = {}
+        resume_text = None
+        resume_vector = None
+        signature = None
+        if resume_file:
+            # Score from a temp copy before any row is written
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                shutil.copyfileobj(resume_file.file, tmp)
+                tmp_path = tmp.name
+            resume_file.file.seek(0)
+            resume_text = extract_text_from_pdf(tmp_path)
+            signature = near_duplicates.compute_signature(resume_text)
+
+            with db.begin():
+                jd_text = get_jd(job_id, db)
+                high_priority_keywords = get_high_priority_keywords(job_id, db)
+                normal_keywords = get_normal_keywords(job_id, db)
+                prefilter = get_prefilter_config(db, job_id)
+                weights = get_scoring_weights(db, job_id)
+
+            evaluation_result = trigger_score_resume(
+                resume_pdf_path=tmp_path,
+                jd_text=jd_text,
+                high_priority_keywords=high_priority_keywords,
+                normal_keywords=normal_keywords,
+                experience_years=applicant_data.get("experience_years"),
+                prefilter=prefilter,
+                weights=weights,
+                comments=comments,
+                resume_text=resume_text,
+            )
+            # None on a prefilter drop / score-cache hit: every stored resume still gets its vector
+            resume_vector = evaluation_result.pop("resume_embedding", None)
+            if resume_vector is None:
+                resume_vector = embed_text(resume_text)
+
         # Start a transaction
         with db.begin():  # This ensures automatic commit or rollback
             # Generate current timestamp for created_at and updated_at
             now = datetime.now()
-            params = {**applicant_data, "resume_url": None, "created_at": now, "updated_at": now}
+            params = {
+                **applicant_data,
+                "email_normalized": (applicant_data.get("email") or "").strip().lower(),
+                "resume_url": None,
+                "resume_sha256": file_sha256(tmp_path) if tmp_path else None,
+                "minhash_signature": near_duplicates.signature_to_bytes(signature),
+                "created_at": now,
+                "updated_at": now,
+            }
             
             # Log applicant data being inserted
             logging.info(f"Inserting applicant data: {applicant_data}")
 
             # Insert applicant data into the applicants table
-            db.execute(text(""" 
+            result = db.execute(text(""" 
                 INSERT INTO applicants (
-                    first_name, last_name, email, phone, linkedin_url,
+                    first_name, last_name, email, email_normalized, phone, linkedin_url,
                     experience_years, education, current_company, current_role,
-                    expected_ctc, notice_period_days, skills, location, resume_url, created_at, updated_at
-                ) VALUES (
-                    :first_name, :last_name, :email, :phone, :linkedin_url,
+                    expected_ctc, notice_period_days, skills, location, resume_url, resume_sha256,
+                    minhash_signature, created_at, updated_at
+                )
+                OUTPUT INSERTED.applicant_id
+                VALUES (
+                    :first_name, :last_name, :email, :email_normalized, :phone, :linkedin_url,
                     :experience_years, :education, :current_company, :current_role,
-                    :expected_ctc, :notice_period_days, :skills, :location, :resume_url, :created_at, :updated_at
+                    :expected_ctc, :notice_period_days, :skills, :location, :resume_url, :resume_sha256,
+                    :minhash_signature, :created_at, :updated_at
                 );
             """), params)
-
-            # Fetch the last inserted applicant_id using SCOPE_IDENTITY()
-            logging.info("Fetching applicant_id of the newly inserted applicant.")
-            result = db.execute(text("SELECT SCOPE_IDENTITY() AS applicant_id;"))
-            applicant_id = result.fetchone()[0]
+            applicant_id = result.scalar()
             logging.info(f"Applicant ID: {applicant_id} retrieved successfully.")
 
             # Handle resume file if provided
@@ -85,69 +141,97 @@ def create_applicant(db: Session, applicant_data: dict, resume_file, job_id: int
                 db.execute(text("UPDATE applicants SET resume_url = :resume_url WHERE applicant_id = :applicant_id"),
                            {"resume_url": file_path, "applicant_id": applicant_id})
 
-            # Insert into applications table with created_at and updated_at
+            skill_ids = skill_service.store_applicant_skills(db, applicant_id, applicant_data.get("skills"))
+
+            # Insert into applications table together with the scores
             application_params = {
                 "applicant_id": applicant_id,
                 "job_id": job_id,
+                "applied_date": now,
                 "application_status": application_status,
                 "source": source,
+                "skills_matching_score": evaluation_result.get("keyword_match_score"),
+                "jd_matching_score": evaluation_result.get("semantic_similarity"),
+                "resume_overall_score": evaluation_result.get("resume_overall_score"),
+                "high_keyword_match": evaluation_result.get("high_keyword_match"),
+                "normal_keyword_match": evaluation_result.get("normal_keyword_match"),
                 "assigned_hr": assigned_hr,
                 "assigned_manager": assigned_manager,
-                "comments": comments,
-                "created_at": now,  # Set created_at to current timestamp
+                "comments": evaluation_result.get("comments", comments),
                 "updated_at": now   # Set updated_at to current timestamp
             }
             
             logging.info(f"Inserting application for applicant {applicant_id} and job {job_id}.")
-            db.execute(text(""" 
+            application_id = db.execute(text(""" 
                 INSERT INTO applications (
-                    applicant_id, job_id, application_status, source, assigned_hr,
-                    assigned_manager, comments, updated_at
-                ) VALUES (
-                    :applicant_id, :job_id, :application_status, :source, :assigned_hr,
-                    :assigned_manager, :comments,:updated_at
+                    applicant_id, job_id, applied_date, application_status, source,
+                    skills_matching_score, jd_matching_score, resume_overall_score,
+                    high_keyword_match, normal_keyword_match,
+                    assigned_hr, assigned_manager, comments, updated_at
+                )
+                OUTPUT INSERTED.application_id
+                VALUES (
+                    :applicant_id, :job_id, :applied_date, :application_status, :source,
+                    :skills_matching_score, :jd_matching_score, :resume_overall_score,
+                    :high_keyword_match, :normal_keyword_match,
+                    :assigned_hr, :assigned_manager, :comments, :updated_at
                 );
-            """), application_params)
+            """), application_params).scalar()
+            funnel_service.bump(db, job_id, application_status, source, assigned_hr)
 
             logging.info(f"Application created for applicant {applicant_id} and job {job_id}.")
 
-            # Trigger resume evaluation (passing relevant params)
-            evaluation_result = trigger_evaluate_resume_match(
-                resume_pdf_path=file_path,
-                jd_text=get_jd(job_id, db),
-                high_priority_keywords=get_high_priority_keywords(job_id, db),
-                normal_keywords=get_normal_keywords(job_id, db),
-                job_id=job_id,
-                applicant_id=applicant_id,
-                source=source,
-                application_status=application_status,
-                assigned_hr=assigned_hr,
-                assigned_manager=assigned_manager,
-                comments=comments,
-                db=db
-            )
-
-            logging.info(f"Evaluation result: {evaluation_result}")
-            return {
-                "applicant_id": applicant_id,
-                "resume_url": file_path,
-                "evaluation_result": evaluation_result,
-                **{k: v for k, v in applicant_data.items() if k != 'resume_url'}
-            }
+            if resume_vector is not None:
+                semantic_search.store_embedding(db, applicant_id, resume_vector, embedding_version())
+
+        applicant_search.index.add(applicant_id, applicant_data)
+        skill_service.skill_ids.remember(skill_ids)
+        score_stats.stats.record(job_id, application_id, application_params)
+        if resume_text:
+            resume_fulltext.index.add(applicant_id, resume_text)
+        if signature is not None:
+            near_duplicates.index.add(applicant_id, signature)
+        if resume_vector is not None:
+            semantic_search.index.offer(applicant_id, resume_vector, embedding_version())
+
+        logging.info(f"Evaluation result: {evaluation_result}")
+        return {
+            "applicant_id": applicant_id,
+            "resume_url": file_path,
+            "evaluation_result": evaluation_result,
+            **{k: v for k, v in applicant_data.items() if k != 'resume_url'}
+        }
 
     except Exception as e:
         # Rollback in case of any error
         logging.error(f"Error while creating applicant and application: {e}")
         db.rollback()
         logging.debug("Transaction rolled back.")
+        if file_path and os.path.exists(file_path):
+            try: os.unlink(file_path)
+            except OSError: pass
         raise HTTPException(status_code=500, detail=f"Failed to create applicant and application: {str(e)}")
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            try: os.unlink(tmp_path)
+            except OSError: pass
+
+
+def trigger_score_resume(**kwargs):
+    """Scores a resume (no DB writes) so the caller can persist the results in its own short transaction."""
+    try:
+        return score_resume(**kwargs)
+    except Exception as e:
+        logging.error(f"Failed to score resume: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error during resume evaluation: {str(e)}")
 
 
 # Function to evaluate resume match (triggered after creating applicant)
 def trigger_evaluate_resume_match(
     resume_pdf_path, jd_text, high_priority_keywords, normal_keywords, 
     job_id, applicant_id, source, application_status, 
-    assigned_hr=None, assigned_manager=None, comments=None, db: Session = Depends(get_db)
+    assigned_hr=None, assigned_manager=None, comments=None, db: Session = Depends(get_db),
+    experience_years=None, prefilter=None
 ):
     """Evaluates a resume match against a job description and stores the results in the database."""
     try:
@@ -164,7 +248,9 @@ def trigger_evaluate_resume_match(
             assigned_hr=assigned_hr,
             assigned_manager=assigned_manager,
             comments=comments,
-            db=db
+            db=db,
+            experience_years=experience_years,
+            prefilter=prefilter
         )
         return result
     except Exception as e:
@@ -302,10 +388,14 @@ def get_all_applicants(db: Session) -> List[dict]:
 
 
 
-def get_applicants_by_job(db: Session, job_id: int) -> List[dict]:
+def get_applicants_by_job(db: Session, job_id: int, collapse_duplicates: bool = False) -> List[dict]:
     """
     Fetch applications + applicant data for a specific job_id.
-    Returns list (possibly empty).
+    Returns list (possibly empty). Each row carries its percentile rank within the
+    job for the overall, JD and skills scores (score_stats), and its per-round
+    interview aggregates (interview_feedback_service).
+    With collapse_duplicates, near-duplicate resumes (MinHash/LSH) are folded into
+    their best-scored row, listed under `near_duplicate_ids`.
     """
     if job_id is None or job_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid job_id")
@@ -391,9 +481,49 @@ def get_applicants_by_job(db: Session, job_id: int) -> List[dict]:
                 "applicant_updated_at": row.get("a_updated_at"),
             })
 
+        score_stats.stats.ensure_current(db, job_id)
+        score_stats.stats.annotate(job_id, applicants)
+        interview_feedback_service.annotate(applicants, interview_feedback_service.get_job_interview_rounds(db, job_id))
+
+        if collapse_duplicates:
+            near_duplicates.index.sync(db)
+            applicants = near_duplicates.collapse_near_duplicates(applicants)
+
         return applicants
 
     except Exception as e:
         logger.exception(f"Database error in get_applicants_by_job (job_id={job_id}): {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch applicants for job.")
-    
\ No newline at end of file
+    
+
+
+def update_application_status(db: Session, application_id: int, application_status: str) -> dict:
+    """
+    Move an application to a new pipeline status. The funnel counters are adjusted
+    in the same transaction, so they never drift from the applications table.
+    """
+    try:
+        with db.begin():
+            row = db.execute(text("""
+                UPDATE applications SET application_status = :status, updated_at = :now
+                OUTPUT DELETED.application_status AS old_status, INSERTED.job_id,
+                       INSERTED.source, INSERTED.assigned_hr
+                WHERE application_id = :application_id
+            """), {"status": application_status, "now": datetime.now(),
+                   "application_id": application_id}).mappings().fetchone()
+            if not row:
+                raise HTTPException(status_code=404, detail="Application not found")
+            funnel_service.move(db, row["job_id"], row["old_status"], application_status,
+                                row["source"], row["assigned_hr"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Failed to update status of application {application_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update application status.")
+
+    return {
+        "application_id": application_id,
+        "job_id": row["job_id"],
+        "previous_status": row["old_status"],
+        "application_status": application_status,
+    }
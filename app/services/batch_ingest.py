@@ -0,0 +1,229 @@
+# app/services/batch_ingest.py
+"""
+Offline ingestion of a directory of resumes (`python -m app.cli ingest`).
+
+Runs the same phases as create_applicant_from_path without the API:
+- a process pool runs prepare_resume + score_prepared (PDF text, parsing,
+  MinHash, the model) with the job's scoring inputs loaded once per process;
+- the parent writes finished resumes in batches: one transaction per batch, a
+  savepoint per resume so one bad row doesn't sink its neighbours;
+- every settled file is appended to a checkpoint after its batch commits, so an
+  interrupted run picks up where it stopped. Re-processing a file whose commit
+  was not checkpointed is harmless: it is recognised as already applied.
+
+API workers pick the new rows up through their incremental index syncs; the
+full-text segments are written to the shared index directory.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.connection import SessionLocal
+from app.services import near_duplicates, resume_fulltext
+from app.services.bulk_applicant_service import (
+    prepare_resume, load_job_inputs, find_existing, score_prepared, write_application, publish_application
+)
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ("successful", "linked", "already_applied", "failed")
+
+_worker_job_inputs: Optional[Dict[str, Any]] = None
+_worker_comments: Optional[str] = None
+
+
+def _init_worker(job_inputs: Dict[str, Any], comments: Optional[str], threads: int) -> None:
+    global _worker_job_inputs, _worker_comments
+    from app.services.embedders import limit_threads
+    limit_threads(threads)
+    _worker_job_inputs, _worker_comments = job_inputs, comments
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _process_file(path: str) -> Dict[str, Any]:
+    """Worker side: everything that needs no database writes."""
+    started = time.perf_counter()
+    item = {"path": path, "error": None, "status_code": None}
+    try:
+        prepared = prepare_resume(path)
+        eval_result, vector, version = score_prepared(path, prepared, _worker_job_inputs, _worker_comments)
+        item.update(prepared=prepared, eval_result=eval_result, vector=vector, vector_version=version)
+    except HTTPException as e:
+        item.update(error=str(e.detail), status_code=e.status_code)
+    except Exception as e:
+        item.update(error=str(e), status_code=500)
+    item["seconds"] = time.perf_counter() - started
+    return item
+
+
+def _list_pdfs(directory: str, recursive: bool) -> List[str]:
+    if not recursive:
+        names = [n for n in os.listdir(directory) if n.lower().endswith(".pdf")]
+        return sorted(os.path.join(directory, n) for n in names)
+    found = []
+    for root, _, files in os.walk(directory):
+        found.extend(os.path.join(root, n) for n in files if n.lower().endswith(".pdf"))
+    return sorted(found)
+
+
+def default_checkpoint_path(directory: str, job_id: int) -> str:
+    key = hashlib.sha1(os.path.abspath(directory).encode()).hexdigest()[:12]
+    return os.path.join(settings.INGEST_CHECKPOINT_DIR, f"job{job_id}_{key}.log")
+
+
+def _load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.split("\t", 1)[0] for line in f if line.strip()}
+
+
+def _write_batch(db, batch: List[Dict[str, Any]], job_id: int, options: Dict[str, Any]) -> List[str]:
+    """Write one batch in one transaction; returns an outcome per item (same order)."""
+    outcomes: List[str] = []
+    written = []
+    try:
+        with db.begin():
+            for item in batch:
+                if item["error"]:
+                    outcomes.append("failed")
+                    continue
+                try:
+                    with db.begin_nested():
+                        existing, existing_application_id = find_existing(db, item["prepared"], job_id)
+                        if existing_application_id is not None:
+                            outcomes.append("already_applied")
+                            continue
+                        result = write_application(
+                            db, item["prepared"], existing, item["eval_result"], item["vector"],
+                            item["vector_version"], resume_path=item["path"],
+                            filename=os.path.basename(item["path"]), job_id=job_id, keep_source=True, **options
+                        )
+                    written.append((item, result))
+                    outcomes.append("linked" if existing else "successful")
+                except Exception as e:
+                    logger.warning(f"{item['path']}: write failed: {e}")
+                    item.update(error=str(e), status_code=500)
+                    outcomes.append("failed")
+    except Exception:
+        for _, result in written:  # rolled back: drop the copies made for this batch
+            if result["final_path"] and os.path.exists(result["final_path"]):
+                os.unlink(result["final_path"])
+        raise
+
+    for item, result in written:
+        publish_application(job_id, item["prepared"], result, item["vector"], item["vector_version"])
+    return outcomes
+
+
+def ingest_directory(
+    directory: str,
+    job_id: int,
+    source: str,
+    application_status: str = "pending",
+    assigned_hr: Optional[int] = None,
+    assigned_manager: Optional[int] = None,
+    comments: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    recursive: bool = False,
+) -> Dict[str, Any]:
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count() or 1
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    checkpoint_path = checkpoint_path or default_checkpoint_path(directory, job_id)
+    options = {
+        "source": source,
+        "application_status": application_status,
+        "assigned_hr": assigned_hr,
+        "assigned_manager": assigned_manager,
+    }
+
+    files = _list_pdfs(directory, recursive)
+    done = _load_checkpoint(checkpoint_path)
+    todo = [p for p in files if os.path.relpath(p, directory) not in done]
+    print(f"{len(files)} PDFs in {directory}: {len(files) - len(todo)} already done, {len(todo)} to ingest "
+          f"with {workers} processes (checkpoint {checkpoint_path})")
+
+    counts = {o: 0 for o in OUTCOMES}
+    if not todo:
+        return {"total": 0, **counts}
+
+    db = SessionLocal()
+    try:
+        with db.begin():
+            if db.execute(text("SELECT 1 FROM jobs WHERE job_id = :job_id"), {"job_id": job_id}).scalar() is None:
+                raise SystemExit(f"Job {job_id} not found")
+            job_inputs = load_job_inputs(db, job_id)
+            near_duplicates.index.sync(db)
+        resume_fulltext.index.refresh()
+
+        os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+        started = time.perf_counter()
+        score_seconds = write_seconds = 0.0
+        processed = 0
+        pending: List[Dict[str, Any]] = []
+
+        def flush_batch(checkpoint) -> None:
+            nonlocal write_seconds, processed
+            t = time.perf_counter()
+            outcomes = _write_batch(db, pending, job_id, options)
+            write_seconds += time.perf_counter() - t
+            for item, outcome in zip(pending, outcomes):
+                counts[outcome] += 1
+                # retryable failures (5xx) stay out of the checkpoint so the next run tries them again
+                if outcome != "failed" or (item["status_code"] or 500) < 500:
+                    checkpoint.write(f"{os.path.relpath(item['path'], directory)}\t{outcome}\n")
+                if item["error"]:
+                    print(f"  failed: {os.path.basename(item['path'])}: {item['error']}")
+            checkpoint.flush()
+            processed += len(pending)
+            pending.clear()
+            elapsed = time.perf_counter() - started
+            rate = processed / elapsed if elapsed else 0.0
+            eta = (len(todo) - processed) / rate if rate else 0.0
+            print(f"[{processed}/{len(todo)}] {rate:.2f} files/s, ETA {eta:.0f}s "
+                  f"({counts['successful']} new, {counts['linked']} linked, "
+                  f"{counts['already_applied']} already applied, {counts['failed']} failed)")
+
+        context = multiprocessing.get_context("spawn")  # no inherited DB connections or model threads
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                    initializer=_init_worker,
+                                    initargs=(job_inputs, comments, settings.INGEST_THREADS_PER_WORKER)) as pool:
+            queue = iter(todo)
+            in_flight = set()
+            while True:
+                # keep a bounded number of files in flight so results don't pile up in memory
+                for path in queue:
+                    in_flight.add(pool.submit(_process_file, path))
+                    if len(in_flight) >= workers * 2:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    item = future.result()
+                    score_seconds += item["seconds"]
+                    pending.append(item)
+                if len(pending) >= batch_size:
+                    flush_batch(checkpoint)
+            if pending:
+                flush_batch(checkpoint)
+
+        resume_fulltext.index.flush()
+        elapsed = time.perf_counter() - started
+        print(f"Ingested {processed} files in {elapsed:.1f}s ({processed / elapsed:.2f} files/s); "
+              f"parse+score {score_seconds / processed:.2f}s per file across {workers} processes, "
+              f"DB writes {write_seconds:.1f}s total")
+        return {"total": processed, **counts, "seconds": round(elapsed, 1)}
+    finally:
+        db.close()
@@ -0,0 +1,310 @@
+# app/services/batch_rescore.py
+"""
+Offline re-scoring of stored applications (`python -m app.cli rescore`).
+
+After a scorer or model change the scores already in `applications` no longer
+compare with new ones. This re-runs score_resume for every application, or those
+of one job / applied-date range / status:
+
+- rows are streamed in application_id order from a server-side cursor on a
+  reader session; writes go through a second session;
+- each row carries its applicant's stored vector when it has the current
+  embedding version, so the model only embeds the JD (once per job per process);
+  extracted resume text is kept gzipped under RESUME_TEXT_CACHE_DIR by resume
+  SHA-256, so a PDF is parsed at most once across runs, and a score-cache hit
+  needs neither;
+- the scoring itself is spread over a process pool; results are consumed in
+  order and written back in RESCORE_CHUNK_SIZE executemany chunks, one
+  transaction each, with any newly computed vectors and the jobs'
+  scores_rescored_at (which makes API workers reload their percentile arrays);
+- the checkpoint keeps the last committed application_id together with the
+  filters and scorer version, so an interrupted run continues where it stopped.
+"""
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text, bindparam
+
+from app.config import settings
+from app.db.connection import SessionLocal
+from app.services import semantic_search
+
+logger = logging.getLogger(__name__)
+
+_UPDATE_SCORES = text("""
+    UPDATE applications SET
+        skills_matching_score = :skills_matching_score,
+        jd_matching_score = :jd_matching_score,
+        resume_overall_score = :resume_overall_score,
+        high_keyword_match = :high_keyword_match,
+        normal_keyword_match = :normal_keyword_match,
+        comments = :comments,
+        updated_at = :now
+    WHERE application_id = :application_id
+""")
+
+_job_inputs: Dict[int, Dict[str, Any]] = {}
+
+
+# ==============================
+#        WORKER PROCESSES
+# ==============================
+
+def _init_worker(threads: int) -> None:
+    from app.services.embedders import limit_threads
+    limit_threads(threads)
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def _versions():
+    from app.services.aishortlist import scorer_version, embedding_version
+    return scorer_version(), embedding_version()
+
+
+def _inputs_for(job_id: int) -> Dict[str, Any]:
+    if job_id not in _job_inputs:
+        from app.services.bulk_applicant_service import load_job_inputs
+        db = SessionLocal()
+        try:
+            _job_inputs[job_id] = load_job_inputs(db, job_id)
+        finally:
+            db.close()
+    return _job_inputs[job_id]
+
+
+def _resume_text(resume_sha256: str, path: str) -> str:
+    """Extracted text of a resume, from the text cache or the PDF (then cached)."""
+    from app.services.bulk_applicant_service import _extract_text_from_pdf
+
+    cache_path = os.path.join(settings.RESUME_TEXT_CACHE_DIR, resume_sha256[:2], f"{resume_sha256}.txt.gz")
+    if os.path.exists(cache_path):
+        with gzip.open(cache_path, "rt", encoding="utf-8") as f:
+            return f.read()
+    raw = _extract_text_from_pdf(path)
+    if raw.strip():
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(raw)
+        os.replace(tmp_path, cache_path)
+    return raw
+
+
+def _strip_prefilter(comments: Optional[str]) -> Optional[str]:
+    """Drop the '[prefilter] reason | ' prefix a previous scoring run added."""
+    if not comments or not comments.startswith("[prefilter]"):
+        return comments
+    _, sep, rest = comments.partition(" | ")
+    return rest if sep else None
+
+
+def _rescore(row: Dict[str, Any]) -> Dict[str, Any]:
+    from app.services.aishortlist import score_resume
+    from app.services.score_cache import file_sha256
+
+    started = time.perf_counter()
+    item = {"application_id": row["application_id"], "applicant_id": row["applicant_id"], "job_id": row["job_id"],
+            "old_score": row["resume_overall_score"], "error": None, "vector": None}
+    path = row["resume_url"]
+    if not path or not os.path.exists(path):
+        item["error"] = f"resume file missing: {path}"
+        return item
+    try:
+        resume_sha256 = row["resume_sha256"] or file_sha256(path)
+        stored = semantic_search.vector_from_bytes(row["vector"]) if row["vector"] is not None else None
+        result = score_resume(
+            resume_pdf_path=path,
+            experience_years=float(row["experience_years"] or 0),
+            comments=_strip_prefilter(row["comments"]),
+            resume_text=lambda: _resume_text(resume_sha256, path),
+            resume_vector=stored,
+            **_inputs_for(row["job_id"]),
+        )
+        item.update(
+            vector=result.pop("resume_embedding", None),
+            skills_matching_score=result["keyword_match_score"],
+            jd_matching_score=result["semantic_similarity"],
+            resume_overall_score=result["resume_overall_score"],
+            high_keyword_match=result["high_keyword_match"],
+            normal_keyword_match=result["normal_keyword_match"],
+            comments=result["comments"],
+        )
+    except Exception as e:
+        item["error"] = str(getattr(e, "detail", e))
+    item["seconds"] = time.perf_counter() - started
+    return item
+
+
+# ==============================
+#            PARENT
+# ==============================
+
+def default_checkpoint_path() -> str:
+    return os.path.join(settings.INGEST_CHECKPOINT_DIR, "rescore.json")
+
+
+def _load_checkpoint(path: str, run_key: Dict[str, Any]) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    return int(saved.get("last_application_id", 0)) if saved.get("run") == run_key else 0
+
+
+def _save_checkpoint(path: str, run_key: Dict[str, Any], last_application_id: int) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"run": run_key, "last_application_id": last_application_id,
+                   "saved_at": datetime.now().isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+def _write_chunk(db, chunk: List[Dict[str, Any]], vector_version: str) -> None:
+    rescored = [r for r in chunk if not r["error"]]
+    if not rescored:
+        return
+    now = datetime.now()
+    with db.begin():
+        db.execute(_UPDATE_SCORES, [{
+            "application_id": r["application_id"],
+            "skills_matching_score": r["skills_matching_score"],
+            "jd_matching_score": r["jd_matching_score"],
+            "resume_overall_score": r["resume_overall_score"],
+            "high_keyword_match": r["high_keyword_match"],
+            "normal_keyword_match": r["normal_keyword_match"],
+            "comments": r["comments"],
+            "now": now,
+        } for r in rescored])
+        vectors = {r["applicant_id"]: r["vector"] for r in rescored if r["vector"] is not None}
+        if vectors:
+            semantic_search.store_embeddings(db, list(vectors.items()), vector_version)
+        db.execute(
+            text("UPDATE jobs SET scores_rescored_at = :now WHERE job_id IN :job_ids")
+            .bindparams(bindparam("job_ids", expanding=True)),
+            {"now": now, "job_ids": sorted({r["job_id"] for r in rescored})}
+        )
+
+
+def rescore_applications(
+    job_id: Optional[int] = None,
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    status: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    checkpoint_path = checkpoint_path or default_checkpoint_path()
+
+    context = multiprocessing.get_context("spawn")  # no inherited DB connections or model threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(settings.INGEST_THREADS_PER_WORKER,)) as pool:
+        scorer, vector_version = pool.submit(_versions).result()
+
+        conditions, params = ["app.application_id > :after"], {"version": vector_version}
+        if job_id is not None:
+            conditions.append("app.job_id = :job_id")
+            params["job_id"] = job_id
+        if applied_from is not None:
+            conditions.append("app.applied_date >= :applied_from")
+            params["applied_from"] = applied_from
+        if applied_to is not None:
+            conditions.append("app.applied_date < DATEADD(day, 1, :applied_to)")
+            params["applied_to"] = applied_to
+        if status is not None:
+            conditions.append("app.application_status = :status")
+            params["status"] = status
+        where = " AND ".join(conditions)
+
+        run_key = {"job_id": job_id, "applied_from": str(applied_from) if applied_from else None,
+                   "applied_to": str(applied_to) if applied_to else None, "status": status, "scorer": scorer}
+        params["after"] = 0 if restart else _load_checkpoint(checkpoint_path, run_key)
+
+        reader, writer = SessionLocal(), SessionLocal()
+        try:
+            total = reader.execute(text(f"SELECT COUNT(*) FROM applications app WHERE {where}"), params).scalar()
+            reader.rollback()
+            print(f"{total} applications to re-score with {workers} processes "
+                  f"(after application_id {params['after']}, scorer {scorer})")
+
+            rows = reader.execute(text(f"""
+                SELECT app.application_id, app.applicant_id, app.job_id, app.comments, app.resume_overall_score,
+                       a.resume_url, a.resume_sha256, a.experience_years, e.vector
+                FROM applications app
+                JOIN applicants a ON a.applicant_id = app.applicant_id
+                LEFT JOIN applicant_embeddings e
+                    ON e.applicant_id = app.applicant_id AND e.embedding_version = :version
+                WHERE {where}
+                ORDER BY app.application_id
+            """), params, execution_options={"stream_results": True, "yield_per": chunk_size}).mappings()
+
+            counts = {"rescored": 0, "failed": 0, "changed": 0}
+            total_delta = score_seconds = write_seconds = 0.0
+            processed = 0
+            started = time.perf_counter()
+            window: deque = deque()
+            chunk: List[Dict[str, Any]] = []
+
+            def take_one() -> None:
+                nonlocal total_delta, score_seconds
+                item = window.popleft().result()  # in submission order, so checkpoints stay contiguous
+                chunk.append(item)
+                score_seconds += item.get("seconds", 0.0)
+                if item["error"]:
+                    counts["failed"] += 1
+                    print(f"  application {item['application_id']}: {item['error']}")
+                else:
+                    counts["rescored"] += 1
+                    delta = abs(float(item["resume_overall_score"] or 0) - float(item["old_score"] or 0))
+                    total_delta += delta
+                    counts["changed"] += delta >= 0.0001
+                if len(chunk) >= chunk_size:
+                    flush()
+
+            def flush() -> None:
+                nonlocal write_seconds, processed
+                t = time.perf_counter()
+                if not dry_run:
+                    _write_chunk(writer, chunk, vector_version)
+                    _save_checkpoint(checkpoint_path, run_key, chunk[-1]["application_id"])
+                write_seconds += time.perf_counter() - t
+                processed += len(chunk)
+                chunk.clear()
+                elapsed = time.perf_counter() - started
+                rate = processed / elapsed if elapsed else 0.0
+                eta = (total - processed) / rate if rate else 0.0
+                print(f"[{processed}/{total}] {rate:.2f} rows/s, ETA {eta:.0f}s "
+                      f"({counts['changed']} changed, {counts['failed']} failed)")
+
+            for row in rows:
+                window.append(pool.submit(_rescore, dict(row)))
+                if len(window) >= workers * 4:
+                    take_one()
+            while window:
+                take_one()
+            if chunk:
+                flush()
+        finally:
+            reader.close()
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"Re-scored {counts['rescored']} applications in {elapsed:.1f}s "
+          f"({processed / elapsed if elapsed else 0:.2f} rows/s); {counts['changed']} changed, "
+          f"mean |delta overall| {total_delta / counts['rescored'] if counts['rescored'] else 0:.4f}; "
+          f"scoring {score_seconds / processed if processed else 0:.2f}s per row across {workers} processes, "
+          f"writes {write_seconds:.1f}s total{' (dry run, nothing written)' if dry_run else ''}")
+    return {"total": processed, **counts, "seconds": round(elapsed, 1)}
@@ -9,6 +9,10 @@ import PyPDF2
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from fastapi import UploadFile, HTTPException
+from app.services.job_service import get_prefilter_config, get_scoring_weights
+from app.services.score_cache import file_sha256
+from app.services import near_duplicates, applicant_search, resume_fulltext, semantic_search, score_stats
+from app.services import funnel_service, skill_service
 
 logging.basicConfig(level=logging.INFO)
 
@@ -16,16 +20,20 @@ UPLOAD_DIR = "uploads/resumes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-def _save_resume_from_temp(tmp_file_path: str, applicant_id: int, original_filename: str) -> str:
+def _save_resume_from_temp(tmp_file_path: str, applicant_id: int, original_filename: str, copy: bool = False) -> str:
     """
     Move/rename the temp file into uploads/resumes with a stable name.
     Avoid re-reading UploadFile.file (which may be at EOF).
+    With copy=True the source is left in place (offline ingestion of a directory).
     """
     filename = f"{applicant_id}_{original_filename}"
     dest = os.path.join(UPLOAD_DIR, filename)
-    # Use shutil.move (rename/move)
-    shutil.move(tmp_file_path, dest)
-    logging.info(f"Resume moved to: {dest}")
+    if copy:
+        shutil.copyfile(tmp_file_path, dest)
+    else:
+        # Use shutil.move (rename/move)
+        shutil.move(tmp_file_path, dest)
+    logging.info(f"Resume {'copied' if copy else 'moved'} to: {dest}")
     return dest
 
 
@@ -142,16 +150,25 @@ def _get_normal_keywords(job_id: int, db: Session) -> Set[str]:
     return {r[0] for r in rows if r[0]}
 
 
-def _trigger_evaluate_resume_match(**kwargs):
+def _score_resume(**kwargs):
     # imported lazily, keep original behavior
-    from .aishortlist import evaluate_resume_match
+    from .aishortlist import score_resume
     try:
-        return evaluate_resume_match(**kwargs)
+        return score_resume(**kwargs)
     except Exception as e:
         logging.error(f"AI evaluation failed: {e}")
         # bubble up a HTTPException so callers can produce a failure status code/message
         raise HTTPException(status_code=500, detail=f"AI eval failed: {e}")
 
+def _embed_resume(resume_text: str):
+    """(vector, embedding version) for resumes the scorer did not embed (cache hit / prefiltered)."""
+    from .aishortlist import embed_text, embedding_version
+    try:
+        return embed_text(resume_text), embedding_version()
+    except Exception as e:
+        logging.warning(f"Resume embedding failed, not stored for semantic search: {e}")
+        return None, None
+
 def create_applicant_from_pdf(
     db: Session,
     pdf_file: UploadFile,
@@ -167,109 +184,359 @@ def create_applicant_from_pdf(
     if not pdf_file.filename or not pdf_file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
-    tmp_path = None
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        shutil.copyfileobj(pdf_file.file, tmp)
+        tmp_path = tmp.name
+
+    return create_applicant_from_path(
+        db=db,
+        tmp_path=tmp_path,
+        filename=pdf_file.filename,
+        job_id=job_id,
+        source=source,
+        expected_ctc=expected_ctc,
+        notice_period_days=notice_period_days,
+        application_status=application_status,
+        assigned_hr=assigned_hr,
+        assigned_manager=assigned_manager,
+        comments=comments,
+    )
+
+
+def normalize_email(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+
+def _find_existing_applicant(db: Session, email_normalized: str, resume_sha256: str) -> Optional[Dict[str, Any]]:
+    """Indexed lookup of a known candidate by normalised email or identical resume bytes."""
+    row = db.execute(text("""
+        SELECT TOP 1 applicant_id, resume_url, resume_sha256
+        FROM applicants
+        WHERE email_normalized = :email OR resume_sha256 = :sha
+        ORDER BY CASE WHEN resume_sha256 = :sha THEN 0 ELSE 1 END, applicant_id DESC
+    """), {"email": email_normalized, "sha": resume_sha256}).mappings().fetchone()
+    return dict(row) if row else None
+
+
+def _find_existing_application(db: Session, applicant_id: int, job_id: int) -> Optional[int]:
+    row = db.execute(text("""
+        SELECT TOP 1 application_id FROM applications
+        WHERE applicant_id = :applicant_id AND job_id = :job_id
+    """), {"applicant_id": applicant_id, "job_id": job_id}).fetchone()
+    return row[0] if row else None
+
+
+def prepare_resume(tmp_path: str, resume_sha256: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract, parse and fingerprint one resume. No database access, so it can run
+    in any thread or process. Raises 400 for files the pipeline cannot use.
+    """
+    # <-- renamed local variable to avoid shadowing sqlalchemy.text
+    extracted_text = _extract_text_from_pdf(tmp_path)
+    if not extracted_text.strip():
+        raise HTTPException(status_code=400, detail="Empty PDF or text extraction failed")
+
+    parsed = _parse_resume_pdf(extracted_text)
+    if not parsed["email"]:
+        raise HTTPException(status_code=400, detail="Email not found")
+    if not parsed["first_name"]:
+        raise HTTPException(status_code=400, detail="Name not found")
+
+    return {
+        "text": extracted_text,
+        "parsed": parsed,
+        "resume_sha256": resume_sha256 or file_sha256(tmp_path),
+        "email_normalized": normalize_email(parsed["email"]),
+        "signature": near_duplicates.compute_signature(extracted_text),
+    }
+
+
+def load_job_inputs(db: Session, job_id: int) -> Dict[str, Any]:
+    """Everything score_prepared needs from the job (read once per upload or batch)."""
+    return {
+        "jd_text": _get_jd(job_id, db),
+        "high_priority_keywords": _get_high_priority_keywords(job_id, db),
+        "normal_keywords": _get_normal_keywords(job_id, db),
+        "prefilter": get_prefilter_config(db, job_id),
+        "weights": get_scoring_weights(db, job_id),
+    }
+
+
+def find_existing(db: Session, prepared: Dict[str, Any], job_id: int):
+    """(known applicant row or None, their application_id for this job or None)."""
+    existing = _find_existing_applicant(db, prepared["email_normalized"], prepared["resume_sha256"])
+    existing_application_id = (
+        _find_existing_application(db, existing["applicant_id"], job_id) if existing else None
+    )
+    return existing, existing_application_id
+
+
+def score_prepared(tmp_path: str, prepared: Dict[str, Any], job_inputs: Dict[str, Any],
+                   comments: Optional[str], embed_if_missing: bool = True):
+    """
+    Score a prepared resume with no transaction open.
+    Returns (evaluation result, resume vector or None, embedding version or None).
+    The vector is the pooled one the model computed for JD similarity; resumes it
+    skipped (prefilter drop, score-cache hit) are embedded separately unless
+    `embed_if_missing` is off (the applicant already has this resume's vector).
+    """
+    eval_result = _score_resume(
+        resume_pdf_path=tmp_path,
+        experience_years=prepared["parsed"]["experience_years"],
+        comments=comments,
+        resume_text=prepared["text"],
+        **job_inputs,
+    )
+    resume_vector, vector_version = eval_result.pop("resume_embedding", None), None
+    if resume_vector is not None:
+        from .aishortlist import embedding_version
+        vector_version = embedding_version()
+    elif embed_if_missing:
+        resume_vector, vector_version = _embed_resume(prepared["text"])
+    return eval_result, resume_vector, vector_version
+
+
+def write_application(
+    db: Session,
+    prepared: Dict[str, Any],
+    existing: Optional[Dict[str, Any]],
+    eval_result: Dict[str, Any],
+    resume_vector,
+    vector_version: Optional[str],
+    resume_path: str,
+    filename: str,
+    job_id: int,
+    source: str,
+    expected_ctc: Optional[float] = None,
+    notice_period_days: Optional[int] = None,
+    application_status: str = "pending",
+    assigned_hr: Optional[int] = None,
+    assigned_manager: Optional[int] = None,
+    keep_source: bool = False,
+) -> Dict[str, Any]:
+    """
+    Insert the applicant (unless known) and the scored application inside the
+    caller's transaction. The resume file is moved into UPLOAD_DIR (copied when
+    keep_source is set); `final_path` in the result is the caller's to remove if
+    the transaction is rolled back.
+    """
+    parsed = prepared["parsed"]
+    resume_sha256 = prepared["resume_sha256"]
+    signature = prepared["signature"]
+    new_resume = not existing or existing["resume_sha256"] != resume_sha256
     final_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            shutil.copyfileobj(pdf_file.file, tmp)
-            tmp_path = tmp.name
+    applicant_data = None
+    skill_ids = {}
+    now = datetime.now()
+
+    if existing:
+        applicant_id = existing["applicant_id"]
+        if existing["resume_sha256"] != resume_sha256:
+            # same person, newer resume: keep the latest file on record
+            final_path = _save_resume_from_temp(resume_path, applicant_id, filename, copy=keep_source)
+            db.execute(text("""
+                UPDATE applicants SET resume_url = :url, resume_sha256 = :sha,
+                    minhash_signature = :sig, updated_at = :now
+                WHERE applicant_id = :id
+            """), {"url": final_path, "sha": resume_sha256, "now": now, "id": applicant_id,
+                   "sig": near_duplicates.signature_to_bytes(signature)})
+    else:
+        applicant_data = {
+            "first_name": parsed["first_name"],
+            "last_name": parsed["last_name"] or "Applicant",
+            "email": parsed["email"],
+            "email_normalized": prepared["email_normalized"],
+            "phone": parsed["phone"],
+            "linkedin_url": parsed["linkedin_url"],
+            "experience_years": parsed["experience_years"],
+            "education": parsed["education"],
+            "current_company": parsed["current_company"],
+            "current_role": parsed["current_role"],
+            "expected_ctc": expected_ctc or 0.0,
+            "notice_period_days": notice_period_days or 0,
+            "skills": parsed["skills"],
+            "location": "",
+            "resume_url": None,
+            "resume_sha256": resume_sha256,
+            "minhash_signature": near_duplicates.signature_to_bytes(signature),
+            "updated_at": now
+        }
 
-        # <-- renamed local variable to avoid shadowing sqlalchemy.text
-        extracted_text = _extract_text_from_pdf(tmp_path)
-        if not extracted_text.strip():
-            raise HTTPException(status_code=400, detail="Empty PDF or text extraction failed")
+        insert_sql = text("""
+            INSERT INTO applicants (
+                first_name, last_name, email, email_normalized, phone, linkedin_url,
+                experience_years, education, current_company, current_role,
+                expected_ctc, notice_period_days, skills, location,
+                resume_url, resume_sha256, minhash_signature, updated_at
+            )
+            OUTPUT INSERTED.applicant_id
+            VALUES (
+                :first_name, :last_name, :email, :email_normalized, :phone, :linkedin_url,
+                :experience_years, :education, :current_company, :current_role,
+                :expected_ctc, :notice_period_days, :skills, :location,
+                :resume_url, :resume_sha256, :minhash_signature, :updated_at
+            )
+        """)
+        result = db.execute(insert_sql, applicant_data)
+        applicant_id = result.scalar()
+        if not applicant_id:
+            raise HTTPException(status_code=500, detail="Failed to create applicant (no id returned)")
+
+        final_path = _save_resume_from_temp(resume_path, applicant_id, filename, copy=keep_source)
+        db.execute(
+            text("UPDATE applicants SET resume_url = :url WHERE applicant_id = :id"),
+            {"url": final_path, "id": applicant_id}
+        )
+        skill_ids = skill_service.store_applicant_skills(db, applicant_id, parsed["skills"])
+
+    app_sql = text("""
+        INSERT INTO applications (
+            applicant_id, job_id, applied_date, application_status, source,
+            skills_matching_score, jd_matching_score, resume_overall_score,
+            high_keyword_match, normal_keyword_match,
+            assigned_hr, assigned_manager, comments, updated_at
+        )
+        OUTPUT INSERTED.application_id
+        VALUES (
+            :applicant_id, :job_id, :applied_date, :application_status, :source,
+            :skills_matching_score, :jd_matching_score, :resume_overall_score,
+            :high_keyword_match, :normal_keyword_match,
+            :assigned_hr, :assigned_manager, :comments, :updated_at
+        )
+    """)
+    application_params = {
+        "applicant_id": applicant_id,
+        "job_id": job_id,
+        "applied_date": now,
+        "application_status": application_status,
+        "source": source,
+        "skills_matching_score": eval_result["keyword_match_score"],
+        "jd_matching_score": eval_result["semantic_similarity"],
+        "resume_overall_score": eval_result["resume_overall_score"],
+        "high_keyword_match": eval_result["high_keyword_match"],
+        "normal_keyword_match": eval_result["normal_keyword_match"],
+        "assigned_hr": assigned_hr,
+        "assigned_manager": assigned_manager,
+        "comments": eval_result["comments"],
+        "updated_at": now
+    }
+    application_id = db.execute(app_sql, application_params).scalar()
+    funnel_service.bump(db, job_id, application_status, source, assigned_hr)
+    if resume_vector is not None and new_resume:
+        semantic_search.store_embedding(db, applicant_id, resume_vector, vector_version)
+
+    return {
+        "applicant_id": applicant_id,
+        "application_id": application_id,
+        "final_path": final_path,
+        "new_resume": new_resume,
+        "applicant_data": applicant_data,
+        "application_params": application_params,
+        "skill_ids": skill_ids,
+    }
 
-        parsed = _parse_resume_pdf(extracted_text)
-        if not parsed["email"]:
-            raise HTTPException(status_code=400, detail="Email not found")
-        if not parsed["first_name"]:
-            raise HTTPException(status_code=400, detail="Name not found")
 
-        now = datetime.now()
+def publish_application(job_id: int, prepared: Dict[str, Any], written: Dict[str, Any],
+                        resume_vector, vector_version: Optional[str]) -> None:
+    """Post-commit: fold a written application into this process's in-memory indexes."""
+    applicant_id = written["applicant_id"]
+    if prepared["signature"] is not None and written["new_resume"]:
+        near_duplicates.index.add(applicant_id, prepared["signature"])
+    if written["applicant_data"] is not None:
+        applicant_search.index.add(applicant_id, written["applicant_data"])
+        skill_service.skill_ids.remember(written["skill_ids"])
+    score_stats.stats.record(job_id, written["application_id"], written["application_params"])
+    if written["new_resume"]:
+        resume_fulltext.index.add(applicant_id, prepared["text"])
+        if resume_vector is not None:
+            semantic_search.index.offer(applicant_id, resume_vector, vector_version)
+
+
+def create_applicant_from_path(
+    db: Session,
+    tmp_path: str,
+    filename: str,
+    job_id: int,
+    source: str,
+    expected_ctc: Optional[float] = None,
+    notice_period_days: Optional[int] = None,
+    application_status: str = "pending",
+    assigned_hr: Optional[int] = None,
+    assigned_manager: Optional[int] = None,
+    comments: Optional[str] = None,
+    resume_sha256: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Same pipeline as create_applicant_from_pdf for a resume already written to a
+    temp file (e.g. by the streaming upload handler). Takes ownership of tmp_path:
+    it is moved into UPLOAD_DIR on success and removed otherwise.
+
+    A candidate already in `applicants` (same normalised email or same resume bytes)
+    is not inserted again: the new application is linked to the existing row and the
+    result carries `linked: True`. If they already applied to this job nothing is
+    scored or written.
+    """
+    final_path = None
+    try:
+        prepared = prepare_resume(tmp_path, resume_sha256)
+        parsed = prepared["parsed"]
+        signature = prepared["signature"]
 
+        # Known candidate? Read the job's scoring inputs in the same brief read transaction
         with db.begin():
-            applicant_data = {
-                "first_name": parsed["first_name"],
-                "last_name": parsed["last_name"] or "Applicant",
-                "email": parsed["email"],
-                "phone": parsed["phone"],
-                "linkedin_url": parsed["linkedin_url"],
-                "experience_years": parsed["experience_years"],
-                "education": parsed["education"],
-                "current_company": parsed["current_company"],
-                "current_role": parsed["current_role"],
-                "expected_ctc": expected_ctc or 0.0,
-                "notice_period_days": notice_period_days or 0,
-                "skills": parsed["skills"],
-                "location": "",
-                "resume_url": None,
-                "updated_at": now
+            near_duplicates.index.sync(db)
+            existing, existing_application_id = find_existing(db, prepared, job_id)
+            if existing_application_id is None:
+                job_inputs = load_job_inputs(db, job_id)
+
+        similar = near_duplicates.index.query(signature, exclude=existing["applicant_id"] if existing else None) \
+            if signature is not None else []
+        if similar:
+            logging.info(f"{filename} looks like a near-duplicate of applicants {[a for a, _ in similar]}")
+
+        if existing_application_id is not None:
+            # Already applied to this job: nothing to score or insert (tmp file dropped below)
+            return {
+                "applicant_id": existing["applicant_id"],
+                "application_id": existing_application_id,
+                "resume_url": existing["resume_url"],
+                "linked": True,
+                "already_applied": True,
+                "near_duplicates": similar,
+                "evaluation_result": {},
+                "parsed": parsed
             }
 
-            insert_sql = text("""
-                INSERT INTO applicants (
-                    first_name, last_name, email, phone, linkedin_url,
-                    experience_years, education, current_company, current_role,
-                    expected_ctc, notice_period_days, skills, location,
-                    resume_url, updated_at
-                )
-                OUTPUT INSERTED.applicant_id
-                VALUES (
-                    :first_name, :last_name, :email, :phone, :linkedin_url,
-                    :experience_years, :education, :current_company, :current_role,
-                    :expected_ctc, :notice_period_days, :skills, :location,
-                    :resume_url, :updated_at
-                )
-            """)
-            result = db.execute(insert_sql, applicant_data)
-            applicant_id = result.scalar()
-            if not applicant_id:
-                raise HTTPException(status_code=500, detail="Failed to create applicant (no id returned)")
-
-            final_path = _save_resume_from_temp(tmp_path, applicant_id, pdf_file.filename)
-            db.execute(
-                text("UPDATE applicants SET resume_url = :url WHERE applicant_id = :id"),
-                {"url": final_path, "id": applicant_id}
-            )
+        # Score with no transaction open; a known applicant's unchanged resume already has its vector
+        new_resume = not existing or existing["resume_sha256"] != prepared["resume_sha256"]
+        eval_result, resume_vector, vector_version = score_prepared(
+            tmp_path, prepared, job_inputs, comments, embed_if_missing=new_resume
+        )
 
-            app_sql = text("""
-                INSERT INTO applications (
-                    applicant_id, job_id, application_status, source,
-                    assigned_hr, assigned_manager, comments, updated_at
-                ) VALUES (
-                    :applicant_id, :job_id, :application_status, :source,
-                    :assigned_hr, :assigned_manager, :comments, :updated_at
-                )
-            """)
-            db.execute(app_sql, {
-                "applicant_id": applicant_id,
-                "job_id": job_id,
-                "application_status": application_status,
-                "source": source,
-                "assigned_hr": assigned_hr,
-                "assigned_manager": assigned_manager,
-                "comments": comments,
-                "updated_at": now
-            })
-
-            eval_result = _trigger_evaluate_resume_match(
-                resume_pdf_path=final_path,
-                jd_text=_get_jd(job_id, db),
-                high_priority_keywords=_get_high_priority_keywords(job_id, db),
-                normal_keywords=_get_normal_keywords(job_id, db),
+        # One short write transaction: applicant (unless known) + application with its scores
+        with db.begin():
+            written = write_application(
+                db, prepared, existing, eval_result, resume_vector, vector_version,
+                resume_path=tmp_path,
+                filename=filename,
                 job_id=job_id,
-                applicant_id=applicant_id,
                 source=source,
+                expected_ctc=expected_ctc,
+                notice_period_days=notice_period_days,
                 application_status=application_status,
                 assigned_hr=assigned_hr,
                 assigned_manager=assigned_manager,
-                comments=comments,
-                db=db,
             )
+            final_path = written["final_path"]
+
+        publish_application(job_id, prepared, written, resume_vector, vector_version)
 
         return {
-            "applicant_id": applicant_id,
-            "resume_url": final_path,
+            "applicant_id": written["applicant_id"],
+            "application_id": written["application_id"],
+            "resume_url": final_path or existing["resume_url"],
+            "linked": bool(existing),
+            "near_duplicates": similar,
             "expected_ctc": expected_ctc or 0.0,
             "notice_period_days": notice_period_days or 0,
             "assigned_hr": assigned_hr,
@@ -0,0 +1,414 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+from fastapi import HTTPException, Request, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # older python-multipart releases
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import settings
+from app.db.connection import SessionLocal
+from app.services.bulk_applicant_service import create_applicant_from_path
+from app.services.idempotency_store import store as idempotency_store
+
+RESUME_FIELD = "resumes"
+
+
+class _ResumePartCollector:
+    """
+    python-multipart callbacks that write each `resumes` part straight to a temp
+    file while hashing it, so a part is ready for scoring the moment it ends.
+    Finished parts are queued in `completed` for the caller to drain. The parser
+    (and so every file write) runs on a worker thread, never on the event loop.
+    """
+
+    def __init__(self, max_file_bytes: int):
+        self.max_file_bytes = max_file_bytes
+        self.completed: List[Dict[str, Any]] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._part: Optional[Dict[str, Any]] = None
+
+    def callbacks(self) -> Dict[str, Any]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._part = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        if name != RESUME_FIELD or filename is None:
+            return  # ignore non-resume fields; batch metadata comes from the query string
+
+        part = {
+            "filename": os.path.basename(filename.decode("utf-8", "replace")) or "unknown",
+            "tmp_path": None,
+            "sha256": None,
+            "size": 0,
+            "error": None,
+            "status_code": None,
+            "_hasher": hashlib.sha256(),
+            "_fh": None,
+        }
+        if not part["filename"].lower().endswith(".pdf"):
+            part["error"] = "Invalid file type (only PDFs allowed)"
+            part["status_code"] = 400
+        else:
+            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+            part["_fh"] = tmp
+            part["tmp_path"] = tmp.name
+        self._part = part
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        part = self._part
+        if part is None or part["error"]:
+            return
+        chunk = data[start:end]
+        part["size"] += len(chunk)
+        if part["size"] > self.max_file_bytes:
+            part["error"] = f"File exceeds {settings.BULK_UPLOAD_MAX_FILE_MB} MB limit"
+            part["status_code"] = 413
+            self._discard(part)
+            return
+        part["_hasher"].update(chunk)
+        part["_fh"].write(chunk)
+
+    def on_part_end(self) -> None:
+        part = self._part
+        self._part = None
+        if part is None:
+            return
+        if part["_fh"] is not None:
+            part["_fh"].close()
+        if not part["error"]:
+            part["sha256"] = part["_hasher"].hexdigest()
+        part.pop("_fh")
+        part.pop("_hasher")
+        self.completed.append(part)
+
+    def abort(self) -> None:
+        """Drop whatever part is still being received (client went away / total limit hit)."""
+        if self._part is not None:
+            self._discard(self._part)
+            self._part = None
+
+    @staticmethod
+    def _discard(part: Dict[str, Any]) -> None:
+        if part.get("_fh") is not None:
+            part["_fh"].close()
+            part["_fh"] = None
+        if part.get("tmp_path") and os.path.exists(part["tmp_path"]):
+            try: os.unlink(part["tmp_path"])
+            except OSError: pass
+        part["tmp_path"] = None
+
+
+def _discard_tmp(part: Dict[str, Any]) -> None:
+    if part.get("tmp_path") and os.path.exists(part["tmp_path"]):
+        try: os.unlink(part["tmp_path"])
+        except OSError: pass
+    part["tmp_path"] = None
+
+
+def spool_upload(upload: UploadFile) -> Dict[str, Any]:
+    """
+    Copy an already-received UploadFile into a temp file while hashing it,
+    producing the same part dict the streaming parser builds.
+    """
+    max_file = settings.BULK_UPLOAD_MAX_FILE_MB * 1024 * 1024
+    part = {
+        "filename": os.path.basename(upload.filename or "") or "unknown",
+        "tmp_path": None,
+        "sha256": None,
+        "size": 0,
+        "error": None,
+        "status_code": None,
+    }
+    if not part["filename"].lower().endswith(".pdf"):
+        part["error"] = "Invalid file type (only PDFs allowed)"
+        part["status_code"] = 400
+        return part
+
+    hasher = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        part["tmp_path"] = tmp.name
+        for chunk in iter(lambda: upload.file.read(64 * 1024), b""):
+            part["size"] += len(chunk)
+            if part["size"] > max_file:
+                part["error"] = f"File exceeds {settings.BULK_UPLOAD_MAX_FILE_MB} MB limit"
+                part["status_code"] = 413
+                break
+            hasher.update(chunk)
+            tmp.write(chunk)
+    if part["error"]:
+        _discard_tmp(part)
+    else:
+        part["sha256"] = hasher.hexdigest()
+    return part
+
+
+def process_resume_part(part: Dict[str, Any], payload) -> Dict[str, Any]:
+    """Run one fully-received resume through the bulk pipeline (blocking; call in a thread)."""
+    file_result = {
+        "filename": part["filename"],
+        "sha256": part["sha256"],
+        "size": part["size"],
+        "applicant_id": None,
+        "email": None,
+        "name": None,
+        "status": "failed",
+        "status_code": part["status_code"],
+        "error": part["error"],
+    }
+    if part["error"]:
+        return file_result
+
+    # Same bytes already ingested for this job (e.g. a client retry): replay, don't redo
+    previous = idempotency_store.get_file_result(payload.job_id, part["sha256"])
+    if previous:
+        _discard_tmp(part)
+        return {**previous, "filename": part["filename"], "replayed": True}
+
+    db = SessionLocal()
+    try:
+        result = create_applicant_from_path(
+            db=db,
+            tmp_path=part["tmp_path"],
+            filename=part["filename"],
+            resume_sha256=part["sha256"],
+            job_id=payload.job_id,
+            source=payload.source,
+            expected_ctc=payload.expected_ctc,
+            notice_period_days=payload.notice_period_days,
+            application_status=payload.application_status,
+            assigned_hr=payload.assigned_hr,
+            assigned_manager=payload.assigned_manager,
+            comments=payload.comments,
+        )
+        parsed = result.get("parsed", {})
+        name = f"{parsed.get('first_name','')} {parsed.get('last_name','')}".strip() or "Unknown"
+        file_result.update({
+            "applicant_id": result.get("applicant_id"),
+            "application_id": result.get("application_id"),
+            "email": parsed.get("email"),
+            "name": name,
+            # "linked": known candidate, application attached to the existing applicant
+            "status": "linked" if result.get("linked") else "success",
+            "status_code": 200 if result.get("already_applied") else 201,
+            "near_duplicate_of": [applicant_id for applicant_id, _ in result.get("near_duplicates", [])],
+            "error": None
+        })
+        idempotency_store.put_file_result(payload.job_id, part["sha256"], file_result)
+    except HTTPException as he:
+        file_result["error"] = he.detail if isinstance(he.detail, str) else str(he.detail)
+        file_result["status_code"] = he.status_code or 500
+    except Exception as e:
+        logging.exception(f"Unexpected error processing {part['filename']}: {e}")
+        file_result["error"] = str(e)
+        file_result["status_code"] = 500
+    finally:
+        db.close()
+    return file_result
+
+
+def summary_bucket(file_result: Dict[str, Any]) -> str:
+    """Which BulkUploadSummary counter a per-file result belongs to."""
+    return {"success": "successful", "linked": "linked"}.get(file_result["status"], "failed")
+
+
+def check_stream_request(request: Request) -> bytes:
+    """Validate headers before reading the body; returns the multipart boundary."""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    max_total = settings.BULK_UPLOAD_MAX_TOTAL_MB * 1024 * 1024
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_total:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.BULK_UPLOAD_MAX_TOTAL_MB} MB limit")
+    return options[b"boundary"]
+
+
+class _ReceiveSplitter:
+    """
+    Sole reader of the ASGI receive channel while the body streams in. Body chunks
+    go to the ingest; the response's disconnect listener (Starlette runs one beside
+    every StreamingResponse on older ASGI servers) is only answered once the body
+    is done or the client has gone, so it can never swallow a body chunk.
+    """
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._released = asyncio.Event()
+        self._disconnected = False
+
+    async def body(self) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                message = await self._receive()
+                if message["type"] == "http.disconnect":
+                    self._disconnected = True
+                    raise ClientDisconnect()
+                chunk = message.get("body", b"")
+                if chunk:
+                    yield chunk
+                if not message.get("more_body", False):
+                    return
+        finally:
+            self._released.set()
+
+    async def receive(self):
+        await self._released.wait()
+        if self._disconnected:
+            return {"type": "http.disconnect"}
+        return await self._receive()
+
+
+class StreamIngest:
+    """
+    One streaming upload: a task parses the body into temp files on a thread while
+    BULK_STREAM_CONCURRENCY worker tasks score finished parts from a bounded
+    queue, and the response streams each result as it is ready. Upload, scoring
+    and output all overlap, so the first line does not wait for the last byte.
+    When the queue is full, reading the body pauses (TCP back-pressure) instead
+    of spooling the whole upload to disk.
+    """
+
+    def __init__(self, payload, receive):
+        self.payload = payload
+        self.counts = {"total": 0, "successful": 0, "linked": 0, "failed": 0}
+        self.aborted: Optional[str] = None
+        self.splitter = _ReceiveSplitter(receive)
+        concurrency = max(1, settings.BULK_STREAM_CONCURRENCY)
+        self._parts: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(concurrency)]
+        self._reader: Optional[asyncio.Task] = None
+
+    def start(self, boundary: bytes) -> None:
+        self._reader = asyncio.create_task(self._read_body(boundary))
+
+    async def _work(self) -> None:
+        while True:
+            part = await self._parts.get()
+            if part is None:
+                return
+            try:
+                file_result = await run_in_threadpool(process_resume_part, part, self.payload)
+            except Exception as e:  # process_resume_part reports its own failures; never lose a line
+                logging.exception(f"Unexpected error processing {part['filename']}: {e}")
+                _discard_tmp(part)
+                file_result = {"filename": part["filename"], "sha256": part["sha256"], "size": part["size"],
+                               "applicant_id": None, "email": None, "name": None, "status": "failed",
+                               "status_code": 500, "error": str(e)}
+            await self._results.put(file_result)
+
+    async def _finish(self) -> None:
+        for _ in self._workers:
+            await self._parts.put(None)
+        await asyncio.gather(*self._workers)
+        await self._results.put(None)
+
+    async def _read_body(self, boundary: bytes) -> None:
+        """Consume the request body, queueing each resume as soon as its part ends."""
+        max_total = settings.BULK_UPLOAD_MAX_TOTAL_MB * 1024 * 1024
+        collector = _ResumePartCollector(settings.BULK_UPLOAD_MAX_FILE_MB * 1024 * 1024)
+        parser = MultipartParser(boundary, collector.callbacks())
+
+        async def hand_over() -> None:
+            while collector.completed:
+                await self._parts.put(collector.completed.pop(0))
+
+        total_bytes = 0
+        body = self.splitter.body()
+        try:
+            async for chunk in body:
+                total_bytes += len(chunk)
+                if total_bytes > max_total:
+                    self.aborted = f"Upload exceeds {settings.BULK_UPLOAD_MAX_TOTAL_MB} MB limit; remaining files skipped"
+                    break
+                await run_in_threadpool(parser.write, chunk)
+                await hand_over()
+            if not self.aborted:
+                await run_in_threadpool(parser.finalize)
+            await hand_over()
+        except ClientDisconnect:
+            self.aborted = "Client disconnected; remaining files skipped"
+        except Exception as e:
+            logging.exception(f"Streaming upload body failed: {e}")
+            self.aborted = f"Upload interrupted ({e}); remaining files skipped"
+        finally:
+            await body.aclose()
+            # drop what was never queued, then stop the workers after the queued parts
+            collector.abort()
+            for part in collector.completed:
+                _discard_tmp(part)
+            await self._finish()
+
+    async def lines(self) -> AsyncIterator[bytes]:
+        """NDJSON: one line per file as scoring finishes, then the summary line."""
+        while True:
+            file_result = await self._results.get()
+            if file_result is None:
+                break
+            self.counts["total"] += 1
+            self.counts[summary_bucket(file_result)] += 1
+            yield (json.dumps(file_result) + "\n").encode("utf-8")
+
+        summary = {"message": "Bulk upload completed", **self.counts, "error": self.aborted}
+        yield (json.dumps({"summary": summary}) + "\n").encode("utf-8")
+
+
+class IngestResponse(StreamingResponse):
+    """StreamingResponse of ingest.lines() that listens for disconnects through the ingest's receive splitter."""
+
+    def __init__(self, ingest: StreamIngest):
+        super().__init__(ingest.lines(), media_type="application/x-ndjson")
+        self.ingest = ingest
+
+    async def __call__(self, scope, receive, send) -> None:
+        await super().__call__(scope, self.ingest.splitter.receive, send)
+
+
+def start_stream_ingest(request: Request, boundary: bytes, payload) -> IngestResponse:
+    """
+    Start reading the multipart body in a background task (scoring each resume as
+    its part ends) and return the response that streams the results meanwhile.
+    Call from the event loop.
+    """
+    ingest = StreamIngest(payload, request.receive)
+    ingest.start(boundary)
+    return IngestResponse(ingest)
@@ -0,0 +1,153 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, BinaryIO
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services.bulk_stream_service import process_resume_part, summary_bucket
+
+_COPY_CHUNK = 64 * 1024
+
+
+def _is_ignored_member(info: zipfile.ZipInfo) -> bool:
+    name = info.filename
+    base = os.path.basename(name)
+    return info.is_dir() or name.startswith("__MACOSX/") or base.startswith(".") or not base
+
+
+def _extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, budget: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Stream one archive member to a temp file, hashing as it goes.
+    Sizes are counted from the decompressed bytes actually read, not the
+    (attacker-controlled) header, so a lying zip cannot bypass the limits.
+    """
+    max_file = settings.BULK_UPLOAD_MAX_FILE_MB * 1024 * 1024
+    part = {
+        "filename": os.path.basename(info.filename),
+        "tmp_path": None,
+        "sha256": None,
+        "size": 0,
+        "error": None,
+        "status_code": None,
+    }
+    if not part["filename"].lower().endswith(".pdf"):
+        part["error"] = "Invalid file type (only PDFs allowed)"
+        part["status_code"] = 400
+        return part
+    if info.flag_bits & 0x1:
+        part["error"] = "Encrypted archive members are not supported"
+        part["status_code"] = 400
+        return part
+    if info.file_size > max_file:
+        part["error"] = f"File exceeds {settings.BULK_UPLOAD_MAX_FILE_MB} MB limit"
+        part["status_code"] = 413
+        return part
+
+    hasher = hashlib.sha256()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+    part["tmp_path"] = tmp.name
+    try:
+        with tmp, zf.open(info) as src:
+            while True:
+                chunk = src.read(_COPY_CHUNK)
+                if not chunk:
+                    break
+                part["size"] += len(chunk)
+                budget["remaining"] -= len(chunk)
+                if part["size"] > max_file:
+                    part["error"] = f"File exceeds {settings.BULK_UPLOAD_MAX_FILE_MB} MB limit"
+                    part["status_code"] = 413
+                    break
+                if budget["remaining"] < 0:
+                    part["error"] = f"Archive exceeds {settings.BULK_ZIP_MAX_UNCOMPRESSED_MB} MB uncompressed"
+                    part["status_code"] = 413
+                    break
+                hasher.update(chunk)
+                tmp.write(chunk)
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError, OSError,
+            zlib.error, EOFError) as e:  # corrupt deflate stream / truncated member
+        part["error"] = f"Could not read archive member: {e}"
+        part["status_code"] = 400
+
+    if part["error"]:
+        try: os.unlink(part["tmp_path"])
+        except OSError: pass
+        part["tmp_path"] = None
+    else:
+        part["sha256"] = hasher.hexdigest()
+    return part
+
+
+def ingest_resume_zip(archive: BinaryIO, payload) -> Dict[str, Any]:
+    """
+    Score every PDF in a ZIP archive through the bulk pipeline.
+
+    Members are decompressed one at a time into temp files and handed to a pool of
+    BULK_ZIP_CONCURRENCY workers; at most that many (plus one being extracted) are on
+    disk at any moment. Entry count and total uncompressed size are capped up front
+    from the central directory and again while reading.
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid ZIP archive")
+
+    with zf:
+        entries = zf.infolist()
+        # capped before filtering: directories and junk entries cost central-directory work too
+        if len(entries) > settings.BULK_ZIP_MAX_ENTRIES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"ZIP archive has {len(entries)} entries (limit {settings.BULK_ZIP_MAX_ENTRIES})"
+            )
+        members = [info for info in entries if not _is_ignored_member(info)]
+        if not members:
+            raise HTTPException(status_code=400, detail="ZIP archive contains no files")
+        max_uncompressed = settings.BULK_ZIP_MAX_UNCOMPRESSED_MB * 1024 * 1024
+        if sum(info.file_size for info in members) > max_uncompressed:
+            raise HTTPException(
+                status_code=413,
+                detail=f"ZIP archive exceeds {settings.BULK_ZIP_MAX_UNCOMPRESSED_MB} MB uncompressed"
+            )
+
+        budget = {"remaining": max_uncompressed}
+        slots = threading.BoundedSemaphore(settings.BULK_ZIP_CONCURRENCY)
+        futures = []
+
+        def run(part):
+            try:
+                return process_resume_part(part, payload)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=settings.BULK_ZIP_CONCURRENCY) as pool:
+            for info in members:
+                slots.acquire()  # back-pressure: don't extract ahead of the workers
+                try:
+                    part = _extract_member(zf, info, budget)
+                except BaseException:
+                    slots.release()
+                    raise
+                futures.append(pool.submit(run, part))
+            results: List[Dict[str, Any]] = [f.result() for f in futures]
+
+    buckets = [summary_bucket(r) for r in results]
+    successful = buckets.count("successful")
+    linked = buckets.count("linked")
+    logging.info(f"ZIP ingestion for job {payload.job_id}: {successful} new, {linked} linked, {len(results)} total")
+    return {
+        "message": "Bulk upload completed",
+        "total": len(results),
+        "successful": successful,
+        "linked": linked,
+        "failed": buckets.count("failed"),
+        "results": results,
+        "errors": [r["error"] for r in results if r["error"]],
+    }
@@ -0,0 +1,268 @@
+# app/services/embedders.py
+"""
+Pluggable embedding backends for the shortlister.
+
+  sentence-transformers : the original all-MiniLM-L6-v2 via torch (default)
+  onnx                  : same MiniLM exported to ONNX, dynamically int8-quantized,
+                          run with onnxruntime on CPU (no torch import)
+  hashing               : deterministic feature-hashing vectors; no model files,
+                          for tests and air-gapped environments
+
+The backend is chosen with EMBEDDING_BACKEND. All of them expose the
+SentenceTransformer-style `encode()` the scorer and the batcher rely on.
+
+Benchmark latency and score agreement:  python -m app.services.embedders
+"""
+import os
+import re
+import time
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_SENTENCE_TRANSFORMERS = "sentence-transformers"
+BACKEND_ONNX = "onnx"
+BACKEND_HASHING = "hashing"
+
+
+class Embedder(ABC):
+    """Interface shared by all backends; a backend missing any abstract member fails at construction."""
+
+    name: str = "base"
+
+    @property
+    @abstractmethod
+    def version(self) -> str:
+        """Identifies the vectors this backend produces (used to key cached scores/embeddings)."""
+
+    @abstractmethod
+    def get_sentence_embedding_dimension(self) -> int:
+        ...
+
+    @abstractmethod
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        ...
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, convert_to_tensor: bool = False,
+               normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if texts:
+            embeddings = np.asarray(self._encode(texts), dtype=np.float32)
+        else:
+            embeddings = np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch  # only when a caller explicitly asks for tensors
+            return torch.from_numpy(np.ascontiguousarray(embeddings))
+        return embeddings
+
+
+class SentenceTransformerEmbedder(Embedder):
+    name = BACKEND_SENTENCE_TRANSFORMERS
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True)
+
+
+class OnnxEmbedder(Embedder):
+    """
+    MiniLM on onnxruntime. `model_dir` must contain `model.onnx` (e.g. from
+    `optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2`) and
+    `tokenizer.json`. With quantize=True a dynamically int8-quantized copy
+    (`model.int8.onnx`) is produced next to it on first load and used from then on.
+    """
+    name = BACKEND_ONNX
+
+    def __init__(self, model_dir: str, quantize: bool = True, max_seq_length: int = 256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        fp32_path = os.path.join(model_dir, "model.onnx")
+        model_path = fp32_path
+        if quantize:
+            model_path = os.path.join(model_dir, "model.int8.onnx")
+            if not os.path.exists(model_path):
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                logger.info(f"Quantizing {fp32_path} -> {model_path} (dynamic int8)")
+                quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        self.quantized = quantize
+        self.model_dir = model_dir
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.EMBED_INTRA_OP_THREADS:
+            opts.intra_op_num_threads = settings.EMBED_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dim = self.session.get_outputs()[0].shape[-1]
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{os.path.basename(os.path.normpath(self.model_dir))}:{'int8' if self.quantized else 'fp32'}"
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self._dim)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        # mean pooling over real tokens, as sentence-transformers does for MiniLM
+        mask = attention_mask[..., None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Signed feature hashing of unigrams + bigrams, L2-normalised.
+    Deterministic across processes and machines (blake2b, not Python's hash()).
+    """
+    name = BACKEND_HASHING
+    _TOKEN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}:{self.dim}"
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = self._TOKEN.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                h = int.from_bytes(digest, "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+def limit_threads(threads: int) -> None:
+    """
+    Cap the math libraries' thread pools of this process, for pool workers that
+    already run one per core. Call before the model is loaded: the OpenMP / BLAS
+    variables are read when those libraries initialise.
+    """
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    settings.EMBED_INTRA_OP_THREADS = threads
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+def get_embedder(backend: str = None) -> Embedder:
+    backend = (backend or settings.EMBEDDING_BACKEND).lower()
+    if backend == BACKEND_SENTENCE_TRANSFORMERS:
+        return SentenceTransformerEmbedder(settings.EMBEDDING_MODEL_NAME)
+    if backend == BACKEND_ONNX:
+        return OnnxEmbedder(settings.ONNX_MODEL_DIR, quantize=settings.ONNX_QUANTIZE_INT8)
+    if backend == BACKEND_HASHING:
+        return HashingEmbedder(settings.HASHING_EMBED_DIM)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'")
+
+
+# ==============================
+#           BENCHMARK
+# ==============================
+
+def _benchmark(resume_dir: str, jd_text: str, backends: List[str], repeats: int) -> None:
+    from pypdf import PdfReader
+
+    resumes = []
+    for root, _, files in os.walk(resume_dir):
+        for f in sorted(files):
+            if f.lower().endswith(".pdf"):
+                try:
+                    reader = PdfReader(os.path.join(root, f))
+                    resumes.append("".join(p.extract_text() or "" for p in reader.pages))
+                except Exception as e:
+                    logger.warning(f"Skipping {f}: {e}")
+    if not resumes:
+        raise SystemExit(f"No readable PDFs under {resume_dir}")
+
+    scores = {}
+    for backend in backends:
+        try:
+            embedder = get_embedder(backend)
+        except Exception as e:
+            print(f"{backend:<22} unavailable: {e}")
+            continue
+        embedder.encode([jd_text] + resumes[:2])  # warm-up
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            vectors = embedder.encode([jd_text] + resumes, normalize_embeddings=True)
+            timings.append(time.perf_counter() - start)
+        scores[backend] = vectors[1:] @ vectors[0]
+        per_doc_ms = 1000 * min(timings) / (len(resumes) + 1)
+        print(f"{backend:<22} {per_doc_ms:8.2f} ms/doc  ({embedder.version})")
+
+    reference = scores.get(BACKEND_SENTENCE_TRANSFORMERS)
+    if reference is None or len(reference) < 2:
+        return
+    ref_rank = np.argsort(np.argsort(reference))
+    for backend, s in scores.items():
+        if backend == BACKEND_SENTENCE_TRANSFORMERS:
+            continue
+        pearson = float(np.corrcoef(reference, s)[0, 1])
+        spearman = float(np.corrcoef(ref_rank, np.argsort(np.argsort(s)))[0, 1])
+        mae = float(np.mean(np.abs(reference - s)))
+        print(f"{backend:<22} vs reference: pearson={pearson:.3f} spearman={spearman:.3f} mean|dscore|={mae:.4f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare embedding backends on local resumes")
+    parser.add_argument("--resumes", default="uploads/resumes")
+    parser.add_argument("--jd", default="Senior data engineer with Python, SQL, Spark, Airflow, AWS and Databricks.")
+    parser.add_argument("--backends", default=",".join([BACKEND_SENTENCE_TRANSFORMERS, BACKEND_ONNX, BACKEND_HASHING]))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    _benchmark(args.resumes, args.jd, [b.strip() for b in args.backends.split(",") if b.strip()], args.repeats)
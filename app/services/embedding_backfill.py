@@ -0,0 +1,93 @@
+# app/services/embedding_backfill.py
+"""
+Store resume vectors for applicants that have none of the current embedding
+version: those ingested before semantic search existed, or every applicant
+after EMBEDDING_BACKEND / the model / the window settings change. New uploads
+are embedded on the write path; this only catches up the existing pool.
+
+    python -m app.cli backfill-embeddings
+
+Resumes are read (through the re-scorer's extracted-text cache) and embedded in
+the same spawn process pool batch_rescore uses, RESCORE_CHUNK_SIZE applicants per
+executemany write. Re-runnable: rows already written no longer match the query.
+"""
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.connection import SessionLocal
+from app.services import semantic_search
+from app.services.batch_rescore import _init_worker, _resume_text, _versions
+
+logger = logging.getLogger(__name__)
+
+
+def _embed(row: Dict[str, Any]) -> Dict[str, Any]:
+    from app.services.aishortlist import embed_text
+    from app.services.score_cache import file_sha256
+
+    item = {"applicant_id": row["applicant_id"], "vector": None, "error": None}
+    path = row["resume_url"]
+    if not path or not os.path.exists(path):
+        item["error"] = f"resume file missing: {path}"
+        return item
+    try:
+        raw = _resume_text(row["resume_sha256"] or file_sha256(path), path)
+        if raw.strip():
+            item["vector"] = embed_text(raw)
+        else:
+            item["error"] = "no text extracted"
+    except Exception as e:
+        item["error"] = str(e)
+    return item
+
+
+def backfill_embeddings(workers: Optional[int] = None, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Embed every applicant with a resume but no vector of the current embedding version."""
+    workers = workers or settings.INGEST_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    counts = {"embedded": 0, "failed": 0}
+
+    context = multiprocessing.get_context("spawn")  # no inherited DB connections or model threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(settings.INGEST_THREADS_PER_WORKER,)) as pool:
+        _, vector_version = pool.submit(_versions).result()
+        db = SessionLocal()
+        try:
+            after = 0
+            started = time.perf_counter()
+            while True:
+                with db.begin():
+                    rows = db.execute(text("""
+                        SELECT TOP (:n) a.applicant_id, a.resume_url, a.resume_sha256
+                        FROM applicants a
+                        WHERE a.applicant_id > :after AND a.resume_url IS NOT NULL
+                          AND NOT EXISTS (SELECT 1 FROM applicant_embeddings e
+                                          WHERE e.applicant_id = a.applicant_id AND e.embedding_version = :version)
+                        ORDER BY a.applicant_id
+                    """), {"n": chunk_size, "after": after, "version": vector_version}).mappings().fetchall()
+                if not rows:
+                    break
+                items = list(pool.map(_embed, [dict(r) for r in rows]))
+                vectors = [(i["applicant_id"], i["vector"]) for i in items if i["vector"] is not None]
+                if vectors:
+                    with db.begin():
+                        semantic_search.store_embeddings(db, vectors, vector_version)
+                for i in items:
+                    if i["error"]:
+                        print(f"  applicant {i['applicant_id']}: {i['error']}")
+                counts["embedded"] += len(vectors)
+                counts["failed"] += len(items) - len(vectors)
+                after = int(rows[-1]["applicant_id"])
+                elapsed = time.perf_counter() - started
+                print(f"{counts['embedded']} embedded, {counts['failed']} failed (up to applicant_id {after}), "
+                      f"{(counts['embedded'] + counts['failed']) / elapsed if elapsed else 0:.2f} rows/s")
+        finally:
+            db.close()
+    return counts
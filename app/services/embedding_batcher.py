@@ -0,0 +1,91 @@
+# app/services/embedding_batcher.py
+"""
+Dynamic micro-batching in front of an encoder.
+
+Concurrent callers (e.g. several single-resume uploads) each ask for a couple of
+embeddings. Instead of one forward pass per request, a background thread collects
+requests for up to EMBED_BATCH_MAX_WAIT_MS or EMBED_BATCH_MAX_SIZE texts, runs one
+batched encode, and hands every caller back its own rows.
+"""
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import List, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingEncoder:
+    def __init__(self, encoder, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.encoder = encoder
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name):
+        # expose the wrapped encoder's other attributes (e.g. get_sentence_embedding_dimension)
+        return getattr(self.encoder, name)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, convert_to_tensor: bool = False,
+               normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        if texts:
+            future: Future = Future()
+            self._queue.put((texts, future))
+            embeddings = future.result()
+        else:
+            embeddings = np.zeros((0, 0), dtype=np.float32)
+
+        if normalize_embeddings and len(embeddings):
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch  # only when a caller explicitly asks for tensors
+            return torch.from_numpy(np.ascontiguousarray(embeddings))
+        return embeddings
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = np.asarray(self.encoder.encode(texts, convert_to_numpy=True), dtype=np.float32)
+            except Exception as e:
+                logger.exception("Batched encode failed")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+            if len(batch) > 1:
+                logger.debug(f"Encoded {len(texts)} texts for {len(batch)} callers in one pass")
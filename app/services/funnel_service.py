@@ -0,0 +1,78 @@
+# app/services/funnel_service.py
+"""
+Hiring-funnel counters.
+
+application_funnel_counts holds one row per (job_id, application_status, source,
+assigned_hr) with the number of applications in it. Every application insert and
+status change adjusts the counters inside the same transaction as the write, so
+the funnel endpoint reads a handful of rows instead of scanning applications.
+
+NULL source / assigned_hr are stored as '' / 0 so the four columns can be the key.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# pipeline order for presentation; unknown statuses are appended after these
+FUNNEL_STAGES = ("applied", "shortlisted", "under_review", "interview_scheduled", "offered", "hired", "rejected")
+
+
+def bump(db: Session, job_id: int, application_status: Optional[str], source: Optional[str],
+         assigned_hr: Optional[int], delta: int = 1) -> None:
+    """Adjust one counter by `delta`; call inside the transaction that writes the application."""
+    db.execute(text("""
+        MERGE application_funnel_counts WITH (HOLDLOCK) AS t
+        USING (SELECT :job_id AS job_id, :status AS application_status,
+                      :source AS source, :assigned_hr AS assigned_hr) AS s
+        ON t.job_id = s.job_id AND t.application_status = s.application_status
+           AND t.source = s.source AND t.assigned_hr = s.assigned_hr
+        WHEN MATCHED THEN UPDATE SET application_count = t.application_count + :delta, updated_at = GETDATE()
+        WHEN NOT MATCHED THEN INSERT (job_id, application_status, source, assigned_hr, application_count, updated_at)
+            VALUES (s.job_id, s.application_status, s.source, s.assigned_hr, :delta, GETDATE());
+    """), {
+        "job_id": job_id,
+        "status": application_status or "pending",
+        "source": source or "",
+        "assigned_hr": assigned_hr or 0,
+        "delta": delta,
+    })
+
+
+def move(db: Session, job_id: int, old_status: Optional[str], new_status: Optional[str],
+         source: Optional[str], assigned_hr: Optional[int]) -> None:
+    """One application changed status: -1 on the old bucket, +1 on the new."""
+    if (old_status or "pending") == (new_status or "pending"):
+        return
+    bump(db, job_id, old_status, source, assigned_hr, -1)
+    bump(db, job_id, new_status, source, assigned_hr, 1)
+
+
+def get_job_funnel(db: Session, job_id: int) -> Dict[str, Any]:
+    rows = db.execute(text("""
+        SELECT application_status, source, assigned_hr, application_count
+        FROM application_funnel_counts
+        WHERE job_id = :job_id AND application_count <> 0
+    """), {"job_id": job_id}).mappings().fetchall()
+
+    by_status: Dict[str, int] = {}
+    by_source: Dict[str, int] = {}
+    by_hr: Dict[str, int] = {}
+    breakdown = []
+    for row in rows:
+        count = int(row["application_count"])
+        status, source, hr = row["application_status"], row["source"] or None, row["assigned_hr"] or None
+        by_status[status] = by_status.get(status, 0) + count
+        by_source[source or "unknown"] = by_source.get(source or "unknown", 0) + count
+        by_hr[str(hr) if hr else "unassigned"] = by_hr.get(str(hr) if hr else "unassigned", 0) + count
+        breakdown.append({"application_status": status, "source": source, "assigned_hr": hr, "count": count})
+
+    ordered = [s for s in FUNNEL_STAGES if s in by_status] + sorted(s for s in by_status if s not in FUNNEL_STAGES)
+    return {
+        "job_id": job_id,
+        "total": sum(by_status.values()),
+        "by_status": {s: by_status[s] for s in ordered},
+        "by_source": by_source,
+        "by_assigned_hr": by_hr,
+        "breakdown": breakdown,
+    }
@@ -0,0 +1,166 @@
+# app/services/idempotency_store.py
+"""
+Idempotency for bulk uploads.
+
+A small SQLite file (shared by every worker on the host) remembers
+  - submissions by Idempotency-Key: in-flight / completed + the stored summary
+  - per-file results by (job_id, resume SHA-256) for successfully ingested files
+so a retried POST returns the original BulkUploadSummary, and a re-sent file is
+not parsed, embedded and inserted a second time. Completed entries expire after
+IDEMPOTENCY_TTL_SECONDS; an in-flight claim is only a lease of
+IDEMPOTENCY_LEASE_SECONDS, renewed by the running request, so a worker that dies
+mid-request blocks retries with its key for minutes rather than a day.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATE_NEW = "new"
+STATE_IN_FLIGHT = "in_flight"
+STATE_COMPLETED = "completed"
+STATE_MISMATCH = "mismatch"
+
+
+class IdempotencyStore:
+    def __init__(self, path: str, ttl_seconds: int, lease_seconds: int):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.lease = lease_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS submissions (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    response TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_results (
+                    job_id INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, sha256)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return conn
+
+    # ---------- submissions ----------
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Claim `key` for a new submission. Returns (STATE_NEW, None) if the caller should do
+        the work, (STATE_COMPLETED, summary) for a finished retry, STATE_IN_FLIGHT while the
+        original is still running, or STATE_MISMATCH if the key was used for other files.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT fingerprint, state, response FROM submissions WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO submissions (key, fingerprint, state, response, expires_at) "
+                    "VALUES (?, ?, ?, NULL, ?)",
+                    (key, fingerprint, STATE_IN_FLIGHT, now + self.lease)
+                )
+                conn.execute("COMMIT")
+                return STATE_NEW, None
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:  # not when BEGIN IMMEDIATE itself failed (e.g. database locked)
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        stored_fingerprint, state, response = row
+        if stored_fingerprint != fingerprint:
+            return STATE_MISMATCH, None
+        if state == STATE_COMPLETED:
+            return STATE_COMPLETED, json.loads(response)
+        return STATE_IN_FLIGHT, None
+
+    def renew(self, key: str) -> None:
+        """Extend the lease of an in-flight key; call it as the work progresses."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE submissions SET expires_at = ? WHERE key = ? AND state = ?",
+                (time.time() + self.lease, key, STATE_IN_FLIGHT)
+            )
+        finally:
+            conn.close()
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE submissions SET state = ?, response = ?, expires_at = ? WHERE key = ?",
+                (STATE_COMPLETED, json.dumps(response, default=str), time.time() + self.ttl, key)
+            )
+        finally:
+            conn.close()
+
+    def release(self, key: str) -> None:
+        """Forget an in-flight key whose request failed, so the client can retry."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM submissions WHERE key = ? AND state = ?", (key, STATE_IN_FLIGHT))
+        finally:
+            conn.close()
+
+    # ---------- per-file results ----------
+
+    def get_file_result(self, job_id: int, sha256: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT result FROM file_results WHERE job_id = ? AND sha256 = ? AND expires_at > ?",
+                (job_id, sha256, time.time())
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def put_file_result(self, job_id: int, sha256: str, result: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_results (job_id, sha256, result, expires_at) VALUES (?, ?, ?, ?)",
+                (job_id, sha256, json.dumps(result, default=str), time.time() + self.ttl)
+            )
+        finally:
+            conn.close()
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM submissions WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM file_results WHERE expires_at <= ?", (now,))
+        finally:
+            conn.close()
+
+
+store = IdempotencyStore(settings.IDEMPOTENCY_DB_PATH, settings.IDEMPOTENCY_TTL_SECONDS,
+                         settings.IDEMPOTENCY_LEASE_SECONDS)
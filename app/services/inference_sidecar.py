@@ -0,0 +1,221 @@
+# app/services/inference_sidecar.py
+"""
+Local inference sidecar: one process owns the embedding model and serves
+embedding requests over a Unix domain socket, so API workers don't each load
+their own copy of the model + torch.
+
+Run:  python -m app.services.inference_sidecar [--socket /tmp/ubti-embed.sock]
+Then set INFERENCE_SOCKET to the same path for the API workers.
+
+Wire format (all integers big-endian):
+  request  : op:u8 flags:u8 count:u32, then count x (len:u32, utf-8 bytes)
+  response : status:u8 rows:u32 dim:u32, then rows*dim little-endian float32
+             (status != 0: `rows` is the byte length of a utf-8 error message;
+              PING: `rows` is the byte length of the server's Embedder.version)
+The client tags its vectors with the version the server reports, not with its
+own settings, since the sidecar may run another backend (--backend onnx).
+"""
+import os
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+from typing import List, Union
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+OP_PING = 0
+OP_ENCODE = 1
+FLAG_NORMALIZE = 0x01
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_REQ_HEADER = struct.Struct("!BBI")
+_RESP_HEADER = struct.Struct("!BII")
+_LEN = struct.Struct("!I")
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("inference socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+# ==============================
+#            CLIENT
+# ==============================
+
+class RemoteEncoder:
+    """
+    Drop-in for the parts of SentenceTransformer.encode the scorer uses.
+    One connection per thread; reconnects once on a broken socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._version = None
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        # (re)read the server's model version: a restarted sidecar may serve another backend
+        sock.sendall(_REQ_HEADER.pack(OP_PING, 0, 0))
+        _, size, _ = _RESP_HEADER.unpack(_recv_exact(sock, _RESP_HEADER.size))
+        self._version = _recv_exact(sock, size).decode("utf-8")
+        self._local.sock = sock
+        return sock
+
+    def _roundtrip(self, frame: bytes) -> np.ndarray:
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None) or self._connect()
+            try:
+                sock.sendall(frame)
+                status, rows, dim = _RESP_HEADER.unpack(_recv_exact(sock, _RESP_HEADER.size))
+                if status != STATUS_OK:
+                    raise RuntimeError(f"inference sidecar error: {_recv_exact(sock, rows).decode('utf-8', 'replace')}")
+                payload = _recv_exact(sock, rows * dim * 4)
+                return np.frombuffer(payload, dtype="<f4").reshape(rows, dim)
+            except (ConnectionError, BrokenPipeError, socket.timeout, OSError):
+                try: sock.close()
+                except OSError: pass
+                self._local.sock = None
+                if attempt == 2:
+                    raise
+        raise ConnectionError("unreachable")  # pragma: no cover
+
+    @property
+    def version(self) -> str:
+        """The sidecar's Embedder.version (raises if it has never been reachable)."""
+        if self._version is None:
+            self._connect()
+        return self._version
+
+    def ping(self) -> bool:
+        try:
+            if getattr(self._local, "sock", None) is not None:
+                self._local.sock.close()
+            self._connect()
+            return True
+        except Exception:
+            self._local.sock = None
+            return False
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = None,
+               convert_to_numpy: bool = True, convert_to_tensor: bool = False,
+               normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        parts = [_REQ_HEADER.pack(OP_ENCODE, FLAG_NORMALIZE if normalize_embeddings else 0, len(texts))]
+        for t in texts:
+            raw = t.encode("utf-8")
+            parts.append(_LEN.pack(len(raw)))
+            parts.append(raw)
+        embeddings = self._roundtrip(b"".join(parts)).astype(np.float32, copy=True)
+
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch  # only when a caller explicitly asks for tensors
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+
+# ==============================
+#            SERVER
+# ==============================
+
+class _EmbedHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                op, flags, count = _REQ_HEADER.unpack(_recv_exact(sock, _REQ_HEADER.size))
+                if op == OP_PING:
+                    version = self.server.model.version.encode("utf-8")
+                    sock.sendall(_RESP_HEADER.pack(STATUS_OK, len(version), 0) + version)
+                    continue
+                if op != OP_ENCODE:
+                    # the frame length is unknown, so the stream can't be resynced: reply and hang up
+                    self._send_error(sock, f"unknown op {op}")
+                    return
+                # read the whole frame before decoding, so a bad item never leaves bytes unread
+                raw_texts = []
+                for _ in range(count):
+                    (n,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+                    raw_texts.append(_recv_exact(sock, n))
+            except (ConnectionError, OSError):
+                return
+            try:
+                texts = [raw.decode("utf-8") for raw in raw_texts]
+                vectors = self.server.encode(texts, bool(flags & FLAG_NORMALIZE))
+                sock.sendall(_RESP_HEADER.pack(STATUS_OK, vectors.shape[0], vectors.shape[1]))
+                sock.sendall(vectors.astype("<f4", copy=False).tobytes())
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                logger.exception("Inference request failed")
+                self._send_error(sock, str(e))
+
+    @staticmethod
+    def _send_error(sock: socket.socket, message: str) -> None:
+        msg = message.encode("utf-8")
+        try:
+            sock.sendall(_RESP_HEADER.pack(STATUS_ERROR, len(msg), 0) + msg)
+        except OSError:
+            pass
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, backend: str):
+        from app.services.embedders import get_embedder
+        from app.services.embedding_batcher import BatchingEncoder
+        self.model = get_embedder(backend)
+        # requests from all workers are coalesced into shared forward passes
+        self.batcher = BatchingEncoder(self.model, settings.EMBED_BATCH_MAX_SIZE, settings.EMBED_BATCH_MAX_WAIT_MS)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _EmbedHandler)
+        os.chmod(socket_path, 0o660)
+
+    def encode(self, texts: List[str], normalize: bool) -> np.ndarray:
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+        return np.asarray(self.batcher.encode(texts, normalize_embeddings=normalize), dtype=np.float32)
+
+
+def serve(socket_path: str, backend: str) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = InferenceServer(socket_path, backend)
+    logger.info(f"Inference sidecar serving {server.model.version} on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared embedding model server for API workers")
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET or "/tmp/ubti-embed.sock")
+    parser.add_argument("--backend", default=settings.EMBEDDING_BACKEND)
+    args = parser.parse_args()
+    serve(args.socket, args.backend)
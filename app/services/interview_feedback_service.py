@@ -0,0 +1,264 @@
+# app/services/interview_feedback_service.py
+"""
+Interview feedback and its per-round aggregates.
+
+interview_round_aggregates holds one row per (application_id, round_number) with
+the feedback count, sum / count / min / max of each score column of
+interview_performance, and one counter per recommendation. Every feedback insert
+folds itself into its row inside the same transaction (as funnel_service does for
+status counts), so readers get the means and spreads from one index seek by
+job_id instead of joining interview_performance -> interview_rounds_attended ->
+interview_schedule -> applications.
+
+Each interviewer gives one feedback per schedule; a repeat submission replaces
+it, and since a min / max cannot be un-merged the round's row is then rebuilt
+from interview_performance. A round counts the feedback of its schedules that are
+not cancelled: cancelled schedules take no feedback, and cancelling one rebuilds
+its round, so a rescheduled round only reflects the interview that went ahead.
+Writers take the aggregate row's lock before touching interview_performance.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS = (
+    "technical_score", "communication_score", "problem_solving_score",
+    "domain_knowledge_score", "team_fit_score", "attitude_score", "final_rating",
+)
+RECOMMENDATIONS = ("strong_yes", "yes", "maybe", "no")
+
+
+def _merge_sql() -> str:
+    source = ", ".join(f"CAST(:{c} AS DECIMAL(5,2)) AS {c}" for c in SCORE_COLUMNS)
+    update = ",\n            ".join(
+        f"{c}_sum = t.{c}_sum + ISNULL(s.{c}, 0), "
+        f"{c}_count = t.{c}_count + CASE WHEN s.{c} IS NULL THEN 0 ELSE 1 END, "
+        f"{c}_min = CASE WHEN s.{c} < t.{c}_min OR t.{c}_min IS NULL THEN s.{c} ELSE t.{c}_min END, "
+        f"{c}_max = CASE WHEN s.{c} > t.{c}_max OR t.{c}_max IS NULL THEN s.{c} ELSE t.{c}_max END"
+        for c in SCORE_COLUMNS
+    )
+    recommendation_update = ", ".join(
+        f"{r}_count = t.{r}_count + CASE WHEN s.recommendation = '{r}' THEN 1 ELSE 0 END" for r in RECOMMENDATIONS
+    )
+    insert_columns = ", ".join(f"{c}_sum, {c}_count, {c}_min, {c}_max" for c in SCORE_COLUMNS)
+    insert_values = ", ".join(
+        f"ISNULL(s.{c}, 0), CASE WHEN s.{c} IS NULL THEN 0 ELSE 1 END, s.{c}, s.{c}" for c in SCORE_COLUMNS
+    )
+    recommendation_columns = ", ".join(f"{r}_count" for r in RECOMMENDATIONS)
+    recommendation_values = ", ".join(
+        f"CASE WHEN s.recommendation = '{r}' THEN 1 ELSE 0 END" for r in RECOMMENDATIONS
+    )
+    return f"""
+        MERGE interview_round_aggregates WITH (HOLDLOCK) AS t
+        USING (SELECT :application_id AS application_id, :round_number AS round_number, :job_id AS job_id,
+                      :recommendation AS recommendation, {source}) AS s
+        ON t.application_id = s.application_id AND t.round_number = s.round_number
+        WHEN MATCHED THEN UPDATE SET
+            feedback_count = t.feedback_count + 1,
+            {update},
+            {recommendation_update},
+            updated_at = GETDATE()
+        WHEN NOT MATCHED THEN INSERT (
+            application_id, round_number, job_id, feedback_count,
+            {insert_columns},
+            {recommendation_columns}, updated_at
+        ) VALUES (
+            s.application_id, s.round_number, s.job_id, 1,
+            {insert_values},
+            {recommendation_values}, GETDATE()
+        );
+    """
+
+
+_MERGE_AGGREGATE = _merge_sql()
+
+
+def _rebuild_sql() -> str:
+    insert_columns = ", ".join(f"{c}_sum, {c}_count, {c}_min, {c}_max" for c in SCORE_COLUMNS)
+    aggregates = ",\n               ".join(
+        f"ISNULL(SUM(p.{c}), 0), COUNT(p.{c}), MIN(p.{c}), MAX(p.{c})" for c in SCORE_COLUMNS
+    )
+    recommendation_columns = ", ".join(f"{r}_count" for r in RECOMMENDATIONS)
+    recommendation_counts = ", ".join(
+        f"SUM(CASE WHEN p.recommendation = '{r}' THEN 1 ELSE 0 END)" for r in RECOMMENDATIONS
+    )
+    return f"""
+        INSERT INTO interview_round_aggregates (
+            application_id, round_number, job_id, feedback_count,
+            {insert_columns},
+            {recommendation_columns}, updated_at
+        )
+        SELECT :application_id, :round_number, MAX(app.job_id), COUNT(*),
+               {aggregates},
+               {recommendation_counts}, GETDATE()
+        FROM interview_performance p
+        JOIN interview_rounds_attended r ON r.round_attended_id = p.round_attended_id
+        JOIN interview_schedule s ON s.schedule_id = r.schedule_id
+        JOIN applications app ON app.application_id = s.application_id
+        WHERE s.application_id = :application_id AND ISNULL(s.round_number, 1) = :round_number
+          AND ISNULL(s.schedule_status, '') <> 'cancelled'
+        HAVING COUNT(*) > 0
+    """
+
+
+_REBUILD_AGGREGATE = _rebuild_sql()
+
+
+def _lock_round(db: Session, application_id: int, round_number: int) -> None:
+    db.execute(text("""
+        SELECT 1 FROM interview_round_aggregates WITH (UPDLOCK, HOLDLOCK)
+        WHERE application_id = :application_id AND round_number = :round_number
+    """), {"application_id": application_id, "round_number": round_number})
+
+
+def rebuild_round_aggregate(db: Session, application_id: int, round_number: int) -> None:
+    """Recompute one application/round row from interview_performance, inside the caller's transaction."""
+    params = {"application_id": application_id, "round_number": round_number}
+    db.execute(text("""
+        DELETE FROM interview_round_aggregates WITH (HOLDLOCK)
+        WHERE application_id = :application_id AND round_number = :round_number
+    """), params)
+    db.execute(text(_REBUILD_AGGREGATE), params)
+
+
+def record_feedback(db: Session, schedule_id: int, feedback: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Store one interviewer's feedback for a scheduled interview: the round's
+    interview_rounds_attended row (created on the first feedback), the
+    interview_performance row (replacing the interviewer's earlier one), and the
+    application/round aggregate.
+    """
+    now = datetime.now()
+    try:
+        with db.begin():
+            schedule = db.execute(text("""
+                SELECT s.application_id, ISNULL(s.round_number, 1) AS round_number, app.job_id, s.schedule_status
+                FROM interview_schedule s
+                JOIN applications app ON app.application_id = s.application_id
+                WHERE s.schedule_id = :schedule_id
+            """), {"schedule_id": schedule_id}).mappings().fetchone()
+            if not schedule:
+                raise HTTPException(status_code=404, detail="Interview schedule not found")
+            if schedule["schedule_status"] == "cancelled":
+                raise HTTPException(status_code=409, detail="Interview was cancelled; feedback not accepted")
+            _lock_round(db, schedule["application_id"], schedule["round_number"])
+
+            round_attended_id = db.execute(text("""
+                SELECT TOP 1 round_attended_id FROM interview_rounds_attended WITH (UPDLOCK, HOLDLOCK)
+                WHERE schedule_id = :schedule_id ORDER BY round_attended_id
+            """), {"schedule_id": schedule_id}).scalar()
+            if round_attended_id is None:
+                round_attended_id = db.execute(text("""
+                    INSERT INTO interview_rounds_attended (schedule_id, attended, attendance_status, result, recorded_by, updated_at)
+                    OUTPUT INSERTED.round_attended_id
+                    VALUES (:schedule_id, 1, 'attended', 'pending', :recorded_by, :now)
+                """), {"schedule_id": schedule_id, "recorded_by": feedback.get("interviewer_id"), "now": now}).scalar()
+
+            scores = {c: feedback.get(c) for c in SCORE_COLUMNS}
+            params = {
+                **scores,
+                "round_attended_id": round_attended_id,
+                "interviewer_id": feedback.get("interviewer_id"),
+                "strengths": feedback.get("strengths"),
+                "weaknesses": feedback.get("weaknesses"),
+                "recommendation": feedback.get("recommendation"),
+                "feedback": feedback.get("feedback"),
+                "now": now,
+            }
+            performance_id = db.execute(text("""
+                SELECT performance_id FROM interview_performance WITH (UPDLOCK, HOLDLOCK)
+                WHERE round_attended_id = :round_attended_id AND interviewer_id = :interviewer_id
+            """), params).scalar()
+            replaced = performance_id is not None
+            if replaced:
+                db.execute(text("""
+                    UPDATE interview_performance SET
+                        technical_score = :technical_score, communication_score = :communication_score,
+                        problem_solving_score = :problem_solving_score, domain_knowledge_score = :domain_knowledge_score,
+                        team_fit_score = :team_fit_score, attitude_score = :attitude_score, final_rating = :final_rating,
+                        strengths = :strengths, weaknesses = :weaknesses, recommendation = :recommendation,
+                        feedback = :feedback, created_at = :now
+                    WHERE performance_id = :performance_id
+                """), {**params, "performance_id": performance_id})
+                rebuild_round_aggregate(db, schedule["application_id"], schedule["round_number"])
+            else:
+                performance_id = db.execute(text("""
+                    INSERT INTO interview_performance (
+                        round_attended_id, interviewer_id, technical_score, communication_score,
+                        problem_solving_score, domain_knowledge_score, team_fit_score, attitude_score,
+                        final_rating, strengths, weaknesses, recommendation, feedback, created_at
+                    )
+                    OUTPUT INSERTED.performance_id
+                    VALUES (
+                        :round_attended_id, :interviewer_id, :technical_score, :communication_score,
+                        :problem_solving_score, :domain_knowledge_score, :team_fit_score, :attitude_score,
+                        :final_rating, :strengths, :weaknesses, :recommendation, :feedback, :now
+                    )
+                """), params).scalar()
+                db.execute(text(_MERGE_AGGREGATE), {
+                    **scores,
+                    "application_id": schedule["application_id"],
+                    "round_number": schedule["round_number"],
+                    "job_id": schedule["job_id"],
+                    "recommendation": feedback.get("recommendation"),
+                })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Failed to record feedback for schedule {schedule_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to record interview feedback.")
+
+    return {
+        "performance_id": int(performance_id),
+        "round_attended_id": int(round_attended_id),
+        "application_id": schedule["application_id"],
+        "round_number": schedule["round_number"],
+        "replaced": replaced,
+    }
+
+
+def _round_summary(row) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {"round_number": row["round_number"], "feedback_count": int(row["feedback_count"])}
+    for c in SCORE_COLUMNS:
+        count = int(row[f"{c}_count"] or 0)
+        summary[c] = {
+            "mean": round(float(row[f"{c}_sum"]) / count, 2) if count else None,
+            "min": float(row[f"{c}_min"]) if row[f"{c}_min"] is not None else None,
+            "max": float(row[f"{c}_max"]) if row[f"{c}_max"] is not None else None,
+            "count": count,
+        }
+    summary["recommendations"] = {r: int(row[f"{r}_count"] or 0) for r in RECOMMENDATIONS}
+    return summary
+
+
+def _fetch_rounds(db: Session, where: str, params: Dict[str, Any]) -> Dict[int, List[Dict[str, Any]]]:
+    rows = db.execute(text(f"""
+        SELECT * FROM interview_round_aggregates WHERE {where} ORDER BY application_id, round_number
+    """), params).mappings().fetchall()
+    by_application: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_application.setdefault(int(row["application_id"]), []).append(_round_summary(row))
+    return by_application
+
+
+def get_job_interview_rounds(db: Session, job_id: int) -> Dict[int, List[Dict[str, Any]]]:
+    """application_id -> per-round summaries, for every application of the job that has feedback."""
+    return _fetch_rounds(db, "job_id = :job_id", {"job_id": job_id})
+
+
+def get_application_interview_rounds(db: Session, application_id: int) -> List[Dict[str, Any]]:
+    return _fetch_rounds(db, "application_id = :application_id", {"application_id": application_id}).get(application_id, [])
+
+
+def annotate(rows: List[dict], rounds: Dict[int, List[Dict[str, Any]]]) -> None:
+    """Attach `interview_rounds` and the latest round's mean final_rating to each application row."""
+    for row in rows:
+        summaries = rounds.get(row.get("application_id"), [])
+        row["interview_rounds"] = summaries
+        row["latest_interview_rating"] = summaries[-1]["final_rating"]["mean"] if summaries else None
@@ -0,0 +1,339 @@
+# app/services/interview_scheduler.py
+"""
+Interview scheduling on top of interview_schedule.
+
+Each worker keeps an interval index per interviewer: the raw bookings plus their
+union as sorted, disjoint (start, end) blocks. Overlap tests and "when is this
+interviewer next free after t" are a bisect on the block starts, O(log n), and the
+next common slot for a panel alternates those jumps across interviewers until
+everyone is free for the whole duration (inside working hours).
+
+The index is loaded once (upcoming active bookings) and kept in sync incrementally
+by updated_at. Writes take an sp_getapplock per interviewer for the transaction,
+re-sync, re-check and only then insert, so two workers cannot double-book.
+"""
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services import funnel_service, interview_feedback_service
+from app.services.sync_window import SyncWindow, newest
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("scheduled", "rescheduled")
+# applications in these statuses move to interview_scheduled when an interview is booked
+_PRE_INTERVIEW_STATUSES = (None, "pending", "applied", "shortlisted", "under_review")
+
+
+def parse_interviewer_ids(value: Optional[str]) -> List[int]:
+    return sorted({int(v) for v in (value or "").replace(";", ",").split(",") if v.strip().isdigit()})
+
+
+class _Calendar:
+    """One interviewer's bookings; `starts`/`ends` are the merged busy blocks."""
+
+    def __init__(self):
+        self.bookings: Dict[int, Tuple[datetime, datetime]] = {}
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+    def add(self, schedule_id: int, start: datetime, end: datetime) -> None:
+        if schedule_id in self.bookings:
+            self.remove(schedule_id)
+        self.bookings[schedule_id] = (start, end)
+        # fold every block touching [start, end] into one
+        lo = bisect.bisect_left(self.ends, start)
+        hi = bisect.bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+
+    def remove(self, schedule_id: int) -> None:
+        if self.bookings.pop(schedule_id, None) is None:
+            return
+        self.starts, self.ends = [], []
+        for start, end in sorted(self.bookings.values()):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def blocking_end(self, start: datetime, end: datetime) -> Optional[datetime]:
+        """End of the busy block overlapping [start, end), or None if free."""
+        i = bisect.bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return self.ends[i]
+        if i + 1 < len(self.starts) and self.starts[i + 1] < end:
+            return self.ends[i + 1]
+        return None
+
+    def overlapping(self, start: datetime, end: datetime) -> List[int]:
+        return sorted(sid for sid, (s, e) in self.bookings.items() if s < end and e > start)
+
+
+def _align(t: datetime, duration: timedelta) -> datetime:
+    """Earliest slot boundary >= t that fits in working hours on a working day."""
+    slot = settings.INTERVIEW_SLOT_MINUTES
+    past = t.minute % slot
+    if past or t.second or t.microsecond:
+        t = t.replace(second=0, microsecond=0) + timedelta(minutes=slot - past)
+    while True:
+        day_start = t.replace(hour=settings.INTERVIEW_WORKDAY_START_HOUR, minute=0)
+        day_end = t.replace(hour=settings.INTERVIEW_WORKDAY_END_HOUR, minute=0)
+        if settings.INTERVIEW_SKIP_WEEKENDS and t.weekday() >= 5:
+            t = (t + timedelta(days=1)).replace(hour=settings.INTERVIEW_WORKDAY_START_HOUR, minute=0)
+            continue
+        if t < day_start:
+            t = day_start
+        if t + duration > day_end:
+            t = (t + timedelta(days=1)).replace(hour=settings.INTERVIEW_WORKDAY_START_HOUR, minute=0)
+            continue
+        return t
+
+
+class InterviewIndex:
+    def __init__(self):
+        self._calendars: Dict[int, _Calendar] = {}
+        self._schedules: Dict[int, List[int]] = {}  # schedule_id -> interviewer ids
+        self._window = SyncWindow()
+        self._lock = threading.RLock()
+
+    def apply(self, schedule_id: int, interviewer_ids: Iterable[int], start: Optional[datetime],
+              duration_minutes: Optional[int], active: bool) -> None:
+        with self._lock:
+            for interviewer_id in self._schedules.pop(schedule_id, []):
+                self._calendars[interviewer_id].remove(schedule_id)
+            if not active or start is None:
+                return
+            end = start + timedelta(minutes=duration_minutes or settings.INTERVIEW_DEFAULT_DURATION_MINUTES)
+            ids = list(interviewer_ids)
+            for interviewer_id in ids:
+                self._calendars.setdefault(interviewer_id, _Calendar()).add(schedule_id, start, end)
+            self._schedules[schedule_id] = ids
+
+    def sync(self, db: Session) -> int:
+        """First call: upcoming active bookings. Then: every row changed since the last sync."""
+        since = self._window.since()
+        if since is None:
+            self._window.start(db, "interview_schedule")
+            rows = db.execute(text("""
+                SELECT schedule_id, interviewer_ids, scheduled_date, duration_minutes, schedule_status, updated_at
+                FROM interview_schedule
+                WHERE schedule_status IN ('scheduled', 'rescheduled') AND scheduled_date >= :from_date
+            """), {"from_date": datetime.now() - timedelta(days=1)}).mappings().fetchall()
+        else:
+            rows = db.execute(text("""
+                SELECT schedule_id, interviewer_ids, scheduled_date, duration_minutes, schedule_status, updated_at
+                FROM interview_schedule
+                WHERE updated_at >= :since
+            """), {"since": since}).mappings().fetchall()
+        for row in rows:
+            self.apply(int(row["schedule_id"]), parse_interviewer_ids(row["interviewer_ids"]),
+                       row["scheduled_date"], row["duration_minutes"], row["schedule_status"] in ACTIVE_STATUSES)
+        self._window.advance(newest(r["updated_at"] for r in rows))
+        return len(rows)
+
+    def conflicts(self, interviewer_ids: Iterable[int], start: datetime, duration_minutes: int) -> Dict[int, List[int]]:
+        end = start + timedelta(minutes=duration_minutes)
+        found = {}
+        with self._lock:
+            for interviewer_id in interviewer_ids:
+                calendar = self._calendars.get(interviewer_id)
+                if calendar and calendar.blocking_end(start, end) is not None:
+                    found[interviewer_id] = calendar.overlapping(start, end)
+        return found
+
+    def next_common_slot(self, interviewer_ids: List[int], not_before: datetime, duration_minutes: int) -> datetime:
+        duration = timedelta(minutes=duration_minutes)
+        horizon = not_before + timedelta(days=settings.INTERVIEW_SEARCH_DAYS)
+        t = _align(not_before, duration)
+        with self._lock:
+            calendars = [self._calendars[i] for i in interviewer_ids if i in self._calendars]
+            while t <= horizon:
+                moved = False
+                for calendar in calendars:
+                    busy_until = calendar.blocking_end(t, t + duration)
+                    if busy_until is not None:
+                        t = _align(busy_until, duration)
+                        moved = True
+                if not moved:
+                    return t
+        raise HTTPException(
+            status_code=409,
+            detail=f"No common free slot for interviewers {interviewer_ids} in the next {settings.INTERVIEW_SEARCH_DAYS} days"
+        )
+
+    def bookings(self, interviewer_id: int, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        with self._lock:
+            calendar = self._calendars.get(interviewer_id)
+            if not calendar:
+                return []
+            return [{"schedule_id": sid, "start": s, "end": e}
+                    for sid, (s, e) in sorted(calendar.bookings.items(), key=lambda b: b[1])
+                    if s < end and e > start]
+
+
+index = InterviewIndex()
+
+
+# ==============================
+#            WRITES
+# ==============================
+
+def _lock_interviewers(db: Session, interviewer_ids: Iterable[int]) -> None:
+    """Transaction-scoped exclusive app locks, taken in id order so concurrent panels can't deadlock."""
+    for interviewer_id in sorted(set(interviewer_ids)):
+        result = db.execute(text("""
+            DECLARE @rc INT;
+            EXEC @rc = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive',
+                                     @LockOwner = 'Transaction', @LockTimeout = 10000;
+            SELECT @rc;
+        """), {"resource": f"interviewer:{interviewer_id}"}).scalar()
+        if result is None or result < 0:
+            raise HTTPException(status_code=503, detail=f"Interviewer {interviewer_id} calendar is busy, retry")
+
+
+def _insert_schedule(db: Session, item: Dict[str, Any], start: datetime, now: datetime) -> int:
+    schedule_id = db.execute(text("""
+        INSERT INTO interview_schedule (
+            application_id, round_number, round_type, scheduled_date, duration_minutes,
+            interviewer_ids, manager_id, meeting_link, location, schedule_status, remarks,
+            created_by, created_at, updated_at
+        )
+        OUTPUT INSERTED.schedule_id
+        VALUES (
+            :application_id, :round_number, :round_type, :scheduled_date, :duration_minutes,
+            :interviewer_ids, :manager_id, :meeting_link, :location, 'scheduled', :remarks,
+            :created_by, :now, :now
+        )
+    """), {
+        "application_id": item["application_id"],
+        "round_number": item.get("round_number"),
+        "round_type": item.get("round_type"),
+        "scheduled_date": start,
+        "duration_minutes": item["duration_minutes"],
+        "interviewer_ids": ",".join(str(i) for i in item["interviewer_ids"]),
+        "manager_id": item.get("manager_id"),
+        "meeting_link": item.get("meeting_link"),
+        "location": item.get("location"),
+        "remarks": item.get("remarks"),
+        "created_by": item.get("created_by"),
+        "now": now,
+    }).scalar()
+
+    # move the application into the interview stage (and its funnel counter with it)
+    app = db.execute(text("""
+        SELECT job_id, application_status, source, assigned_hr
+        FROM applications WITH (UPDLOCK) WHERE application_id = :application_id
+    """), {"application_id": item["application_id"]}).mappings().fetchone()
+    if not app:
+        raise HTTPException(status_code=404, detail=f"Application {item['application_id']} not found")
+    if app["application_status"] in _PRE_INTERVIEW_STATUSES:
+        db.execute(text("""
+            UPDATE applications SET application_status = 'interview_scheduled', updated_at = :now
+            WHERE application_id = :application_id
+        """), {"now": now, "application_id": item["application_id"]})
+        funnel_service.move(db, app["job_id"], app["application_status"], "interview_scheduled",
+                            app["source"], app["assigned_hr"])
+    return int(schedule_id)
+
+
+def schedule_interviews(db: Session, items: List[Dict[str, Any]], fail_on_conflict: bool = False) -> List[Dict[str, Any]]:
+    """
+    Book interviews in one transaction. Items with `scheduled_date` are checked for
+    conflicts; items without one get the panel's next common free slot at or after
+    `not_before`. Later items see the bookings made by earlier ones.
+    Returns one result per item: booked (schedule_id, start, end) or the conflict.
+    """
+    now = datetime.now()
+    results: List[Dict[str, Any]] = []
+    pending: List[int] = []
+    try:
+        with db.begin():
+            _lock_interviewers(db, (i for item in items for i in item["interviewer_ids"]))
+            index.sync(db)
+            for item in items:
+                duration = item["duration_minutes"]
+                panel = item["interviewer_ids"]
+                start = item.get("scheduled_date")
+                if start is not None:
+                    conflicts = index.conflicts(panel, start, duration)
+                    if conflicts:
+                        result = {
+                            "application_id": item["application_id"],
+                            "status": "conflict",
+                            "conflicts": {str(k): v for k, v in conflicts.items()},
+                            "next_available": index.next_common_slot(panel, start, duration).isoformat(),
+                        }
+                        if fail_on_conflict:
+                            raise HTTPException(status_code=409, detail=result)
+                        results.append(result)
+                        continue
+                else:
+                    start = index.next_common_slot(panel, item.get("not_before") or now, duration)
+
+                schedule_id = _insert_schedule(db, item, start, now)
+                index.apply(schedule_id, panel, start, duration, active=True)
+                pending.append(schedule_id)
+                results.append({
+                    "application_id": item["application_id"],
+                    "status": "scheduled",
+                    "schedule_id": schedule_id,
+                    "scheduled_date": start,
+                    "end": start + timedelta(minutes=duration),
+                    "interviewer_ids": panel,
+                })
+    except Exception as e:
+        for schedule_id in pending:  # rolled back: forget the optimistic index entries
+            index.apply(schedule_id, (), None, None, active=False)
+        if isinstance(e, HTTPException):
+            raise
+        logger.exception(f"Interview scheduling failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to schedule interviews: {e}")
+    return results
+
+
+def cancel_interview(db: Session, schedule_id: int, remarks: Optional[str] = None) -> Dict[str, Any]:
+    try:
+        with db.begin():
+            row = db.execute(text("""
+                UPDATE interview_schedule
+                SET schedule_status = 'cancelled', remarks = COALESCE(:remarks, remarks), updated_at = :now
+                OUTPUT INSERTED.schedule_id, INSERTED.application_id, ISNULL(INSERTED.round_number, 1) AS round_number
+                WHERE schedule_id = :schedule_id AND schedule_status IN ('scheduled', 'rescheduled')
+            """), {"schedule_id": schedule_id, "remarks": remarks, "now": datetime.now()}).mappings().fetchone()
+            if not row:
+                raise HTTPException(status_code=404, detail="No active interview with this schedule_id")
+            # feedback already given for this schedule no longer counts towards its round
+            interview_feedback_service.rebuild_round_aggregate(db, row["application_id"], row["round_number"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Failed to cancel interview {schedule_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to cancel interview.")
+    index.apply(schedule_id, (), None, None, active=False)
+    return {"schedule_id": schedule_id, "application_id": row["application_id"], "schedule_status": "cancelled"}
+
+
+def find_common_slots(db: Session, interviewer_ids: List[int], duration_minutes: int,
+                      not_before: Optional[datetime], count: int) -> List[Dict[str, Any]]:
+    """The next `count` free slots for the whole panel (read-only; nothing is held)."""
+    index.sync(db)
+    slots, t = [], not_before or datetime.now()
+    for _ in range(count):
+        start = index.next_common_slot(interviewer_ids, t, duration_minutes)
+        end = start + timedelta(minutes=duration_minutes)
+        slots.append({"start": start, "end": end})
+        t = end
+    return slots
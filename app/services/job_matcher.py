@@ -0,0 +1,217 @@
+# app/services/job_matcher.py
+"""
+Reverse matching: which open jobs fit a given applicant.
+
+Each worker caches one embedding per open job (its preprocessed JD, embedded the
+same way the shortlister embeds JDs) stacked into a matrix, plus each job's
+keyword sets. Matching an applicant is one matrix-vector product with their
+stored resume vector (see semantic_search) plus a keyword score per job. An
+applicant stored without a vector of the current embedding version (e.g. before
+semantic search, or before a model change) is embedded from their resume file on
+first request and the vector stored.
+
+The cache follows get_active_jobs: create_job / status changes update it
+directly, and every match request diffs it against the open jobs so changes made
+by other workers are picked up. Only new or edited JDs are embedded.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services import semantic_search
+from app.services.job_service import get_active_jobs
+from app.services.score_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _job_hash(job: Dict[str, Any]) -> str:
+    return text_hash(
+        f"{job.get('jd') or ''}|{job.get('key_skills') or ''}|{job.get('additional_skills') or ''}"
+        f"|{job.get('semantic_weight')}|{job.get('high_priority_keyword_weight')}"
+    )
+
+
+class OpenJobMatrix:
+    def __init__(self):
+        self.version: Optional[str] = None
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._job_ids = np.zeros(0, dtype=np.int64)
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+
+    def _restack(self) -> None:
+        self._job_ids = np.array(sorted(self._jobs), dtype=np.int64)
+        self._matrix = np.stack([self._jobs[j]["vector"] for j in self._job_ids.tolist()]) if self._jobs else None
+
+    def _entry(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        from app.services.aishortlist import embed_text, normalize_keywords, preprocess_text, default_weights
+        weights = default_weights()
+        if job.get("semantic_weight") is not None:
+            weights["semantic"] = float(job["semantic_weight"])
+        if job.get("high_priority_keyword_weight") is not None:
+            weights["high_priority"] = float(job["high_priority_keyword_weight"])
+        return {
+            "hash": _job_hash(job),
+            "vector": embed_text(job.get("jd") or job.get("title") or ""),
+            "jd_tokens": set(preprocess_text(job.get("jd") or "").split()),
+            "high": normalize_keywords([job.get("key_skills")]),
+            "normal": normalize_keywords([job.get("additional_skills")]),
+            "weights": weights,
+            "meta": {k: job.get(k) for k in ("job_id", "title", "job_code", "department", "location",
+                                             "employment_type", "experience_required")},
+        }
+
+    def upsert(self, job: Dict[str, Any]) -> None:
+        """Embed and add an open job (or drop it if it is no longer open)."""
+        if (job.get("status") or "open") != "open":
+            self.remove(int(job["job_id"]))
+            return
+        if self.version is None:
+            return  # not built yet in this worker; the first refresh() embeds every open job
+        entry = self._entry(job)
+        with self._lock:
+            self._jobs[int(job["job_id"])] = entry
+            self._restack()
+
+    def remove(self, job_id: int) -> None:
+        with self._lock:
+            if self._jobs.pop(job_id, None) is not None:
+                self._restack()
+
+    def refresh(self, db: Session) -> None:
+        """Diff against get_active_jobs: embed new/edited JDs, drop jobs no longer open."""
+        from app.services.aishortlist import embedding_version
+
+        version = embedding_version()
+        open_jobs = {int(j["job_id"]): j for j in get_active_jobs(db)}
+        with self._lock:
+            if version != self.version:
+                self._jobs, self.version = {}, version
+            stale = [j for j, job in open_jobs.items()
+                     if j not in self._jobs or self._jobs[j]["hash"] != _job_hash(job)]
+            closed = [j for j in self._jobs if j not in open_jobs]
+        entries = {j: self._entry(open_jobs[j]) for j in stale}
+        if entries or closed:
+            with self._lock:
+                for j in closed:
+                    self._jobs.pop(j, None)
+                self._jobs.update(entries)
+                self._restack()
+            logger.info(f"Open-job matrix: {len(entries)} embedded, {len(closed)} dropped, {len(self._jobs)} open")
+
+    def match(self, resume_vector: np.ndarray, resume_tokens: set) -> List[Dict[str, Any]]:
+        from app.services.aishortlist import compute_weighted_keyword_score, combine_overall_score
+
+        with self._lock:
+            if self._matrix is None:
+                return []
+            similarities = self._matrix @ resume_vector.astype(np.float32)
+            job_ids = self._job_ids.tolist()
+            jobs = [self._jobs[j] for j in job_ids]
+
+        resume_clean = " ".join(resume_tokens)
+        matches = []
+        for job, similarity in zip(jobs, similarities.tolist()):
+            keyword_score = compute_weighted_keyword_score(
+                resume_clean, " ".join(job["jd_tokens"] | job["high"] | job["normal"]), job["high"], job["normal"],
+                job["weights"]
+            )
+            matches.append({
+                **job["meta"],
+                "semantic_similarity": round(similarity, 4),
+                "keyword_match_score": keyword_score,
+                "overall_score": combine_overall_score(round(similarity, 4), keyword_score, job["weights"]),
+            })
+        matches.sort(key=lambda m: m["overall_score"], reverse=True)
+        return matches
+
+
+matrix = OpenJobMatrix()
+
+
+def _resume_vector(db: Session, applicant: Dict[str, Any]) -> Optional[np.ndarray]:
+    from app.services.aishortlist import embedding_version
+
+    applicant_id = int(applicant["applicant_id"])
+    version = embedding_version()
+    semantic_search.index.sync(db, version)
+    vector = semantic_search.index.vector_of(applicant_id)
+    if vector is not None:
+        return vector
+    row = db.execute(text("""
+        SELECT vector FROM applicant_embeddings
+        WHERE applicant_id = :applicant_id AND embedding_version = :version
+    """), {"applicant_id": applicant_id, "version": version}).fetchone()
+    if row:
+        return semantic_search.vector_from_bytes(bytes(row[0]))
+    return _embed_stored_resume(db, applicant, version)
+
+
+def _embed_stored_resume(db: Session, applicant: Dict[str, Any], version: str) -> Optional[np.ndarray]:
+    """Embed the applicant's resume file and store the vector (None if there is no readable resume)."""
+    from app.services.aishortlist import embed_text, extract_text_from_pdf
+
+    path = applicant["resume_url"]
+    if not path or not os.path.exists(path):
+        return None
+    resume_text = extract_text_from_pdf(path)
+    if not resume_text.strip():
+        return None
+    vector = embed_text(resume_text)
+    semantic_search.store_embedding(db, int(applicant["applicant_id"]), vector, version)
+    db.commit()
+    semantic_search.index.offer(int(applicant["applicant_id"]), vector, version)
+    logger.info(f"Embedded stored resume of applicant {applicant['applicant_id']} for job matching")
+    return vector
+
+
+def recommend_jobs(db: Session, applicant_id: int, top_k: int = 10, exclude_applied: bool = False) -> Dict[str, Any]:
+    """
+    Open jobs ranked for one applicant by each job's own semantic/keyword blend, the
+    same one the shortlister applies to that job's applications. The keyword side uses the applicant's stored
+    skills and current role, since resume text is not kept in the database.
+    """
+    from app.services.aishortlist import preprocess_text
+
+    applicant = db.execute(text("""
+        SELECT applicant_id, first_name, last_name, skills, current_role, resume_url
+        FROM applicants WHERE applicant_id = :applicant_id
+    """), {"applicant_id": applicant_id}).mappings().fetchone()
+    if not applicant:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+
+    vector = _resume_vector(db, applicant)
+    if vector is None:
+        raise HTTPException(status_code=404, detail="No readable resume on file for this applicant")
+
+    matrix.refresh(db)
+    applied = {
+        row[0] for row in db.execute(
+            text("SELECT job_id FROM applications WHERE applicant_id = :applicant_id"),
+            {"applicant_id": applicant_id}
+        ).fetchall()
+    }
+
+    resume_tokens = set(preprocess_text(f"{applicant['skills'] or ''} {applicant['current_role'] or ''}").split())
+    matches = []
+    for m in matrix.match(vector, resume_tokens):
+        m["already_applied"] = m["job_id"] in applied
+        if exclude_applied and m["already_applied"]:
+            continue
+        matches.append(m)
+        if len(matches) >= top_k:
+            break
+
+    return {
+        "applicant_id": applicant_id,
+        "first_name": applicant["first_name"],
+        "last_name": applicant["last_name"],
+        "matches": matches,
+    }
@@ -1,8 +1,13 @@
 # app/services/job_service.py
+import re
+import time
+import logging
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.api.v1.hr.schemas import JobCreate, JobRequestCreate, JobRequestResponse, JobRequestUpdate
 from fastapi import HTTPException
+from app.config import settings
+from app.services import score_stats
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
@@ -16,7 +21,9 @@ def get_active_jobs(db: Session) -> List[Dict[str, Any]]:
             job_id, created_by, title, job_code, department, location,
             employment_type, experience_required, salary_range, jd,
             key_skills, additional_skills, openings, posted_date,
-            closing_date, status, approved_by, approved_date
+            closing_date, status, approved_by, approved_date,
+            prefilter_min_keyword_score, prefilter_experience_tolerance,
+            semantic_weight, high_priority_keyword_weight
         FROM jobs 
         WHERE status = 'open'
         ORDER BY posted_date DESC
@@ -38,18 +45,24 @@ def create_job(db: Session, job: JobCreate) -> Dict[str, Any]:
         INSERT INTO jobs (
             created_by, title, job_code, department, location, employment_type,
             experience_required, salary_range, jd, key_skills, additional_skills,
-            openings, posted_date, closing_date, status, approved_by, approved_date
-        ) VALUES (
+            openings, posted_date, closing_date, status, approved_by, approved_date,
+            prefilter_min_keyword_score, prefilter_experience_tolerance,
+            semantic_weight, high_priority_keyword_weight
+        )
+        OUTPUT INSERTED.job_id
+        VALUES (
             :created_by, :title, :job_code, :department, :location, :employment_type,
             :experience_required, :salary_range, :jd, :key_skills, :additional_skills,
-            :openings, :posted_date, :closing_date, :status, :approved_by, :approved_date
+            :openings, :posted_date, :closing_date, :status, :approved_by, :approved_date,
+            :prefilter_min_keyword_score, :prefilter_experience_tolerance,
+            :semantic_weight, :high_priority_keyword_weight
         )
     """)
 
     posted_date = job.posted_date or datetime.now()
 
     try:
-        db.execute(insert_query, {
+        job_id = db.execute(insert_query, {
             "created_by": job.created_by,
             "title": job.title,
             "job_code": job.job_code,
@@ -66,14 +79,54 @@ def create_job(db: Session, job: JobCreate) -> Dict[str, Any]:
             "closing_date": job.closing_date,
             "status": job.status,
             "approved_by": job.approved_by,
-            "approved_date": job.approved_date
-        })
+            "approved_date": job.approved_date,
+            "prefilter_min_keyword_score": job.prefilter_min_keyword_score,
+            "prefilter_experience_tolerance": job.prefilter_experience_tolerance,
+            "semantic_weight": job.semantic_weight,
+            "high_priority_keyword_weight": job.high_priority_keyword_weight
+        }).scalar()
         db.commit()
-        return {"message": "Job created successfully", "status": "success"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating job: {str(e)}")
 
+    _refresh_job_matrix(job_id, job.model_dump())
+    return {"message": "Job created successfully", "status": "success", "job_id": job_id}
+
+
+def update_job_status(db: Session, job_id: int, status: str) -> Dict[str, Any]:
+    """Open / hold / close a posting; closed and on-hold jobs leave the reverse-matching matrix."""
+    try:
+        row = db.execute(text("""
+            UPDATE jobs SET status = :status
+            OUTPUT INSERTED.job_id
+            WHERE job_id = :job_id
+        """), {"status": status, "job_id": job_id}).fetchone()
+        if not row:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Job not found")
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating job status: {str(e)}")
+
+    if status == "open":
+        _refresh_job_matrix(job_id, get_job_by_id(db, job_id))
+    else:
+        _refresh_job_matrix(job_id, {"job_id": job_id, "status": status})
+    return get_job_by_id(db, job_id)
+
+
+def _refresh_job_matrix(job_id: int, job: Dict[str, Any]) -> None:
+    """Keep this worker's open-job embedding matrix current; other workers catch up on their next match."""
+    from app.services.job_matcher import matrix  # lazy: pulls in the embedding model
+    try:
+        matrix.upsert({**job, "job_id": job_id})
+    except Exception as e:
+        logging.warning(f"Open-job matrix not updated for job {job_id}: {e}")
+
 
 def get_job_by_id(db: Session, job_id: int) -> Dict[str, Any]:
     query = text("""
@@ -81,7 +134,9 @@ def get_job_by_id(db: Session, job_id: int) -> Dict[str, Any]:
             job_id, created_by, title, job_code, department, location,
             employment_type, experience_required, salary_range, jd,
             key_skills, additional_skills, openings, posted_date,
-            closing_date, status, approved_by, approved_date
+            closing_date, status, approved_by, approved_date,
+            prefilter_min_keyword_score, prefilter_experience_tolerance,
+            semantic_weight, high_priority_keyword_weight
         FROM jobs 
         WHERE job_id = :job_id
     """)
@@ -91,6 +146,115 @@ def get_job_by_id(db: Session, job_id: int) -> Dict[str, Any]:
     return dict(result)
 
 
+def parse_experience_range(experience_required: Optional[str]):
+    """
+    Turn the free-text jobs.experience_required ("3-5 years", "8+ yrs", "5")
+    into (min_years, max_years); either side may be None.
+    """
+    if not experience_required:
+        return None, None
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", experience_required)]
+    if not numbers:
+        return None, None
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    return numbers[0], None
+
+
+def get_prefilter_config(db: Session, job_id: int) -> Dict[str, Any]:
+    """
+    Per-job thresholds for the scoring cascade in aishortlist.prefilter_reason.
+    NULL columns fall back to the PREFILTER_* settings.
+    """
+    row = db.execute(text("""
+        SELECT experience_required, prefilter_min_keyword_score, prefilter_experience_tolerance
+        FROM jobs WHERE job_id = :job_id
+    """), {"job_id": job_id}).mappings().fetchone()
+    if not row:
+        return {}
+    min_exp, max_exp = parse_experience_range(row["experience_required"])
+    min_keyword = row["prefilter_min_keyword_score"]
+    tolerance = row["prefilter_experience_tolerance"]
+    return {
+        "min_experience": min_exp,
+        "max_experience": max_exp,
+        "min_keyword_score": float(min_keyword) if min_keyword is not None else settings.PREFILTER_MIN_KEYWORD_SCORE,
+        "experience_tolerance": float(tolerance) if tolerance is not None else settings.PREFILTER_EXPERIENCE_TOLERANCE_YEARS,
+    }
+
+
+def get_scoring_weights(db: Session, job_id: int) -> Dict[str, float]:
+    """
+    Per-job score blend for aishortlist.score_resume:
+      overall = semantic * semantic_similarity + (1 - semantic) * keyword
+      keyword = high_priority * high_match + (1 - high_priority) * normal_match
+    NULL columns fall back to the SCORE_* settings.
+    """
+    row = db.execute(text("""
+        SELECT semantic_weight, high_priority_keyword_weight FROM jobs WHERE job_id = :job_id
+    """), {"job_id": job_id}).mappings().fetchone()
+    semantic = row["semantic_weight"] if row else None
+    high = row["high_priority_keyword_weight"] if row else None
+    return {
+        "semantic": float(semantic) if semantic is not None else settings.SCORE_SEMANTIC_WEIGHT,
+        "high_priority": float(high) if high is not None else settings.SCORE_HIGH_PRIORITY_KEYWORD_WEIGHT,
+    }
+
+
+def update_scoring_weights(db: Session, job_id: int, semantic_weight: float,
+                           high_priority_keyword_weight: float) -> Dict[str, Any]:
+    """
+    Store new weights for a job and re-rank all of its applications in one set-based
+    UPDATE over the stored component scores (no PDFs, no model). Applications scored
+    before the keyword components were stored keep their skills_matching_score and
+    only get the new semantic/keyword blend.
+    """
+    started = time.perf_counter()
+    params = {"job_id": job_id, "sw": semantic_weight, "hw": high_priority_keyword_weight, "now": datetime.now()}
+    try:
+        job = db.execute(text("""
+            UPDATE jobs SET semantic_weight = :sw, high_priority_keyword_weight = :hw
+            OUTPUT INSERTED.job_id
+            WHERE job_id = :job_id
+        """), params).fetchone()
+        if not job:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        updated = db.execute(text("""
+            UPDATE app SET
+                skills_matching_score = k.keyword_score,
+                resume_overall_score = ROUND(CASE
+                    WHEN app.jd_matching_score IS NULL THEN (1 - :sw) * k.keyword_score
+                    ELSE :sw * app.jd_matching_score + (1 - :sw) * k.keyword_score
+                END, 4),
+                updated_at = :now
+            FROM applications app
+            CROSS APPLY (SELECT CASE
+                WHEN app.high_keyword_match IS NULL THEN app.skills_matching_score
+                ELSE ROUND(:hw * app.high_keyword_match + (1 - :hw) * app.normal_keyword_match, 4)
+            END AS keyword_score) k
+            WHERE app.job_id = :job_id
+        """), params).rowcount
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error updating scoring weights: {str(e)}")
+
+    score_stats.stats.invalidate(job_id)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logging.info(f"Re-ranked {updated} applications of job {job_id} in {elapsed_ms} ms")
+    return {
+        "job_id": job_id,
+        "semantic_weight": semantic_weight,
+        "high_priority_keyword_weight": high_priority_keyword_weight,
+        "applications_rescored": updated,
+        "elapsed_ms": elapsed_ms,
+    }
+
+
 # ==============================
 #       JOB REQUEST LOGIC
 # ==============================
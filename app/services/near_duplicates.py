@@ -0,0 +1,190 @@
+# app/services/near_duplicates.py
+"""
+Near-duplicate resume detection with MinHash + LSH.
+
+Each ingested resume gets a MinHash signature of its word 5-gram shingles,
+stored in applicants.minhash_signature. An in-process LSH index (bands of
+signature rows -> applicant ids) is built from the table at startup and kept
+current incrementally by applicants.updated_at, so "is this a lightly edited copy of someone we
+already have?" is a handful of dict lookups per upload.
+"""
+import re
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple, Iterable
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.sync_window import SyncWindow, newest
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# fixed seed: signatures must be comparable across processes and restarts
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=settings.MINHASH_NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=settings.MINHASH_NUM_PERM).astype(np.uint64)
+
+
+def _shingles(text_value: str, k: int) -> Set[str]:
+    tokens = _TOKEN.findall((text_value or "").lower())
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def compute_signature(text_value: str) -> Optional[np.ndarray]:
+    """MinHash signature (uint32[MINHASH_NUM_PERM]) of the resume's shingles; None for empty text."""
+    shingles = _shingles(text_value, settings.MINHASH_SHINGLE_SIZE)
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # (a * x + b) mod p, truncated to 32 bits, for every permutation at once
+    permuted = ((np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def signature_to_bytes(signature: Optional[np.ndarray]) -> Optional[bytes]:
+    return signature.astype("<u4").tobytes() if signature is not None else None
+
+
+def signature_from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<u4").astype(np.uint32)
+
+
+class LSHIndex:
+    def __init__(self, num_perm: int, bands: int, threshold: float):
+        if num_perm % bands:
+            raise ValueError("MINHASH_NUM_PERM must be divisible by MINHASH_LSH_BANDS")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._buckets: List[Dict[bytes, Set[int]]] = [dict() for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._window = SyncWindow()
+        self._lock = threading.RLock()
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, applicant_id: int, signature: np.ndarray) -> None:
+        with self._lock:
+            if applicant_id in self._signatures:
+                self.remove(applicant_id)
+            self._signatures[applicant_id] = signature
+            for band, key in self._band_keys(signature):
+                self._buckets[band].setdefault(key, set()).add(applicant_id)
+
+    def remove(self, applicant_id: int) -> None:
+        with self._lock:
+            signature = self._signatures.pop(applicant_id, None)
+            if signature is None:
+                return
+            for band, key in self._band_keys(signature):
+                bucket = self._buckets[band].get(key)
+                if bucket:
+                    bucket.discard(applicant_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+
+    def query(self, signature: np.ndarray, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Applicants whose estimated Jaccard similarity is >= threshold, best first."""
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude)
+            matches = []
+            for applicant_id in candidates:
+                similarity = float(np.mean(self._signatures[applicant_id] == signature))
+                if similarity >= self.threshold:
+                    matches.append((applicant_id, round(similarity, 4)))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def signature_of(self, applicant_id: int) -> Optional[np.ndarray]:
+        return self._signatures.get(applicant_id)
+
+    def sync(self, db: Session) -> int:
+        """
+        Pull signatures written since the last sync by any worker: new applicants and
+        existing ones whose resume (and so signature) was replaced. By updated_at, with
+        an overlap window; at startup this loads the whole table.
+        """
+        since = self._window.since()
+        if since is None:
+            self._window.start(db, "applicants")
+            rows = db.execute(text("""
+                SELECT applicant_id, minhash_signature, updated_at FROM applicants
+                WHERE minhash_signature IS NOT NULL
+            """)).fetchall()
+        else:
+            rows = db.execute(text("""
+                SELECT applicant_id, minhash_signature, updated_at FROM applicants
+                WHERE updated_at >= :since AND minhash_signature IS NOT NULL
+            """), {"since": since}).fetchall()
+        for applicant_id, raw, _ in rows:
+            self.add(int(applicant_id), signature_from_bytes(bytes(raw)))
+        self._window.advance(newest(r[2] for r in rows))
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+index = LSHIndex(settings.MINHASH_NUM_PERM, settings.MINHASH_LSH_BANDS, settings.NEAR_DUPLICATE_THRESHOLD)
+
+
+def collapse_near_duplicates(rows: List[dict], score_key: str = "resume_overall_score") -> List[dict]:
+    """
+    Collapse rows whose applicants are near-duplicates of each other: keep the
+    best-scored row of each group and list the others in `near_duplicate_ids`.
+    """
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    ids = {row.get("applicant_id") for row in rows if row.get("applicant_id") is not None}
+    for applicant_id in ids:
+        signature = index.signature_of(applicant_id)
+        if signature is None:
+            continue
+        for other_id, _ in index.query(signature, exclude=applicant_id):
+            if other_id in ids:
+                parent[find(applicant_id)] = find(other_id)
+
+    groups: Dict[int, List[dict]] = {}
+    for row in rows:
+        if row.get("applicant_id") is not None:
+            groups.setdefault(find(row["applicant_id"]), []).append(row)
+
+    # emit each group once, at the position of its first row, so the caller's ordering holds
+    collapsed, emitted = [], set()
+    for row in rows:
+        applicant_id = row.get("applicant_id")
+        if applicant_id is None:
+            collapsed.append(row)
+            continue
+        root = find(applicant_id)
+        if root in emitted:
+            continue
+        emitted.add(root)
+        group = sorted(groups[root], key=lambda r: float(r.get(score_key) or 0), reverse=True)
+        best = dict(group[0])
+        best["near_duplicate_ids"] = sorted({r["applicant_id"] for r in group[1:]} - {best["applicant_id"]})
+        collapsed.append(best)
+    return collapsed
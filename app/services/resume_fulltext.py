@@ -0,0 +1,522 @@
+# app/services/resume_fulltext.py
+"""
+BM25 full-text search over extracted resume text.
+
+Layout (FULLTEXT_INDEX_DIR), one directory per immutable segment:
+
+  seg_<seq>_<id>/
+    meta.json          {"seq": ..., "replaces": [segment names merged into this one]}
+    docs.npy           int64[ndocs]    applicant_id of each local doc ordinal
+    lengths.npy        float32[ndocs]  token count per doc
+    terms.txt          one term per line, sorted
+    offsets.npy        int64[nterms+1] start of each term's postings
+    postings_docs.bin  uint32          doc ordinals, grouped by term   (memory-mapped)
+    postings_tf.bin    uint16          term frequencies, same order    (memory-mapped)
+
+New resumes go to an in-memory buffer that is written out as a segment every
+FULLTEXT_FLUSH_DOCS documents / FULLTEXT_FLUSH_SECONDS, and on shutdown. A worker
+that dies without a clean shutdown loses its buffer, so at startup one worker
+reconciles the segments with `applicants` and re-indexes resumes missing from
+them (reconcile_in_background). Segments
+are written to a temp directory and renamed into place, so every worker can pick
+up the others' segments by listing the directory. When there are more than
+FULLTEXT_MAX_SEGMENTS, one worker merges them in the background.
+
+A re-indexed applicant lives in the newest segment (or the buffer); older copies
+are masked out at load time, so no tombstone files are needed.
+
+Rebuild from the resumes on disk:  python -m app.services.resume_fulltext --rebuild
+"""
+import os
+import re
+import json
+import math
+import time
+import uuid
+import shutil
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or that the this to was were will with
+i me my we our you your he she his her they them their
+""".split())
+_MERGE_LOCK_STALE_SECONDS = 600
+
+
+def _try_lock(lock_path: str) -> bool:
+    """Cross-process lock file (O_EXCL); a lock older than _MERGE_LOCK_STALE_SECONDS is taken over."""
+    try:
+        if time.time() - os.path.getmtime(lock_path) > _MERGE_LOCK_STALE_SECONDS:
+            os.unlink(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+
+def tokenize(value: str) -> List[str]:
+    out = []
+    for token in _TOKEN.findall((value or "").lower()):
+        if len(token) < 2 or token in _STOPWORDS or (token.isdigit() and len(token) > 4):
+            continue
+        out.append(token)
+    return out
+
+
+class _Segment:
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.seq = int(meta["seq"])
+        self.replaces = list(meta.get("replaces", []))
+        self.doc_ids = np.load(os.path.join(path, "docs.npy"))
+        self.lengths = np.load(os.path.join(path, "lengths.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        with open(os.path.join(path, "terms.txt"), encoding="utf-8") as f:
+            self.terms = {term: i for i, term in enumerate(f.read().split("\n")) if term}
+        self.postings_docs = self._memmap("postings_docs.bin", np.uint32)
+        self.postings_tf = self._memmap("postings_tf.bin", np.uint16)
+        self.live = np.ones(len(self.doc_ids), dtype=bool)
+
+    def _memmap(self, filename: str, dtype) -> np.ndarray:
+        path = os.path.join(self.path, filename)
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        i = self.terms.get(term)
+        if i is None:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint16)
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.postings_docs[start:end], self.postings_tf[start:end]
+
+
+def _write_segment_files(directory: str, doc_ids: np.ndarray, lengths: np.ndarray, postings, seq: int,
+                         replaces: Optional[List[str]] = None) -> str:
+    """
+    postings: iterable of (term, doc ordinals, term frequencies) in sorted term order.
+    Written to a temp directory and renamed into place; returns the final path.
+    """
+    tmp = os.path.join(directory, f".tmp_{uuid.uuid4().hex}")
+    os.makedirs(tmp)
+
+    terms, offsets = [], [0]
+    with open(os.path.join(tmp, "postings_docs.bin"), "wb") as fd, \
+            open(os.path.join(tmp, "postings_tf.bin"), "wb") as ft:
+        for term, docs, tfs in postings:
+            fd.write(np.asarray(docs, dtype=np.uint32).tobytes())
+            ft.write(np.minimum(np.asarray(tfs), 65535).astype(np.uint16).tobytes())
+            terms.append(term)
+            offsets.append(offsets[-1] + len(docs))
+
+    np.save(os.path.join(tmp, "docs.npy"), np.asarray(doc_ids, dtype=np.int64))
+    np.save(os.path.join(tmp, "lengths.npy"), np.asarray(lengths, dtype=np.float32))
+    np.save(os.path.join(tmp, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    with open(os.path.join(tmp, "terms.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(terms))
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"seq": seq, "replaces": replaces or []}, f)
+
+    final = os.path.join(directory, f"seg_{seq:020d}_{uuid.uuid4().hex[:8]}")
+    os.rename(tmp, final)
+    return final
+
+
+def _write_segment(directory: str, docs: List[Tuple[int, Counter, int]], seq: int) -> str:
+    """Segment from buffered documents: (applicant_id, term counts, length)."""
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for ordinal, (_, counts, _) in enumerate(docs):
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append((ordinal, tf))
+    return _write_segment_files(
+        directory,
+        [d[0] for d in docs],
+        [d[2] for d in docs],
+        ((term, [o for o, _ in postings[term]], [tf for _, tf in postings[term]]) for term in sorted(postings)),
+        seq,
+    )
+
+
+def _merge_segments(directory: str, sources: List["_Segment"]) -> str:
+    """
+    Merge segments (oldest first) into one, keeping only the newest copy of each
+    applicant. Works on whole postings arrays per term, so it never materialises
+    per-document term counts.
+    """
+    newest: Dict[int, Tuple[int, int]] = {}
+    for s_idx, segment in enumerate(sources):
+        for ordinal, applicant_id in enumerate(segment.doc_ids.tolist()):
+            newest[applicant_id] = (s_idx, ordinal)
+
+    remaps, doc_ids, lengths, base = [], [], [], 0
+    for s_idx, segment in enumerate(sources):
+        keep = np.zeros(len(segment.doc_ids), dtype=bool)
+        for ordinal, applicant_id in enumerate(segment.doc_ids.tolist()):
+            keep[ordinal] = newest[applicant_id] == (s_idx, ordinal)
+        remap = np.full(len(segment.doc_ids), -1, dtype=np.int64)
+        remap[keep] = np.arange(base, base + int(keep.sum()))
+        base += int(keep.sum())
+        remaps.append(remap)
+        doc_ids.append(segment.doc_ids[keep])
+        lengths.append(segment.lengths[keep])
+
+    def postings():
+        for term in sorted(set().union(*(s.terms for s in sources))):
+            docs_parts, tf_parts = [], []
+            for segment, remap in zip(sources, remaps):
+                docs, tfs = segment.postings(term)
+                if not len(docs):
+                    continue
+                mapped = remap[docs]
+                keep = mapped >= 0
+                docs_parts.append(mapped[keep])
+                tf_parts.append(tfs[keep])
+            docs = np.concatenate(docs_parts) if docs_parts else np.zeros(0, dtype=np.int64)
+            if len(docs):
+                yield term, docs, np.concatenate(tf_parts)
+
+    return _write_segment_files(
+        directory, np.concatenate(doc_ids), np.concatenate(lengths), postings(),
+        sources[-1].seq, [s.name for s in sources],
+    )
+
+
+class FullTextIndex:
+    def __init__(self, directory: str, flush_docs: int, flush_seconds: float, max_segments: int):
+        self.directory = directory
+        self.flush_docs = flush_docs
+        self.flush_seconds = flush_seconds
+        self.max_segments = max_segments
+        self._segments: Dict[str, _Segment] = {}
+        self._owner: Dict[int, Tuple[int, str, int]] = {}  # applicant_id -> (seq, segment, ordinal)
+        self._buffer: Dict[int, Tuple[Counter, int]] = {}
+        self._buffer_since: Optional[float] = None
+        self._lock = threading.RLock()
+        self._merging = False
+
+    # ---------- segments ----------
+
+    def refresh(self) -> None:
+        """Load segments written by any worker since the last call; drop merged-away ones."""
+        if not os.path.isdir(self.directory):
+            return
+        with self._lock:
+            names = [n for n in os.listdir(self.directory) if n.startswith("seg_")]
+            new = []
+            for name in names:
+                if name in self._segments:
+                    continue
+                try:
+                    new.append(_Segment(os.path.join(self.directory, name)))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Skipping unreadable full-text segment {name}: {e}")
+            if not new:
+                return
+            for segment in new:
+                self._segments[segment.name] = segment
+            replaced = {r for s in self._segments.values() for r in s.replaces}
+            for name in list(self._segments):
+                if name in replaced:
+                    del self._segments[name]
+            self._rebuild_liveness()
+
+    def _rebuild_liveness(self) -> None:
+        self._owner = {}
+        for segment in sorted(self._segments.values(), key=lambda s: s.seq):
+            segment.live[:] = True
+            for ordinal, applicant_id in enumerate(segment.doc_ids.tolist()):
+                self._claim(applicant_id, segment, ordinal)
+        for applicant_id in self._buffer:
+            self._release(applicant_id)
+
+    def _claim(self, applicant_id: int, segment: _Segment, ordinal: int) -> None:
+        self._release(applicant_id)
+        self._owner[applicant_id] = (segment.seq, segment.name, ordinal)
+
+    def _release(self, applicant_id: int) -> None:
+        previous = self._owner.pop(applicant_id, None)
+        if previous is not None:
+            _, name, ordinal = previous
+            segment = self._segments.get(name)
+            if segment is not None:
+                segment.live[ordinal] = False
+
+    # ---------- writes ----------
+
+    def add(self, applicant_id: int, resume_text: str) -> None:
+        tokens = tokenize(resume_text)
+        if not tokens:
+            return
+        with self._lock:
+            self._release(applicant_id)
+            self._buffer[applicant_id] = (Counter(tokens), len(tokens))
+            if self._buffer_since is None:
+                self._buffer_since = time.time()
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._buffer) >= self.flush_docs or \
+                (self._buffer_since is not None and time.time() - self._buffer_since >= self.flush_seconds):
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffer:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            docs = [(applicant_id, counts, length) for applicant_id, (counts, length) in self._buffer.items()]
+            path = _write_segment(self.directory, docs, time.time_ns())
+            self._buffer = {}
+            self._buffer_since = None
+            segment = _Segment(path)
+            self._segments[segment.name] = segment
+            for ordinal, applicant_id in enumerate(segment.doc_ids.tolist()):
+                self._claim(applicant_id, segment, ordinal)
+            logger.info(f"Full-text segment {segment.name} written with {len(docs)} resumes")
+            if len(self._segments) > self.max_segments and not self._merging:
+                self._merging = True
+                threading.Thread(target=self._merge, daemon=True).start()
+
+    def _merge(self) -> None:
+        lock_path = os.path.join(self.directory, "merge.lock")
+        try:
+            if not _try_lock(lock_path):
+                return  # another worker is merging
+            try:
+                self.refresh()
+                with self._lock:
+                    sources = sorted(self._segments.values(), key=lambda s: s.seq)
+                if len(sources) < 2:
+                    return
+                path = _merge_segments(self.directory, sources)
+                logger.info(f"Merged {len(sources)} full-text segments into {os.path.basename(path)}")
+                self.refresh()
+                for segment in sources:
+                    shutil.rmtree(segment.path, ignore_errors=True)  # may linger where mmapped files can't be removed
+            finally:
+                try: os.unlink(lock_path)
+                except OSError: pass
+        except Exception as e:
+            logger.error(f"Full-text segment merge failed: {e}")
+        finally:
+            self._merging = False
+
+    # ---------- search ----------
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[int, float]]]:
+        """BM25 over all live documents. Returns (total matches, [(applicant_id, score)] for the page)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+        self.refresh()
+        with self._lock:
+            # snapshot only: segments are immutable, so scoring runs outside the lock and
+            # doesn't hold up add() / flush() / refresh() on other threads
+            self._maybe_flush()
+            segments = [(s, s.live.copy()) for s in self._segments.values()]
+            buffer = dict(self._buffer)
+
+        n_docs = len(buffer) + sum(int(live.sum()) for _, live in segments)
+        if n_docs == 0:
+            return 0, []
+        total_length = sum(length for _, length in buffer.values()) + \
+            sum(float(s.lengths[live].sum()) for s, live in segments)
+        avgdl = total_length / n_docs
+
+        df = {}
+        for term in terms:
+            count = sum(1 for counts, _ in buffer.values() if term in counts)
+            for segment, live in segments:
+                docs, _ = segment.postings(term)
+                count += int(live[docs].sum()) if len(docs) else 0
+            df[term] = count
+        idf = {t: math.log(1 + (n_docs - df[t] + 0.5) / (df[t] + 0.5)) for t in terms if df[t]}
+        if not idf:
+            return 0, []
+
+        ids, scores = [], []
+        for segment, live in segments:
+            seg_scores = np.zeros(len(segment.doc_ids), dtype=np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.lengths / avgdl)
+            for term, w in idf.items():
+                docs, tf = segment.postings(term)
+                if not len(docs):
+                    continue
+                tf = tf.astype(np.float32)
+                seg_scores[docs] += w * tf * (BM25_K1 + 1) / (tf + norm[docs])  # ordinals are unique per term
+            seg_scores[~live] = 0
+            hits = np.flatnonzero(seg_scores)
+            ids.append(segment.doc_ids[hits])
+            scores.append(seg_scores[hits])
+
+        for applicant_id, (counts, length) in buffer.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+            score = sum(w * counts[t] * (BM25_K1 + 1) / (counts[t] + norm) for t, w in idf.items() if counts[t])
+            if score:
+                ids.append(np.array([applicant_id], dtype=np.int64))
+                scores.append(np.array([score], dtype=np.float32))
+
+        if not ids:
+            return 0, []
+        all_ids = np.concatenate(ids)
+        all_scores = np.concatenate(scores)
+        total = len(all_ids)
+        k = min(offset + limit, total)
+        if k <= offset:
+            return total, []
+        top = np.argpartition(-all_scores, k - 1)[:k] if k < total else np.arange(total)
+        top = top[np.lexsort((-all_ids[top], -all_scores[top]))][offset:k]
+        return total, [(int(all_ids[i]), round(float(all_scores[i]), 4)) for i in top]
+
+    def __len__(self) -> int:
+        return len(self._owner) + len(self._buffer)
+
+    # ---------- recovery ----------
+
+    def catch_up(self, db: Session) -> int:
+        """
+        Index applicants with a resume that no segment (or buffer) holds, e.g. the
+        unflushed buffer of a worker that was killed. Returns how many were added.
+        """
+        from app.services.bulk_applicant_service import _extract_text_from_pdf
+
+        self.refresh()
+        with self._lock:
+            indexed = set(self._owner) | set(self._buffer)
+        rows = db.execute(text("SELECT applicant_id, resume_url FROM applicants WHERE resume_url IS NOT NULL")).fetchall()
+        missing = [(int(a), url) for a, url in rows if int(a) not in indexed and os.path.exists(url)]
+        for applicant_id, resume_url in missing:
+            self.add(applicant_id, _extract_text_from_pdf(resume_url))
+        self.flush()
+        return len(missing)
+
+
+index = FullTextIndex(
+    settings.FULLTEXT_INDEX_DIR,
+    settings.FULLTEXT_FLUSH_DOCS,
+    settings.FULLTEXT_FLUSH_SECONDS,
+    settings.FULLTEXT_MAX_SEGMENTS,
+)
+
+
+def reconcile_in_background() -> None:
+    """Run index.catch_up() on a daemon thread, in one worker at a time (lock file in the index dir)."""
+    def run():
+        from app.db.connection import SessionLocal
+
+        os.makedirs(index.directory, exist_ok=True)
+        lock_path = os.path.join(index.directory, "catchup.lock")
+        if not _try_lock(lock_path):
+            return
+        db = SessionLocal()
+        try:
+            added = index.catch_up(db)
+            if added:
+                logger.info(f"Full-text index caught up with {added} resumes missing from its segments")
+        except Exception as e:
+            logger.error(f"Full-text index catch-up failed: {e}")
+        finally:
+            db.close()
+            try: os.unlink(lock_path)
+            except OSError: pass
+
+    threading.Thread(target=run, daemon=True, name="fulltext-catch-up").start()
+
+
+def fulltext_search(db: Session, query: str, page: int, page_size: int) -> Dict[str, Any]:
+    total, hits = index.search(query, offset=(page - 1) * page_size, limit=page_size)
+
+    results = []
+    if hits:
+        rows = db.execute(text("""
+            SELECT applicant_id, first_name, last_name, email, phone, linkedin_url, resume_url,
+                   experience_years, education, current_company, current_role,
+                   expected_ctc, notice_period_days, skills, location, created_at
+            FROM applicants
+            WHERE applicant_id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": [a for a, _ in hits]}).mappings().fetchall()
+        by_id = {row["applicant_id"]: dict(row) for row in rows}
+        for applicant_id, score in hits:
+            if applicant_id in by_id:
+                results.append({**by_id[applicant_id], "score": score})
+
+    return {"total": total, "page": page, "page_size": page_size, "results": results}
+
+
+# ==============================
+#           REBUILD
+# ==============================
+
+def _rebuild() -> None:
+    from app.db.connection import SessionLocal
+    from app.services.bulk_applicant_service import _extract_text_from_pdf
+
+    # large segments, no background merges: the rebuild is the only writer
+    target = FullTextIndex(settings.FULLTEXT_INDEX_DIR + ".rebuild", flush_docs=20_000,
+                           flush_seconds=float("inf"), max_segments=1_000_000)
+    shutil.rmtree(target.directory, ignore_errors=True)
+    db = SessionLocal()
+    try:
+        rows = db.execute(text("""
+            SELECT applicant_id, resume_url FROM applicants
+            WHERE resume_url IS NOT NULL ORDER BY applicant_id
+        """)).fetchall()
+    finally:
+        db.close()
+
+    indexed = 0
+    start = time.perf_counter()
+    for applicant_id, resume_url in rows:
+        if not os.path.exists(resume_url):
+            logger.warning(f"Resume missing for applicant {applicant_id}: {resume_url}")
+            continue
+        target.add(int(applicant_id), _extract_text_from_pdf(resume_url))
+        indexed += 1
+    target.flush()
+
+    backup = settings.FULLTEXT_INDEX_DIR + ".old"
+    shutil.rmtree(backup, ignore_errors=True)
+    if os.path.isdir(settings.FULLTEXT_INDEX_DIR):
+        os.rename(settings.FULLTEXT_INDEX_DIR, backup)
+    os.rename(target.directory, settings.FULLTEXT_INDEX_DIR)
+    shutil.rmtree(backup, ignore_errors=True)
+    print(f"Indexed {indexed}/{len(rows)} resumes in {time.perf_counter() - start:.1f}s "
+          f"into {settings.FULLTEXT_INDEX_DIR} (restart the API to pick up the new index)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the resume full-text index")
+    parser.add_argument("--rebuild", action="store_true", help="re-extract every resume on disk and rebuild")
+    parser.add_argument("--query", help="run a search against the current index")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild:
+        _rebuild()
+    if args.query:
+        total, hits = index.search(args.query, limit=10)
+        print(f"{total} matches")
+        for applicant_id, score in hits:
+            print(f"{applicant_id:>10}  {score:.4f}")
@@ -0,0 +1,106 @@
+# app/services/score_cache.py
+"""
+Persistent score cache for the shortlister.
+
+Key   : (resume content SHA-256, normalised JD hash, skills hash, scorer version)
+Value : high/normal keyword match fractions and jd_matching_score (the components;
+        the per-job weights are applied by the caller, so changing them never
+        invalidates the cache)
+
+A retried / duplicate upload of the same PDF for the same job description then
+skips PDF extraction and the embedding model entirely. Reads and writes use
+their own short connection so a cache problem never poisons the caller's
+transaction.
+"""
+import hashlib
+import logging
+from typing import Optional, Dict, Any, Iterable
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db.connection import engine
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def text_hash(value: str) -> str:
+    return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+
+def skills_hash(high_priority_keywords: Iterable[str], normal_keywords: Iterable[str]) -> str:
+    canonical = ",".join(sorted(high_priority_keywords)) + "|" + ",".join(sorted(normal_keywords))
+    return text_hash(canonical)
+
+
+def get_cached_scores(resume_sha256: str, jd_hash: str, skills_key: str, scorer_version: str) -> Optional[Dict[str, Any]]:
+    if not settings.SCORE_CACHE_ENABLED:
+        return None
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(text("""
+                SELECT high_keyword_match, normal_keyword_match, jd_matching_score
+                FROM score_cache
+                WHERE resume_sha256 = :resume_sha256 AND jd_hash = :jd_hash
+                  AND skills_hash = :skills_hash AND scorer_version = :scorer_version
+            """), {
+                "resume_sha256": resume_sha256,
+                "jd_hash": jd_hash,
+                "skills_hash": skills_key,
+                "scorer_version": scorer_version,
+            }).mappings().fetchone()
+    except Exception as e:
+        logger.warning(f"Score cache lookup failed, scoring normally: {e}")
+        return None
+    if not row or row["high_keyword_match"] is None:
+        return None
+    return {
+        "high_keyword_match": float(row["high_keyword_match"]),
+        "normal_keyword_match": float(row["normal_keyword_match"]),
+        "jd_matching_score": float(row["jd_matching_score"]) if row["jd_matching_score"] is not None else None,
+    }
+
+
+def put_cached_scores(resume_sha256: str, jd_hash: str, skills_key: str, scorer_version: str,
+                      high_keyword_match: float, normal_keyword_match: float,
+                      jd_matching_score: Optional[float]) -> None:
+    """Insert or refresh an entry (jd_matching_score may be filled in later for prefiltered rows)."""
+    if not settings.SCORE_CACHE_ENABLED:
+        return
+    params = {
+        "resume_sha256": resume_sha256,
+        "jd_hash": jd_hash,
+        "skills_hash": skills_key,
+        "scorer_version": scorer_version,
+        "high_keyword_match": high_keyword_match,
+        "normal_keyword_match": normal_keyword_match,
+        "jd_matching_score": jd_matching_score,
+    }
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                MERGE score_cache WITH (HOLDLOCK) AS t
+                USING (SELECT :resume_sha256 AS resume_sha256, :jd_hash AS jd_hash,
+                              :skills_hash AS skills_hash, :scorer_version AS scorer_version) AS s
+                ON t.resume_sha256 = s.resume_sha256 AND t.jd_hash = s.jd_hash
+                   AND t.skills_hash = s.skills_hash AND t.scorer_version = s.scorer_version
+                WHEN MATCHED THEN UPDATE SET
+                    high_keyword_match = :high_keyword_match,
+                    normal_keyword_match = :normal_keyword_match,
+                    jd_matching_score = :jd_matching_score
+                WHEN NOT MATCHED THEN INSERT
+                    (resume_sha256, jd_hash, skills_hash, scorer_version,
+                     high_keyword_match, normal_keyword_match, jd_matching_score)
+                VALUES (:resume_sha256, :jd_hash, :skills_hash, :scorer_version,
+                        :high_keyword_match, :normal_keyword_match, :jd_matching_score);
+            """), params)
+    except Exception as e:
+        logger.warning(f"Score cache write failed: {e}")
@@ -0,0 +1,186 @@
+# app/services/score_stats.py
+"""
+Per-job score distributions: percentile ranks and histograms.
+
+For every job each worker keeps the sorted values of resume_overall_score,
+jd_matching_score and skills_matching_score. New applications are inserted with
+bisect (locally on insert, and from other workers through an incremental sync on
+applications.updated_at with an overlap window), so a percentile is two binary
+searches and a histogram is one per bin edge; no request scans the applications
+table. As a backstop the job's application count is checked on every request:
+if the arrays hold fewer applications than the table, the job is reloaded.
+
+A job's arrays are reloaded (one index seek on applications.job_id) the first
+time it is asked for in a worker and whenever its scoring weights or
+scores_rescored_at have changed, since a re-rank or an offline re-score
+(python -m app.cli rescore) rewrites every score of the job.
+"""
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.services.sync_window import SyncWindow, newest
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("resume_overall_score", "jd_matching_score", "skills_matching_score")
+PERCENTILE_KEYS = {
+    "resume_overall_score": "resume_overall_percentile",
+    "jd_matching_score": "jd_matching_percentile",
+    "skills_matching_score": "skills_matching_percentile",
+}
+
+
+def _as_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class _JobScores:
+    def __init__(self, weights: Tuple):
+        self.weights = weights
+        self.by_application: Dict[int, Tuple[Optional[float], ...]] = {}
+        self.sorted: Dict[str, List[float]] = {m: [] for m in METRICS}
+
+    def put(self, application_id: int, scores: Tuple[Optional[float], ...]) -> None:
+        previous = self.by_application.get(application_id)
+        if previous == scores:
+            return
+        if previous is not None:
+            for metric, value in zip(METRICS, previous):
+                if value is not None:
+                    values = self.sorted[metric]
+                    i = bisect.bisect_left(values, value)
+                    if i < len(values) and values[i] == value:
+                        del values[i]
+        self.by_application[application_id] = scores
+        for metric, value in zip(METRICS, scores):
+            if value is not None:
+                bisect.insort(self.sorted[metric], value)
+
+
+class ScoreStats:
+    def __init__(self):
+        self._jobs: Dict[int, _JobScores] = {}
+        self._window = SyncWindow()
+        self._lock = threading.RLock()
+
+    def record(self, job_id: int, application_id: int, scores: Dict[str, Any]) -> None:
+        """Add a just-written application to its job (ignored until the job has been loaded)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.put(application_id, tuple(_as_float(scores.get(m)) for m in METRICS))
+
+    def invalidate(self, job_id: int) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def sync(self, db: Session) -> int:
+        """Fold in applications written since the last sync (any worker) for jobs already loaded."""
+        since = self._window.since()
+        if since is None:
+            return 0
+        rows = db.execute(text("""
+            SELECT application_id, job_id, resume_overall_score, jd_matching_score, skills_matching_score, updated_at
+            FROM applications
+            WHERE updated_at >= :since
+        """), {"since": since}).fetchall()
+        with self._lock:
+            for application_id, job_id, *scores, _ in rows:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.put(int(application_id), tuple(_as_float(v) for v in scores))
+        self._window.advance(newest(r[-1] for r in rows))
+        return len(rows)
+
+    def _load_job(self, db: Session, job_id: int, weights: Tuple) -> _JobScores:
+        job = _JobScores(weights)
+        rows = db.execute(text("""
+            SELECT application_id, resume_overall_score, jd_matching_score, skills_matching_score
+            FROM applications WHERE job_id = :job_id
+        """), {"job_id": job_id}).fetchall()
+        columns = list(zip(*[r[1:] for r in rows])) if rows else [(), (), ()]
+        for metric, values in zip(METRICS, columns):
+            job.sorted[metric] = sorted(float(v) for v in values if v is not None)
+        job.by_application = {int(r[0]): tuple(_as_float(v) for v in r[1:]) for r in rows}
+        return job
+
+    def ensure_current(self, db: Session, job_id: int) -> None:
+        if not self._window.started:
+            self._window.start(db, "applications")
+        row = db.execute(text("""
+            SELECT semantic_weight, high_priority_keyword_weight, scores_rescored_at,
+                   (SELECT COUNT(*) FROM applications WHERE job_id = :job_id) AS application_count
+            FROM jobs WHERE job_id = :job_id
+        """), {"job_id": job_id}).fetchone()
+        weights = (_as_float(row[0]), _as_float(row[1]), row[2]) if row else (None, None, None)
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.weights != weights:
+            job = self._load_job(db, job_id, weights)
+            with self._lock:
+                self._jobs[job_id] = job
+        self.sync(db)
+        if row and len(job.by_application) < int(row[3]):
+            # a row the sync window missed: reload the job (more rows than counted is
+            # just an insert that landed after the count)
+            loaded = self._load_job(db, job_id, weights)
+            with self._lock:
+                self._jobs[job_id] = loaded
+
+    def percentile(self, job_id: int, metric: str, value) -> Optional[float]:
+        """Share of the job's applications scoring below `value` (ties count half), 0-100."""
+        if value is None:
+            return None
+        value = float(value)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            values = job.sorted[metric] if job else []
+            if not values:
+                return None
+            below = bisect.bisect_left(values, value)
+            equal = bisect.bisect_right(values, value) - below
+            return round(100.0 * (below + 0.5 * equal) / len(values), 1)
+
+    def annotate(self, job_id: int, rows: List[dict]) -> None:
+        for row in rows:
+            for metric, key in PERCENTILE_KEYS.items():
+                row[key] = self.percentile(job_id, metric, row.get(metric))
+
+    def histogram(self, job_id: int, metric: str, bins: int) -> Dict[str, Any]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            values = list(job.sorted[metric]) if job else []
+        if not values:
+            return {"job_id": job_id, "metric": metric, "count": 0, "bins": [], "quantiles": {}}
+
+        low, high = min(0.0, values[0]), max(1.0, values[-1])
+        width = (high - low) / bins
+        edges = [low + i * width for i in range(bins)] + [high]
+        counts = [bisect.bisect_left(values, edges[i + 1]) - bisect.bisect_left(values, edges[i])
+                  for i in range(bins)]
+        counts[-1] += len(values) - bisect.bisect_left(values, high)  # right edge is inclusive
+
+        def quantile(q: float) -> float:
+            return round(values[min(len(values) - 1, int(q * len(values)))], 4)
+
+        return {
+            "job_id": job_id,
+            "metric": metric,
+            "count": len(values),
+            "bins": [{"from": round(edges[i], 4), "to": round(edges[i + 1], 4), "count": counts[i]}
+                     for i in range(bins)],
+            "quantiles": {"p50": quantile(0.5), "p75": quantile(0.75), "p90": quantile(0.9), "p95": quantile(0.95)},
+        }
+
+
+stats = ScoreStats()
+
+
+def get_score_histogram(db: Session, job_id: int, metric: str, bins: int) -> Dict[str, Any]:
+    stats.ensure_current(db, job_id)
+    return stats.histogram(job_id, metric, bins)
@@ -0,0 +1,173 @@
+# app/services/semantic_search.py
+"""
+Semantic candidate search over stored resume embeddings.
+
+Every ingested resume's pooled, L2-normalised vector (the one the shortlister
+already computes for JD similarity) is stored in `applicant_embeddings`, tagged
+with the embedding version. Each worker keeps all vectors of the current version
+in one contiguous float32 matrix, loaded at startup and synced incrementally by
+updated_at, so a query is one encode plus one matrix-vector product and an
+argpartition: ~100k x 384 floats is a few milliseconds, no PDFs are read and no
+approximate index is needed at this scale.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from app.services.sync_window import SyncWindow, newest
+
+logger = logging.getLogger(__name__)
+
+
+def vector_to_bytes(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def vector_from_bytes(raw: bytes) -> np.ndarray:
+    return np.frombuffer(raw, dtype="<f4").astype(np.float32)
+
+
+_UPSERT_EMBEDDING = text("""
+    MERGE applicant_embeddings WITH (HOLDLOCK) AS t
+    USING (SELECT :applicant_id AS applicant_id) AS s
+    ON t.applicant_id = s.applicant_id
+    WHEN MATCHED THEN UPDATE SET
+        embedding_version = :version, dim = :dim, vector = :vector, updated_at = :now
+    WHEN NOT MATCHED THEN INSERT (applicant_id, embedding_version, dim, vector, updated_at)
+        VALUES (:applicant_id, :version, :dim, :vector, :now);
+""")
+
+
+def _embedding_params(applicant_id: int, vector: np.ndarray, version: str, now: datetime) -> Dict[str, Any]:
+    return {
+        "applicant_id": applicant_id,
+        "version": version,
+        "dim": int(len(vector)),
+        "vector": vector_to_bytes(vector),
+        "now": now,
+    }
+
+
+def store_embedding(db: Session, applicant_id: int, vector: np.ndarray, version: str) -> None:
+    """Upsert an applicant's resume vector inside the caller's transaction."""
+    db.execute(_UPSERT_EMBEDDING, _embedding_params(applicant_id, vector, version, datetime.now()))
+
+
+def store_embeddings(db: Session, vectors: List[Tuple[int, np.ndarray]], version: str) -> None:
+    """Upsert many (applicant_id, vector) pairs in one executemany."""
+    now = datetime.now()
+    db.execute(_UPSERT_EMBEDDING, [_embedding_params(a, v, version, now) for a, v in vectors])
+
+
+class EmbeddingMatrix:
+    """applicant_id -> row of a growable float32 matrix (capacity doubles, rows replaced in place)."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset(None)
+
+    def _reset(self, version: Optional[str]) -> None:
+        self.version = version
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._size = 0
+        self._window = SyncWindow()
+
+    def add(self, applicant_id: int, vector: np.ndarray) -> None:
+        with self._lock:
+            row = self._row_of.get(applicant_id)
+            if row is None:
+                if self._size == len(self._matrix) or self._matrix.shape[1] != len(vector):
+                    self._grow(len(vector))
+                row = self._size
+                self._size += 1
+                self._row_of[applicant_id] = row
+                self._ids[row] = applicant_id
+            self._matrix[row] = vector
+
+    def offer(self, applicant_id: int, vector: np.ndarray, version: str) -> None:
+        """add() a freshly stored vector if it belongs to the loaded version (sync picks up the rest)."""
+        if version == self.version:
+            self.add(applicant_id, vector)
+
+    def _grow(self, dim: int) -> None:
+        if self._size and self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension changed from {self._matrix.shape[1]} to {dim}")
+        capacity = max(1024, 2 * len(self._matrix))
+        matrix = np.zeros((capacity, dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        if self._size:  # the initial (0, 0) matrix has no width to copy from
+            matrix[:self._size] = self._matrix[:self._size]
+            ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def vector_of(self, applicant_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._row_of.get(applicant_id)
+            return self._matrix[row].copy() if row is not None else None
+
+    def top_k(self, query: np.ndarray, k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        with self._lock:
+            if not self._size:
+                return []
+            scores = self._matrix[:self._size] @ query.astype(np.float32)
+            ids = self._ids[:self._size]
+        if exclude is not None and exclude in self._row_of:
+            scores[self._row_of[exclude]] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), round(float(scores[i]), 4)) for i in top if np.isfinite(scores[i])]
+
+    def sync(self, db: Session, version: str) -> int:
+        """Load vectors of `version` written since the last sync (any worker); everything on first call."""
+        with self._lock:
+            if version != self.version:
+                self._reset(version)
+            window = self._window  # a version change replaces it, so a stale sync cannot advance the new one
+        since = window.since()
+        if since is None:
+            window.start(db, "applicant_embeddings")
+        rows = db.execute(text(f"""
+            SELECT applicant_id, vector, updated_at FROM applicant_embeddings
+            WHERE embedding_version = :version {"AND updated_at >= :since" if since else ""}
+        """), {"version": version, "since": since}).fetchall()
+        for applicant_id, raw, _ in rows:
+            self.add(int(applicant_id), vector_from_bytes(bytes(raw)))
+        window.advance(newest(r[2] for r in rows))
+        return len(rows)
+
+    def __len__(self) -> int:
+        return self._size
+
+
+index = EmbeddingMatrix()
+
+
+def semantic_search(db: Session, query: str, top_k: int) -> Dict[str, Any]:
+    from app.services.aishortlist import embed_text, embedding_version
+
+    index.sync(db, embedding_version())
+    hits = index.top_k(embed_text(query), top_k)
+
+    results = []
+    if hits:
+        rows = db.execute(text("""
+            SELECT applicant_id, first_name, last_name, email, phone, linkedin_url, resume_url,
+                   experience_years, education, current_company, current_role,
+                   expected_ctc, notice_period_days, skills, location, created_at
+            FROM applicants
+            WHERE applicant_id IN :ids
+        """).bindparams(bindparam("ids", expanding=True)), {"ids": [a for a, _ in hits]}).mappings().fetchall()
+        by_id = {row["applicant_id"]: dict(row) for row in rows}
+        for applicant_id, score in hits:
+            if applicant_id in by_id:
+                results.append({**by_id[applicant_id], "score": score})
+
+    return {"query": query, "searched": len(index), "results": results}
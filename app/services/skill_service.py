@@ -0,0 +1,182 @@
+# app/services/skill_service.py
+"""
+Normalised applicant skills.
+
+`applicants.skills` stays as the display text; alongside it every applicant's
+canonical skills (skill_vocabulary) are stored as rows of
+applicant_skills(applicant_id, skill_id), keyed both ways, against the `skills`
+vocabulary table. Skill filters are then index seeks on (skill_id, applicant_id)
+instead of LIKE '%python%' scans over the TEXT column.
+
+Ingestion writes the rows in the same transaction as the applicant;
+`python -m app.cli backfill-skills` (re)builds them for existing applicants.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+from app.services.skill_vocabulary import canonical_skill, canonical_skills, normalize_skill
+
+logger = logging.getLogger(__name__)
+
+
+class _SkillIds:
+    """Per-process name -> skill_id cache; the vocabulary only ever grows."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, db: Session, names: Iterable[str], create: bool = False) -> Dict[str, int]:
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            found = {n: self._ids[n] for n in names if n in self._ids}
+        missing = [n for n in names if n not in found]
+        if missing and create:
+            for name in missing:
+                db.execute(text("""
+                    INSERT INTO skills (name)
+                    SELECT :name WHERE NOT EXISTS (SELECT 1 FROM skills WITH (UPDLOCK, HOLDLOCK) WHERE name = :name)
+                """), {"name": name})
+        if missing:
+            rows = db.execute(
+                text("SELECT name, skill_id FROM skills WHERE name IN :names")
+                .bindparams(bindparam("names", expanding=True)),
+                {"names": missing}
+            ).fetchall()
+            fetched = {name: int(skill_id) for name, skill_id in rows}
+            if not create:
+                with self._lock:
+                    self._ids.update(fetched)
+            found.update(fetched)
+        return found
+
+    def remember(self, ids: Dict[str, int]) -> None:
+        """Cache ids created inside a transaction once it has committed."""
+        with self._lock:
+            self._ids.update(ids)
+
+
+skill_ids = _SkillIds()
+
+
+def store_applicant_skills(db: Session, applicant_id: int, skills: Optional[str]) -> Dict[str, int]:
+    """
+    Replace an applicant's skill rows inside the caller's transaction. Returns the
+    name -> skill_id map used; pass it to skill_ids.remember() after commit.
+    """
+    ids = skill_ids.lookup(db, canonical_skills(skills), create=True)
+    db.execute(text("DELETE FROM applicant_skills WHERE applicant_id = :applicant_id"), {"applicant_id": applicant_id})
+    if ids:
+        db.execute(text("INSERT INTO applicant_skills (applicant_id, skill_id) VALUES (:applicant_id, :skill_id)"),
+                   [{"applicant_id": applicant_id, "skill_id": skill_id} for skill_id in sorted(set(ids.values()))])
+    return ids
+
+
+def backfill_applicant_skills(db: Session, batch_size: int = 1000, after: int = 0) -> int:
+    """
+    (Re)build applicant_skills for every applicant with id > `after`, in keyset
+    batches, one transaction each. Safe to re-run, e.g. after adding aliases.
+    """
+    started = time.perf_counter()
+    done = 0
+    while True:
+        ids: Dict[str, int] = {}
+        with db.begin():
+            rows = db.execute(text("""
+                SELECT TOP (:n) applicant_id, skills FROM applicants
+                WHERE applicant_id > :after ORDER BY applicant_id
+            """), {"n": batch_size, "after": after}).fetchall()
+            if not rows:
+                break
+            skills_of = {int(applicant_id): canonical_skills(skills) for applicant_id, skills in rows}
+            ids = skill_ids.lookup(db, (s for names in skills_of.values() for s in names), create=True)
+            db.execute(text("DELETE FROM applicant_skills WHERE applicant_id > :after AND applicant_id <= :upto"),
+                       {"after": after, "upto": int(rows[-1][0])})
+            pairs = [{"applicant_id": applicant_id, "skill_id": skill_id}
+                     for applicant_id, names in skills_of.items()
+                     for skill_id in sorted({ids[n] for n in names})]
+            if pairs:
+                db.execute(text("INSERT INTO applicant_skills (applicant_id, skill_id) VALUES (:applicant_id, :skill_id)"),
+                           pairs)
+        skill_ids.remember(ids)
+        done += len(rows)
+        after = int(rows[-1][0])
+        print(f"{done} applicants backfilled (up to applicant_id {after}), "
+              f"{done / (time.perf_counter() - started):.0f}/s")
+    return done
+
+
+def find_applicants_by_skills(db: Session, skills: List[str], match_all: bool, job_id: Optional[int],
+                              page: int, page_size: int) -> Dict[str, Any]:
+    """
+    Applicants having all (or any) of `skills`, newest first, optionally only those
+    who applied to `job_id`. Each skill is one seek on IX_applicant_skills_skill.
+    """
+    wanted = list(dict.fromkeys(s for s in (canonical_skill(s) for s in skills) if s))
+    ids = skill_ids.lookup(db, wanted)
+    empty = {"total": 0, "page": page, "page_size": page_size, "results": []}
+    if not wanted or (match_all and len(ids) < len(wanted)) or not ids:
+        return empty
+
+    job_filter = """AND EXISTS (SELECT 1 FROM applications app
+                                WHERE app.applicant_id = s.applicant_id AND app.job_id = :job_id)""" \
+        if job_id is not None else ""
+    having = "HAVING COUNT(*) = :needed" if match_all else ""
+    order = "s.applicant_id DESC" if match_all else "matched DESC, s.applicant_id DESC"
+    rows = db.execute(text(f"""
+        SELECT s.applicant_id, COUNT(*) AS matched, COUNT(*) OVER () AS total
+        FROM applicant_skills s
+        WHERE s.skill_id IN :skill_ids {job_filter}
+        GROUP BY s.applicant_id
+        {having}
+        ORDER BY {order}
+        OFFSET :offset ROWS FETCH NEXT :limit ROWS ONLY
+    """).bindparams(bindparam("skill_ids", expanding=True)), {
+        "skill_ids": sorted(set(ids.values())),
+        "needed": len(set(ids.values())),
+        "job_id": job_id,
+        "offset": (page - 1) * page_size,
+        "limit": page_size,
+    }).fetchall()
+    if not rows:
+        return empty
+
+    page_ids = [int(r[0]) for r in rows]
+    details = db.execute(text("""
+        SELECT applicant_id, first_name, last_name, email, phone, linkedin_url, resume_url,
+               experience_years, education, current_company, current_role,
+               expected_ctc, notice_period_days, skills, location, created_at
+        FROM applicants
+        WHERE applicant_id IN :ids
+    """).bindparams(bindparam("ids", expanding=True)), {"ids": page_ids}).mappings().fetchall()
+    by_id = {row["applicant_id"]: dict(row) for row in details}
+    matched = {int(r[0]): int(r[1]) for r in rows}
+    return {
+        "total": int(rows[0][2]),
+        "page": page,
+        "page_size": page_size,
+        "results": [{**by_id[a], "matched_skills": matched[a]} for a in page_ids if a in by_id],
+    }
+
+
+def skill_vocabulary(db: Session, prefix: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Known skills (prefix seek on skills.name) with how many applicants list each.
+    Names no applicant lists any more (e.g. fragments of an older split, remapped by
+    backfill-skills) stay in `skills`, since worker caches hold their ids, but are not listed.
+    """
+    prefix = normalize_skill(prefix or "")
+    escaped = prefix.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]")
+    rows = db.execute(text("""
+        SELECT TOP (:limit) k.skill_id, k.name, c.applicant_count
+        FROM skills k
+        CROSS APPLY (SELECT COUNT(*) AS applicant_count FROM applicant_skills s WHERE s.skill_id = k.skill_id) c
+        WHERE k.name LIKE :pattern AND c.applicant_count > 0
+        ORDER BY c.applicant_count DESC, k.name
+    """), {"limit": limit, "pattern": f"{escaped}%"}).mappings().fetchall()
+    return [dict(row) for row in rows]
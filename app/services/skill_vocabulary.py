@@ -0,0 +1,98 @@
+# app/services/skill_vocabulary.py
+"""
+Canonical skill names.
+
+Resumes and forms spell the same skill many ways ("py", "Python3", "AWS",
+"Amazon Web Services"). canonical_skill() lower-cases, trims punctuation and
+maps known aliases to one canonical name; anything not listed is kept as its
+normalised self, so the vocabulary (the `skills` table) grows with the data.
+Add aliases here: existing rows are re-mapped by `python -m app.cli backfill-skills`.
+"""
+import re
+from typing import List, Optional
+
+# only the separators the resume parser and forms use; "/" belongs to skills such as CI/CD, PL/SQL, TCP/IP
+_SKILL_SPLIT = re.compile(r"[,;\n]+")
+_SLASH = re.compile(r"\s*/\s*")
+_EDGE_PUNCTUATION = re.compile(r"^[\s\-•*·:;()\[\]]+|[\s\-•*·.:;()\[\]]+$")  # leading "." kept for ".net"
+
+MAX_SKILL_LENGTH = 100
+MAX_SKILL_WORDS = 5  # longer fragments are sentences that slipped through the resume parser
+
+SKILL_ALIASES = {
+    # languages
+    "py": "python", "python3": "python", "python 3": "python", "python2": "python",
+    "js": "javascript", "java script": "javascript", "ecmascript": "javascript", "es6": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "c sharp": "c#", "csharp": "c#",
+    "cpp": "c++", "c plus plus": "c++",
+    "vb.net": "visual basic .net", "vb net": "visual basic .net",
+    "r lang": "r", "r programming": "r",
+    # cloud / infra
+    "aws": "amazon web services", "amazon aws": "amazon web services",
+    "gcp": "google cloud platform", "google cloud": "google cloud platform",
+    "azure": "microsoft azure", "ms azure": "microsoft azure",
+    "k8s": "kubernetes",
+    "docker containers": "docker",
+    "cicd": "ci/cd", "ci cd": "ci/cd", "ci-cd": "ci/cd", "ci & cd": "ci/cd",
+    "tcp ip": "tcp/ip", "tcp-ip": "tcp/ip",
+    # data
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn",
+    "tf2": "tensorflow", "tensor flow": "tensorflow",
+    "torch": "pytorch",
+    "postgres": "postgresql", "postgre sql": "postgresql", "psql": "postgresql",
+    "mssql": "sql server", "ms sql": "sql server", "ms sql server": "sql server",
+    "microsoft sql server": "sql server", "t-sql": "sql server", "tsql": "sql server",
+    "plsql": "pl/sql", "pl sql": "pl/sql", "pl-sql": "pl/sql", "oracle pl/sql": "pl/sql",
+    "mongo": "mongodb", "mongo db": "mongodb",
+    "powerbi": "power bi",
+    "ms excel": "excel", "microsoft excel": "excel", "advanced excel": "excel",
+    "pyspark": "apache spark", "spark": "apache spark",
+    "kafka": "apache kafka",
+    "airflow": "apache airflow",
+    # web
+    "reactjs": "react", "react.js": "react", "react js": "react",
+    "angularjs": "angular", "angular.js": "angular", "angular js": "angular",
+    "vuejs": "vue", "vue.js": "vue", "vue js": "vue",
+    "nodejs": "node.js", "node js": "node.js", "node": "node.js",
+    "expressjs": "express", "express.js": "express",
+    "nextjs": "next.js", "next js": "next.js",
+    "dotnet": ".net", "dot net": ".net", "asp.net core": "asp.net", ".net core": ".net",
+    "springboot": "spring boot",
+    "rest": "rest api", "restful": "rest api", "rest apis": "rest api", "restful api": "rest api",
+    "html5": "html", "css3": "css",
+    # practices / tools
+    "oop": "object oriented programming", "oops": "object oriented programming",
+    "dsa": "data structures and algorithms",
+    "git hub": "github", "git lab": "gitlab",
+    "jira software": "jira",
+    "agile methodology": "agile", "scrum master": "scrum",
+    "a/b test": "a/b testing", "ab testing": "a/b testing", "a-b testing": "a/b testing",
+}
+
+
+def normalize_skill(skill: str) -> str:
+    return _SLASH.sub("/", " ".join((skill or "").lower().split()))
+
+
+def canonical_skill(raw: Optional[str]) -> Optional[str]:
+    """Canonical name of one skill, or None if the fragment is not a usable skill."""
+    skill = normalize_skill(_EDGE_PUNCTUATION.sub("", raw or ""))
+    if not skill or len(skill) > MAX_SKILL_LENGTH or len(skill.split()) > MAX_SKILL_WORDS:
+        return None
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def canonical_skills(skills: Optional[str]) -> List[str]:
+    """Distinct canonical skills of a comma-joined skills field, in first-seen order."""
+    seen = {}
+    for part in _SKILL_SPLIT.split(skills or ""):
+        skill = canonical_skill(part)
+        if skill:
+            seen.setdefault(skill, None)
+    return list(seen)
@@ -0,0 +1,49 @@
+# app/services/sync_window.py
+"""
+updated_at watermarks for the per-worker in-memory indexes (near_duplicates,
+semantic_search, score_stats, interview_scheduler, applicant_search), which pick
+up rows written by other workers and the offline CLI on each request.
+
+Rows are stamped with updated_at before they commit, so a row can become visible
+after one stamped later. Each incremental sync therefore re-reads OVERLAP behind
+the newest stamp it has seen; the indexes replace entries in place, so the
+re-read rows are harmless.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+OVERLAP = timedelta(minutes=5)
+
+
+def newest(stamps: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    return max((s for s in stamps if s), default=None)
+
+
+class SyncWindow:
+    """The newest updated_at an index has read. Only ever moves forward."""
+
+    def __init__(self):
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._synced_at is not None
+
+    def since(self) -> Optional[datetime]:
+        """Lower bound for the next incremental read; None until the first load."""
+        with self._lock:
+            return self._synced_at - OVERLAP if self._synced_at else None
+
+    def advance(self, watermark: Optional[datetime]) -> None:
+        with self._lock:
+            if watermark and (self._synced_at is None or watermark > self._synced_at):
+                self._synced_at = watermark
+
+    def start(self, db: Session, table: str) -> None:
+        """Begin at the table's current MAX(updated_at); call before the initial full load."""
+        self.advance(db.execute(text(f"SELECT MAX(updated_at) FROM {table}")).scalar() or datetime.now())
@@ -1,52 +1,208 @@
-from sqlalchemy import text
+import csv
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import text, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from pydantic import ValidationError
+from app.config import settings
 from app.db.connection import SessionLocal  # Import SessionLocal from the connection file
+from app.api.v1.users.schema import UserCreate
 import bcrypt
 
+# bcrypt releases the GIL while hashing, so a plain thread pool hashes a CSV import's
+# passwords in parallel. A single password is hashed inline: create_user is a sync
+# endpoint, already running on a threadpool thread, and would only wait on the pool.
+_HASH_POOL = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+# SQL Server caps a statement at 2100 parameters; 3 IN-lists per chunk stay well below it.
+_CONFLICT_CHUNK = 500
+
+_INSERT_USER_SQL = text("""
+    INSERT INTO users (emp_id, username, password_hash, email, role, full_name, department, designation, status)
+    VALUES (:emp_id, :username, :password_hash, :email, :role, :full_name, :department, :designation, :status)
+""")
+
+
+def _hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def hash_password(password: str) -> str:
+    """Hash a single password on the calling thread."""
+    return _hash_password(password)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash many passwords in parallel, preserving input order."""
+    return list(_HASH_POOL.map(_hash_password, passwords))
+
+
+def _collation_key(value: Any) -> str:
+    """Equality as the users columns compare it (case-insensitive collation, trailing spaces ignored)."""
+    return str(value).rstrip().casefold()
+
+
+def _conflict_detail(db: Session, user_data: dict) -> Optional[str]:
+    """Which unique column of `users` the new user collides with, compared by the database itself."""
+    row = db.execute(text("""
+        SELECT MAX(CASE WHEN username = :username THEN 1 ELSE 0 END) AS username_taken,
+               MAX(CASE WHEN email = :email THEN 1 ELSE 0 END) AS email_taken,
+               MAX(CASE WHEN emp_id = :emp_id THEN 1 ELSE 0 END) AS emp_id_taken
+        FROM users
+        WHERE username = :username OR email = :email OR emp_id = :emp_id
+    """), {k: user_data[k] for k in ("username", "email", "emp_id")}).mappings().fetchone()
+    if row is None:
+        return None
+    if row["username_taken"]:
+        return "Username already exists"
+    if row["email_taken"]:
+        return "Email already exists"
+    if row["emp_id_taken"]:
+        return "Employee ID already exists"
+    return None
+
+
+def _find_conflicts(db: Session, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Return existing (username, email, emp_id) rows that clash with any of `users`,
+    using one query per chunk instead of three SELECTs per user.
+    """
+    sql = text("""
+        SELECT username, email, emp_id FROM users
+        WHERE username IN :usernames OR email IN :emails OR emp_id IN :emp_ids
+    """).bindparams(
+        bindparam("usernames", expanding=True),
+        bindparam("emails", expanding=True),
+        bindparam("emp_ids", expanding=True),
+    )
+    conflicts = []
+    for start in range(0, len(users), _CONFLICT_CHUNK):
+        chunk = users[start:start + _CONFLICT_CHUNK]
+        rows = db.execute(sql, {
+            "usernames": [u["username"] for u in chunk],
+            "emails": [u["email"] for u in chunk],
+            "emp_ids": [u["emp_id"] for u in chunk],
+        }).mappings().fetchall()
+        conflicts.extend(dict(r) for r in rows)
+    return conflicts
+
+
+def _insert_params(user_data: dict, hashed_password: str) -> dict:
+    return {
+        "emp_id": user_data["emp_id"],
+        "username": user_data["username"],
+        "password_hash": hashed_password,
+        "email": user_data["email"],
+        "role": user_data["role"],
+        "full_name": user_data.get("full_name"),
+        "department": user_data.get("department"),
+        "designation": user_data.get("designation"),
+        "status": user_data["status"]
+    }
+
+
 def create_user(db: Session, user_data: dict):
     try:
-        # Check if the username already exists
-        existing_user = db.execute(text("SELECT 1 FROM users WHERE username = :username"), {"username": user_data["username"]}).fetchone()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already exists")
-
-        # Check if the email already exists
-        existing_email = db.execute(text("SELECT 1 FROM users WHERE email = :email"), {"email": user_data["email"]}).fetchone()
-        if existing_email:
-            raise HTTPException(status_code=400, detail="Email already exists")
-
-        # Check if emp_id already exists
-        existing_emp_id = db.execute(text("SELECT 1 FROM users WHERE emp_id = :emp_id"), {"emp_id": user_data["emp_id"]}).fetchone()
-        if existing_emp_id:
-            raise HTTPException(status_code=400, detail="Employee ID already exists")
-
-        # Hash the password before saving
-        hashed_password = bcrypt.hashpw(user_data["password_hash"].encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-        # Raw SQL query to insert the new user
-        query = """
-        INSERT INTO users (emp_id, username, password_hash, email, role, full_name, department, designation, status)
-        VALUES (:emp_id, :username, :password_hash, :email, :role, :full_name, :department, :designation, :status)
-        """
-
-        # Execute the query
-        db.execute(text(query), {
-            "emp_id": user_data["emp_id"],  # Now we are using the emp_id passed in the request
-            "username": user_data["username"],
-            "password_hash": hashed_password,
-            "email": user_data["email"],
-            "role": user_data["role"],
-            "full_name": user_data.get("full_name"),
-            "department": user_data.get("department"),
-            "designation": user_data.get("designation"),
-            "status": user_data["status"]
-        })
+        # Resolve username / email / emp_id conflicts in a single round-trip
+        detail = _conflict_detail(db, user_data)
+        if detail:
+            raise HTTPException(status_code=400, detail=detail)
+
+        hashed_password = hash_password(user_data["password_hash"])
+
+        db.execute(_INSERT_USER_SQL, _insert_params(user_data, hashed_password))
 
         # Commit the transaction
         db.commit()
 
         return {"message": "User created successfully", "emp_id": user_data["emp_id"]}  # Return emp_id from the request
 
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError as e:
+        # a concurrent insert won the race: report the constraint that actually fired
+        db.rollback()
+        detail = _conflict_detail(db, user_data)
+        db.rollback()
+        raise HTTPException(status_code=400, detail=detail or f"Error creating user: {str(e)}")
     except Exception as e:
         db.rollback()  # Rollback transaction in case of error
         raise HTTPException(status_code=400, detail=f"Error creating user: {str(e)}")
+
+
+def import_users_csv(db: Session, csv_bytes: bytes) -> Dict[str, Any]:
+    """
+    Bulk-create users from a CSV whose header matches UserCreate's fields
+    (emp_id, username, password_hash, email, role, ...).
+
+    Rows are validated, de-duplicated within the file and against `users` in one
+    query per chunk, hashed in parallel, then inserted with a single executemany.
+    """
+    try:
+        reader = csv.DictReader(io.StringIO(csv_bytes.decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    valid: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    seen_usernames, seen_emails, seen_emp_ids = set(), set(), set()
+
+    for line_no, raw in enumerate(reader, start=2):  # line 1 is the header
+        row = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in raw.items() if k}
+        row = {k: v for k, v in row.items() if v not in ("", None)}
+        try:
+            user = UserCreate(**row).model_dump()
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": e.errors(include_url=False)})
+            continue
+
+        username, email = _collation_key(user["username"]), _collation_key(user["email"])
+        if username in seen_usernames or email in seen_emails or user["emp_id"] in seen_emp_ids:
+            errors.append({"line": line_no, "error": "Duplicate username, email or emp_id in file"})
+            continue
+        seen_usernames.add(username)
+        seen_emails.add(email)
+        seen_emp_ids.add(user["emp_id"])
+        user["_line"] = line_no
+        valid.append(user)
+
+    if valid:
+        existing = _find_conflicts(db, valid)
+        taken_usernames = {_collation_key(r["username"]) for r in existing}
+        taken_emails = {_collation_key(r["email"]) for r in existing}
+        taken_emp_ids = {r["emp_id"] for r in existing}
+        fresh = []
+        for user in valid:
+            if (_collation_key(user["username"]) in taken_usernames or _collation_key(user["email"]) in taken_emails
+                    or user["emp_id"] in taken_emp_ids):
+                errors.append({"line": user["_line"], "error": "User already exists"})
+            else:
+                fresh.append(user)
+        valid = fresh
+
+    if valid:
+        hashed = hash_passwords([u["password_hash"] for u in valid])
+        params = [_insert_params(u, h) for u, h in zip(valid, hashed)]
+        try:
+            db.execute(_INSERT_USER_SQL, params)  # executemany (fast_executemany on pyodbc)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logging.error(f"Bulk user import failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Error importing users: {str(e)}")
+
+    logging.info(f"User import: {len(valid)} created, {len(errors)} rejected")
+    return {
+        "message": "User import completed",
+        "created": len(valid),
+        "failed": len(errors),
+        "emp_ids": [u["emp_id"] for u in valid],
+        "errors": errors,
+    }
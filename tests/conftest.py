@@ -0,0 +1,9 @@
+import os
+
+# app.config requires the connection settings; unit tests never open a connection
+for name, value in {"DB_SERVER": "localhost", "DB_NAME": "test", "DB_USER": "test", "DB_PASSWORD": "test"}.items():
+    os.environ.setdefault(name, value)
+
+# deterministic, model-free vectors (embedders.HashingEmbedder) and no batching thread
+os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+os.environ.setdefault("EMBED_BATCHING_ENABLED", "false")
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.aishortlist import MODEL, _split_windows, embed_documents, prefilter_reason
+
+KEYWORDS = {"python", "aws"}
+PREFILTER = {"min_experience": 3, "max_experience": 6, "experience_tolerance": 1, "min_keyword_score": 20}
+
+
+@pytest.mark.parametrize("experience_years, dropped", [
+    (1.5, True),    # below min even with tolerance
+    (2, False),     # within tolerance of the min
+    (4, False),
+    (7, False),     # within tolerance of the max
+    (7.5, True),    # above max even with tolerance
+    (0, False),     # 0 means "not found in the resume": never filtered on
+    (None, False),
+])
+def test_experience_range(experience_years, dropped):
+    reason = prefilter_reason(50, KEYWORDS, experience_years, PREFILTER)
+    assert (reason is not None) == dropped
+    if dropped:
+        assert "experience" in reason
+
+
+def test_experience_without_tolerance():
+    prefilter = dict(PREFILTER, experience_tolerance=None)
+    assert "below required 3y" in prefilter_reason(50, KEYWORDS, 2, prefilter)
+    assert "above range max 6y" in prefilter_reason(50, KEYWORDS, 7, prefilter)
+
+
+def test_open_ended_range():
+    prefilter = dict(PREFILTER, max_experience=None)
+    assert prefilter_reason(50, KEYWORDS, 30, prefilter) is None
+
+
+@pytest.mark.parametrize("keyword_score, keywords, dropped", [
+    (19.9, KEYWORDS, True),
+    (20, KEYWORDS, False),       # strictly below the threshold drops
+    (0, set(), False),           # job has no high-priority keywords: nothing to score against
+])
+def test_keyword_threshold(keyword_score, keywords, dropped):
+    reason = prefilter_reason(keyword_score, keywords, 4, PREFILTER)
+    assert (reason is not None) == dropped
+    if dropped:
+        assert reason == "keyword score 19.9 below threshold 20"
+
+
+def test_default_keyword_threshold_drops_nobody():
+    assert prefilter_reason(0, KEYWORDS, 4, dict(PREFILTER, min_keyword_score=0.0)) is None
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "PREFILTER_ENABLED", False)
+    assert prefilter_reason(0, KEYWORDS, 20, PREFILTER) is None
+
+
+def test_no_config():
+    assert prefilter_reason(0, KEYWORDS, 20, {}) is None
+    assert prefilter_reason(0, KEYWORDS, 20, None) is None
+
+
+# ------------------------------ windows and pooling ------------------------------
+
+@pytest.fixture
+def small_windows(monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_WINDOW_WORDS", 10)
+    monkeypatch.setattr(settings, "EMBED_WINDOW_OVERLAP", 3)
+    monkeypatch.setattr(settings, "EMBED_MAX_WINDOWS", 16)
+    monkeypatch.setattr(settings, "EMBED_POOLING", "mean")
+
+
+def words(n, prefix="w"):
+    return " ".join(f"{prefix}{i}" for i in range(n))
+
+
+@pytest.mark.parametrize("n, starts", [
+    (3, [0]),
+    (10, [0]),              # exactly one window
+    (11, [0, 7]),           # one word over: a second window ending at the last word
+    (24, [0, 7, 14]),
+    (25, [0, 7, 14, 21]),
+])
+def test_split_windows_boundaries(small_windows, n, starts):
+    windows = _split_windows(words(n))
+    assert [w.split()[0] for w in windows] == [f"w{s}" for s in starts]
+    assert windows[-1].split()[-1:] == words(n).split()[-1:]  # nothing dropped at the end
+    assert all(len(w.split()) <= 10 for w in windows)
+
+
+def test_split_windows_empty_text(small_windows):
+    assert _split_windows("") == [""]
+
+
+def test_split_windows_overlap(small_windows):
+    first, second, *_ = _split_windows(words(30))
+    assert first.split()[-3:] == second.split()[:3]
+
+
+def test_split_windows_cap(small_windows, monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_MAX_WINDOWS", 2)
+    assert len(_split_windows(words(1000))) == 2
+
+
+def test_split_windows_overlap_not_smaller_than_window(small_windows, monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_WINDOW_OVERLAP", 10)  # step clamps to 1 instead of looping forever
+    assert len(_split_windows(words(12))) == 3
+
+
+@pytest.mark.parametrize("pooling", ["mean", "max"])
+def test_embed_documents_pools_windows_into_unit_vectors(small_windows, monkeypatch, pooling):
+    monkeypatch.setattr(settings, "EMBED_POOLING", pooling)
+    long_doc, short_doc = words(25, "skill"), "python aws docker"
+
+    vectors = embed_documents([long_doc, short_doc])
+
+    assert vectors.shape == (2, MODEL.get_sentence_embedding_dimension())
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    windows = np.asarray(MODEL.encode(_split_windows(long_doc), normalize_embeddings=True))
+    pooled = windows.max(axis=0) if pooling == "max" else windows.mean(axis=0)
+    assert np.allclose(vectors[0], pooled / np.linalg.norm(pooled), atol=1e-5)
+    # pooling is per document: batching documents together does not mix their windows
+    assert np.allclose(vectors[1], embed_documents([short_doc])[0], atol=1e-5)
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from app.services.applicant_search import ApplicantSearchIndex
+from app.services.sync_window import OVERLAP
+
+
+class FakeSession:
+    """Answers MAX(updated_at) with `watermark` and every row query with `rows`."""
+
+    def __init__(self, rows, watermark=None):
+        self.rows = rows
+        self.watermark = watermark
+        self.params = []
+
+    def execute(self, statement, params=None):
+        self.params.append(params)
+        return self
+
+    def scalar(self):
+        return self.watermark
+
+    def mappings(self):
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+def row(applicant_id, skills, updated_at, location="Pune"):
+    return {"applicant_id": applicant_id, "skills": skills, "location": location, "education": "B.Tech",
+            "experience_years": 4, "updated_at": updated_at}
+
+
+def test_sync_re_indexes_changed_applicants():
+    index = ApplicantSearchIndex()
+    loaded_at = datetime(2026, 10, 19, 12)
+    assert index.sync(FakeSession([row(1, "python", loaded_at), row(2, "java", loaded_at)], loaded_at)) == 2
+    assert index.search(skills=["python"]) == (1, [1])
+
+    changed_at = datetime(2026, 10, 19, 13)
+    db = FakeSession([row(1, "java, aws", changed_at)])  # an existing applicant, not a new applicant_id
+    index.sync(db)
+    assert db.params[-1] == {"since": loaded_at - OVERLAP}
+    assert index.search(skills=["python"]) == (0, [])
+    assert index.search(skills=["java"]) == (2, [2, 1])
+
+    db = FakeSession([])
+    index.sync(db)
+    assert db.params[-1] == {"since": changed_at - OVERLAP}
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import bulk_stream_service
+
+BOUNDARY = b"resume-boundary"
+
+
+def part(filename: str, data: bytes) -> bytes:
+    return (b"--" + BOUNDARY + b"\r\n"
+            b'Content-Disposition: form-data; name="resumes"; filename="' + filename.encode() + b'"\r\n'
+            b"Content-Type: application/pdf\r\n\r\n" + data + b"\r\n")
+
+
+BODY = part("first.pdf", b"%PDF-1.4 first") + part("second.pdf", b"%PDF-1.4 second") + b"--" + BOUNDARY + b"--\r\n"
+# everything up to the middle of the second file: the first part is complete
+SPLIT = BODY.index(b"second") + 3
+
+
+@pytest.fixture(autouse=True)
+def fake_pipeline(monkeypatch):
+    seen = []
+
+    def process(part, payload):
+        seen.append(part)
+        with open(part["tmp_path"], "rb") as f:
+            data = f.read()
+        os.unlink(part["tmp_path"])
+        return {"filename": part["filename"], "size": len(data), "status": "success", "status_code": 201,
+                "error": None}
+
+    monkeypatch.setattr(bulk_stream_service, "process_resume_part", process)
+    return seen
+
+
+def run_upload(receive, on_line=None, spec_version="2.3"):
+    """Serve one streaming upload; returns the NDJSON lines sent."""
+    lines = []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            for line in message["body"].decode().splitlines():
+                lines.append(json.loads(line))
+                if on_line:
+                    on_line(lines[-1])
+
+    async def serve():
+        request = SimpleNamespace(receive=receive)
+        response = bulk_stream_service.start_stream_ingest(request, BOUNDARY, SimpleNamespace(job_id=1))
+        scope = {"type": "http", "asgi": {"spec_version": spec_version}}
+        await asyncio.wait_for(response(scope, None, send), timeout=5)
+        # the body reader and scoring workers outlive a disconnected response; let them finish
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.wait_for(asyncio.gather(*others), timeout=5)
+
+    asyncio.run(serve())
+    return lines
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])  # with / without Starlette's disconnect listener
+def test_first_result_is_sent_before_the_upload_ends(spec_version):
+    first_line = asyncio.Event()
+    chunks = [BODY[:SPLIT], BODY[SPLIT:]]
+
+    async def receive():
+        if len(chunks) == 1:
+            await first_line.wait()  # hold back the rest of the upload until a result is out
+        if chunks:
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        await asyncio.Event().wait()  # client stays connected
+
+    lines = run_upload(receive, on_line=lambda line: first_line.set(), spec_version=spec_version)
+
+    assert [line.get("filename") for line in lines[:2]] == ["first.pdf", "second.pdf"]
+    assert lines[0]["size"] == len(b"%PDF-1.4 first")
+    assert lines[-1]["summary"]["successful"] == 2 and lines[-1]["summary"]["error"] is None
+
+
+def test_client_disconnect_mid_body_stops_the_response(fake_pipeline):
+    chunks = [BODY[:SPLIT]]
+
+    async def receive():
+        if chunks:
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": True}
+        return {"type": "http.disconnect"}
+
+    run_upload(receive)  # returns instead of waiting for the rest of the body
+
+    # the complete part is still scored; the half-received one is dropped
+    assert [p["filename"] for p in fake_pipeline] == ["first.pdf"]
@@ -0,0 +1,31 @@
+import io
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.services import bulk_zip_service
+
+
+def archive(names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name in names:
+            zf.writestr(name, b"" if name.endswith("/") else b"%PDF-1.4")
+    buffer.seek(0)
+    return buffer
+
+
+def test_entry_limit_counts_ignored_members(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_ZIP_MAX_ENTRIES", 3)
+    names = ["resumes/", "__MACOSX/._a.pdf", ".DS_Store", "resumes/a.pdf"]  # only one scoreable member
+    with pytest.raises(HTTPException) as raised:
+        bulk_zip_service.ingest_resume_zip(archive(names), payload=None)
+    assert raised.value.status_code == 413
+
+
+def test_archive_of_only_ignored_members_is_rejected():
+    with pytest.raises(HTTPException) as raised:
+        bulk_zip_service.ingest_resume_zip(archive(["resumes/", ".DS_Store"]), payload=None)
+    assert raised.value.status_code == 400
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.interviews.schemas import BulkInterviewCreate, InterviewCreate
+from app.config import settings
+from app.services.interview_scheduler import InterviewIndex, _align, _Calendar
+
+MONDAY = datetime(2026, 10, 19)
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """`day` days after MONDAY at hour:minute."""
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+@pytest.fixture(autouse=True)
+def working_hours(monkeypatch):
+    monkeypatch.setattr(settings, "INTERVIEW_WORKDAY_START_HOUR", 9)
+    monkeypatch.setattr(settings, "INTERVIEW_WORKDAY_END_HOUR", 18)
+    monkeypatch.setattr(settings, "INTERVIEW_SKIP_WEEKENDS", True)
+    monkeypatch.setattr(settings, "INTERVIEW_SLOT_MINUTES", 15)
+    monkeypatch.setattr(settings, "INTERVIEW_SEARCH_DAYS", 60)
+
+
+def blocks(calendar: _Calendar):
+    return list(zip(calendar.starts, calendar.ends))
+
+
+# ------------------------------ _Calendar ------------------------------
+
+def test_calendar_merges_overlapping_and_touching_bookings():
+    calendar = _Calendar()
+    calendar.add(1, at(0, 10), at(0, 11))
+    calendar.add(2, at(0, 13), at(0, 14))
+    calendar.add(3, at(0, 10, 30), at(0, 12))
+    assert blocks(calendar) == [(at(0, 10), at(0, 12)), (at(0, 13), at(0, 14))]
+
+    calendar.add(4, at(0, 12), at(0, 13))  # touches both blocks
+    assert blocks(calendar) == [(at(0, 10), at(0, 14))]
+
+
+def test_calendar_remove_splits_the_merged_block():
+    calendar = _Calendar()
+    calendar.add(1, at(0, 10), at(0, 11))
+    calendar.add(2, at(0, 11), at(0, 12))
+    calendar.add(3, at(0, 12), at(0, 13))
+
+    calendar.remove(2)
+    assert blocks(calendar) == [(at(0, 10), at(0, 11)), (at(0, 12), at(0, 13))]
+    calendar.remove(2)  # unknown ids are ignored
+    assert set(calendar.bookings) == {1, 3}
+
+
+def test_calendar_re_adding_a_schedule_moves_it():
+    calendar = _Calendar()
+    calendar.add(1, at(0, 10), at(0, 11))
+    calendar.add(1, at(0, 15), at(0, 16))
+    assert blocks(calendar) == [(at(0, 15), at(0, 16))]
+    assert calendar.bookings == {1: (at(0, 15), at(0, 16))}
+
+
+def test_calendar_blocking_end():
+    calendar = _Calendar()
+    calendar.add(1, at(0, 10), at(0, 11))
+    calendar.add(2, at(0, 14), at(0, 15))
+
+    assert calendar.blocking_end(at(0, 9), at(0, 10)) is None  # ends as the booking starts
+    assert calendar.blocking_end(at(0, 11), at(0, 12)) is None  # starts as the booking ends
+    assert calendar.blocking_end(at(0, 10, 30), at(0, 11, 30)) == at(0, 11)
+    assert calendar.blocking_end(at(0, 13), at(0, 14, 15)) == at(0, 15)  # block starts inside the window
+    assert calendar.blocking_end(at(0, 9), at(0, 16)) == at(0, 11)
+    assert calendar.overlapping(at(0, 9), at(0, 16)) == [1, 2]
+
+
+# ------------------------------ _align ------------------------------
+
+@pytest.mark.parametrize("start, duration, expected", [
+    (at(0, 10, 7), 60, at(0, 10, 15)),        # rounded up to the slot grid
+    (at(0, 10, 15), 60, at(0, 10, 15)),       # already on the grid
+    (at(0, 10, 15) + timedelta(seconds=1), 60, at(0, 10, 30)),
+    (at(0, 7), 60, at(0, 9)),                 # before the working day
+    (at(0, 17), 60, at(0, 17)),               # ends exactly at close
+    (at(0, 17, 30), 60, at(1, 9)),            # would run past close
+    (at(4, 17, 30), 60, at(7, 9)),            # Friday evening -> Monday
+    (at(5, 11), 60, at(7, 9)),                # Saturday -> Monday
+    (at(6, 23, 50), 30, at(7, 9)),            # late Sunday -> Monday
+])
+def test_align(start, duration, expected):
+    assert _align(start, timedelta(minutes=duration)) == expected
+
+
+def test_align_books_weekends_when_not_skipped(monkeypatch):
+    monkeypatch.setattr(settings, "INTERVIEW_SKIP_WEEKENDS", False)
+    assert _align(at(4, 17, 30), timedelta(minutes=60)) == at(5, 9)
+
+
+# ------------------------------ panel slot search ------------------------------
+
+def test_next_common_slot_alternates_across_the_panel():
+    index = InterviewIndex()
+    index.apply(1, [7], at(0, 9), 60, active=True)
+    index.apply(2, [8], at(0, 10), 60, active=True)
+    index.apply(3, [7], at(0, 11), 30, active=True)
+
+    assert index.next_common_slot([7, 8], at(0, 9), 60) == at(0, 11, 30)
+    assert index.next_common_slot([7], at(0, 9), 60) == at(0, 10)
+    assert index.next_common_slot([9], at(0, 9), 60) == at(0, 9)  # no bookings at all
+
+
+def test_next_common_slot_skips_to_the_next_working_day():
+    index = InterviewIndex()
+    index.apply(1, [7], at(4, 16), 120, active=True)  # Friday 16:00-18:00
+    assert index.next_common_slot([7, 8], at(4, 15), 90) == at(7, 9)
+
+
+def test_next_common_slot_ignores_inactive_bookings():
+    index = InterviewIndex()
+    index.apply(1, [7], at(0, 9), 60, active=True)
+    index.apply(1, [7], None, None, active=False)
+    assert index.next_common_slot([7], at(0, 9), 60) == at(0, 9)
+    assert index.conflicts([7], at(0, 9), 60) == {}
+
+
+def test_next_common_slot_gives_up_after_the_search_window(monkeypatch):
+    monkeypatch.setattr(settings, "INTERVIEW_SEARCH_DAYS", 1)
+    index = InterviewIndex()
+    index.apply(1, [7], at(0, 9), 9 * 60, active=True)
+    index.apply(2, [7], at(1, 9), 9 * 60, active=True)
+    with pytest.raises(HTTPException) as raised:
+        index.next_common_slot([7], at(0, 9), 60)
+    assert raised.value.status_code == 409
+
+
+# ------------------------------ request times ------------------------------
+
+def test_offset_aware_times_become_naive_local():
+    utc = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+    payload = InterviewCreate(application_id=1, interviewer_ids=[7], scheduled_date="2026-10-19T10:00:00Z")
+    assert payload.scheduled_date.tzinfo is None
+    assert payload.scheduled_date == utc.astimezone().replace(tzinfo=None)
+
+    bulk = BulkInterviewCreate(application_ids=[1], interviewer_ids=[7], not_before="2026-10-19T12:00:00+02:00")
+    assert bulk.not_before == utc.astimezone().replace(tzinfo=None)
+
+    naive = InterviewCreate(application_id=1, interviewer_ids=[7], scheduled_date="2026-10-19T10:00:00")
+    assert naive.scheduled_date == datetime(2026, 10, 19, 10, 0)
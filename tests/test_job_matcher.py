@@ -0,0 +1,83 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services import aishortlist, job_matcher, semantic_search
+
+RESUME = "Senior data engineer: Python, Spark, Databricks and AWS pipelines, Airflow scheduling"
+JOBS = [
+    {"job_id": 3, "title": "Data Engineer", "jd": "Build Spark and Databricks pipelines on AWS with Python",
+     "key_skills": "python, spark, databricks", "additional_skills": "airflow", "status": "open"},
+    {"job_id": 4, "title": "Payroll Accountant", "jd": "Monthly payroll, ledger reconciliation and tax filings",
+     "key_skills": "payroll, ledger", "additional_skills": "excel", "status": "open"},
+]
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def scalar(self):
+        return None
+
+
+class FakeSession:
+    """Answers recommend_jobs' queries: one applicant, no stored vector, no applications."""
+
+    def __init__(self, applicant):
+        self.applicant = applicant
+        self.stored = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "FROM applicants" in sql:
+            return _Result([self.applicant])
+        if "MERGE applicant_embeddings" in sql:
+            self.stored.append(params)
+        return _Result([])
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(semantic_search, "index", semantic_search.EmbeddingMatrix())
+    monkeypatch.setattr(job_matcher, "matrix", job_matcher.OpenJobMatrix())
+    monkeypatch.setattr(job_matcher, "get_active_jobs", lambda db: JOBS)
+    monkeypatch.setattr(aishortlist, "extract_text_from_pdf", lambda path: RESUME)
+
+
+def applicant(resume_url):
+    return {"applicant_id": 5, "first_name": "Asha", "last_name": "Rao", "skills": "Python, Spark",
+            "current_role": "Data Engineer", "resume_url": resume_url}
+
+
+def test_prefiltered_applicant_is_matched_from_their_resume_file(tmp_path):
+    # dropped by one job's prefilter before it was scored, so no vector was ever stored
+    resume = tmp_path / "resume.pdf"
+    resume.write_bytes(b"%PDF-1.4")
+    db = FakeSession(applicant(str(resume)))
+
+    result = job_matcher.recommend_jobs(db, 5)
+
+    assert [m["job_id"] for m in result["matches"]] == [3, 4]
+    assert [p["applicant_id"] for p in db.stored] == [5] and db.commits == 1
+    assert semantic_search.index.vector_of(5) is not None  # later requests skip the PDF
+
+
+def test_applicant_without_a_resume_file_is_not_found(tmp_path):
+    db = FakeSession(applicant(str(tmp_path / "missing.pdf")))
+    with pytest.raises(HTTPException) as raised:
+        job_matcher.recommend_jobs(db, 5)
+    assert raised.value.status_code == 404
+    assert db.stored == []
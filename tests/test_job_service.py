@@ -0,0 +1,18 @@
+import pytest
+
+from app.services.job_service import parse_experience_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3-5 years", (3, 5)),
+    ("5 - 3 yrs", (3, 5)),
+    ("1.5 to 4 years", (1.5, 4)),
+    ("8+ yrs", (8, None)),
+    ("5", (5, None)),
+    ("2-4 years, 10 preferred", (2, 4)),  # only the first two numbers
+    ("fresher", (None, None)),
+    ("", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_experience_range(text, expected):
+    assert parse_experience_range(text) == expected
@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.services.semantic_search import EmbeddingMatrix, vector_from_bytes, vector_to_bytes
+
+
+def unit(*values):
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_first_add_into_an_empty_matrix():
+    index = EmbeddingMatrix()
+    index.add(7, unit(1, 0, 0))
+    assert len(index) == 1
+    assert np.allclose(index.vector_of(7), unit(1, 0, 0))
+
+
+def test_add_replaces_in_place_and_grows_past_capacity():
+    index = EmbeddingMatrix()
+    for applicant_id in range(1, 1500):
+        index.add(applicant_id, unit(applicant_id, 1, 0))
+    index.add(3, unit(0, 0, 1))
+    assert len(index) == 1499
+    assert np.allclose(index.vector_of(3), unit(0, 0, 1))
+    assert np.allclose(index.vector_of(1499), unit(1499, 1, 0))
+
+
+def test_top_k_orders_by_similarity_and_excludes():
+    index = EmbeddingMatrix()
+    index.add(1, unit(1, 0, 0))
+    index.add(2, unit(1, 1, 0))
+    index.add(3, unit(0, 1, 0))
+
+    assert [a for a, _ in index.top_k(unit(1, 0.1, 0), 2)] == [1, 2]
+    assert [a for a, _ in index.top_k(unit(1, 0.1, 0), 5, exclude=1)] == [2, 3]
+    assert EmbeddingMatrix().top_k(unit(1, 0, 0), 3) == []
+
+
+def test_vector_bytes_round_trip():
+    vector = unit(0.25, -1, 3)
+    assert np.array_equal(vector_from_bytes(vector_to_bytes(vector)), vector)
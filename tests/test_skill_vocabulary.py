@@ -0,0 +1,65 @@
+import pytest
+
+from app.services.skill_vocabulary import SKILL_ALIASES, canonical_skill, canonical_skills
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Python", "python"),
+    ("py", "python"),
+    ("Python3", "python"),
+    ("AWS", "amazon web services"),
+    ("Amazon AWS", "amazon web services"),
+    ("K8s", "kubernetes"),
+    ("ReactJS", "react"),
+    ("React.js", "react"),
+    ("  Node   JS ", "node.js"),
+    ("Unlisted Skill", "unlisted skill"),          # kept as its normalised self
+    # slash skills are one skill, however they are spaced
+    ("CI/CD", "ci/cd"),
+    ("ci / cd", "ci/cd"),
+    ("CICD", "ci/cd"),
+    ("ci-cd", "ci/cd"),
+    ("PL/SQL", "pl/sql"),
+    ("pl / sql", "pl/sql"),
+    ("Oracle PL/SQL", "pl/sql"),
+    ("TCP-IP", "tcp/ip"),
+    # symbols that punctuation trimming must not eat
+    (".NET", ".net"),
+    ("dot net", ".net"),
+    (".NET Core", ".net"),
+    ("C++", "c++"),
+    ("cpp", "c++"),
+    ("C#", "c#"),
+    ("C Sharp", "c#"),
+    # bullet and trailing punctuation
+    ("• Docker.", "docker"),
+    ("- SQL;", "sql"),
+    ("(Kafka)", "apache kafka"),
+])
+def test_canonical_skill(raw, expected):
+    assert canonical_skill(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    None, "", "  ", "-", "•",
+    "x" * 101,                                      # longer than MAX_SKILL_LENGTH
+    "worked on many large scale data projects",     # a sentence, not a skill
+])
+def test_unusable_fragments(raw):
+    assert canonical_skill(raw) is None
+
+
+def test_aliases_map_to_canonical_names():
+    # a canonical name must not itself be an alias, or lookups would need a second hop
+    assert not set(SKILL_ALIASES.values()) & set(SKILL_ALIASES)
+
+
+@pytest.mark.parametrize("skills, expected", [
+    ("Python, py, AWS", ["python", "amazon web services"]),
+    ("CI/CD; PL/SQL\nC++, C#, .NET", ["ci/cd", "pl/sql", "c++", "c#", ".net"]),
+    ("ReactJS,, react.js , ,Node", ["react", "node.js"]),
+    ("", []),
+    (None, []),
+])
+def test_canonical_skills(skills, expected):
+    assert canonical_skills(skills) == expected
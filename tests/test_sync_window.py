@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.services.sync_window import OVERLAP, SyncWindow, newest
+
+
+class FakeSession:
+    def __init__(self, value):
+        self.value = value
+        self.sql = []
+
+    def execute(self, statement):
+        self.sql.append(str(statement))
+        return self
+
+    def scalar(self):
+        return self.value
+
+
+def test_window_re_reads_the_overlap_and_never_moves_back():
+    window = SyncWindow()
+    assert window.since() is None and not window.started
+
+    window.advance(datetime(2026, 10, 19, 12))
+    assert window.since() == datetime(2026, 10, 19, 12) - OVERLAP
+
+    window.advance(datetime(2026, 10, 19, 11))  # an older row re-read inside the overlap
+    window.advance(None)
+    assert window.since() == datetime(2026, 10, 19, 12) - OVERLAP
+
+
+def test_start_begins_at_the_table_watermark():
+    window = SyncWindow()
+    db = FakeSession(datetime(2026, 10, 19, 12))
+    window.start(db, "applicants")
+    assert db.sql == ["SELECT MAX(updated_at) FROM applicants"]
+    assert window.since() == datetime(2026, 10, 19, 12) - OVERLAP
+
+    empty = SyncWindow()
+    empty.start(FakeSession(None), "applicants")
+    assert empty.started
+
+
+def test_newest_skips_missing_stamps():
+    assert newest([None, datetime(2026, 1, 2), datetime(2026, 1, 1)]) == datetime(2026, 1, 2)
+    assert newest([]) is None